@@ -0,0 +1,40 @@
+"""
+Run the Django test suites with pytest as well as `manage.py test`.
+
+Settings come from the environment / .env like manage.py. Tests that need
+Postgres use the `django_db_setup` fixture: it creates the test database
+once per session and skips them when no server is reachable or the test
+database cannot be built there.
+"""
+import os
+
+import django
+import pytest
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.db import DatabaseError, OperationalError, connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def django_test_environment():
+    setup_test_environment()
+    yield
+    teardown_test_environment()
+
+
+@pytest.fixture(scope="session")
+def django_db_setup():
+    try:
+        connection.ensure_connection()
+    except OperationalError as exc:
+        pytest.skip(f"Postgres is not reachable: {exc}")
+    try:
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    except DatabaseError as exc:
+        # e.g. the server lacks an extension the migrations need (pg_trgm)
+        pytest.skip(f"Could not create the test database: {exc}")
+    yield
+    connection.creation.destroy_test_db(old_name, verbosity=0)
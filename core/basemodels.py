@@ -1,17 +1,87 @@
 # core/models.py
+from django.contrib.postgres.indexes import BrinIndex, GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models
+from django.db.models.functions import Upper
 from psqlextra.models import PostgresPartitionedModel
 from psqlextra.partitioning import PostgresTimePartitioningStrategy, PostgresTimePartitionSize
 from psqlextra.types import PostgresPartitioningMethod
 
+from core.querysets import TimePartitionedManager
+
+
+def trigram_index(field, name):
+    """
+    GIN trigram index matching the SQL of `<field>__icontains`
+    (`UPPER(field) LIKE UPPER('%q%')`), so substring search can use it.
+
+    Declared in `Meta.indexes`, it becomes a partitioned index: Postgres
+    creates it on every partition, including ones added later by the
+    partitioning manager.
+    """
+    return GinIndex(OpClass(Upper(field), name="gin_trgm_ops"), name=name)
+
+
+def brin_index(field, name, pages_per_range=32):
+    """
+    BRIN index on `field`: one min/max summary per `pages_per_range` heap
+    pages, a few pages for a whole partition where a btree takes one entry
+    per row. Only selective when `field` follows the physical row order, as
+    created_at does in a tiered partition, so list it in a model's
+    `cold_partition_indexes`. Fewer pages per range narrows the pages a
+    range filter reads, at the cost of a (still small) larger index.
+    """
+    return BrinIndex(fields=[field], name=name, pages_per_range=pages_per_range)
+
+
+def search_vector_field(*fields, config="english"):
+    """Stored generated tsvector column over `fields`, for full-text search."""
+    return models.GeneratedField(
+        expression=SearchVector(*fields, config=config),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
 
 class TimePartitionedModel(PostgresPartitionedModel):
-    """Generic base model for monthly partitioning by created_at."""
+    """
+    Generic base model for monthly partitioning by created_at.
+
+    Subclasses can list `search_fields` for `objects.search()`; back them with
+    `trigram_index()` entries in `Meta.indexes` and, for full-text search, a
+    `search_vector = search_vector_field(...)` column with a GinIndex on it.
+    Setting `rollup_model` ("app_label.Model") enables `objects.rollup()`,
+    see core.rollups.
+
+    `PartitioningMeta` may add a second level: `subpartition_key` (a column
+    of the primary key, which must contain every partitioning column) and
+    `subpartition_count`. Partitions of current and future periods created
+    by the partitioning service are then HASH partitioned on that column
+    into `subpartition_count` tables, see core.subpartitions.
+
+    Indexes that should depend on partition age go to
+    `hot_partition_indexes` (partitions still written to, e.g. btrees) and
+    `cold_partition_indexes` (tiered partitions, e.g. `brin_index()`)
+    instead of `Meta.indexes`; core.tiering builds and swaps them per
+    partition, see core.indexes.PartitionIndexPolicy.
+    """
+
+    search_fields = ()
+    search_config = "english"
+    rollup_model = None
+    hot_partition_indexes = ()
+    cold_partition_indexes = ()
 
     class PartitioningMeta:
         method = PostgresPartitioningMethod.RANGE
         key = ["created_at"]
         # Partition per month
         range_interval = "1 month"
+        # Hash sub-partitions of the current and future months, e.g.:
+        # subpartition_key = "id"
+        # subpartition_count = 4
+
+    objects = TimePartitionedManager()
 
     class Meta:
         abstract = True
@@ -0,0 +1,209 @@
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.utils import timezone
+from psqlextra.models import PostgresPartitionedModel
+
+from core.catalog import catalog
+from core.loaders import CopyLoader
+from core.pagination import KeysetPaginator
+from core.services import PartitioningService
+
+DISTRIBUTIONS = ("uniform", "recent", "burst")
+
+WORDS = ["groceries", "report", "vacation", "workout", "invoice", "meeting", "doctor", "service"]
+
+
+def timestamps(count, distribution="uniform", months=12, now=None, rng=random):
+    """
+    Yield `count` aware datetimes spread over the last `months` months.
+
+    :param distribution: "uniform" (evenly spread), "recent" (exponential, most
+                         rows in the last few weeks) or "burst" (80% in the last month)
+    """
+    now = now or timezone.now()
+    span = (now - (now - relativedelta(months=months))).total_seconds()
+    month = timedelta(days=30).total_seconds()
+    for _ in range(count):
+        if distribution == "recent":
+            age = min(rng.expovariate(1 / (span / 8)), span)
+        elif distribution == "burst":
+            age = rng.uniform(0, month) if rng.random() < 0.8 else rng.uniform(0, span)
+        else:
+            age = rng.uniform(0, span)
+        yield now - timedelta(seconds=age)
+
+
+def measure(func, repeat=20, warmup=2):
+    """Call `func` `warmup` + `repeat` times. :return: timing summary in milliseconds"""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[max(int(len(timings) * 0.95) - 1, 0)], 3),
+        "min_ms": round(timings[0], 3),
+    }
+
+
+class ModelBenchmark:
+    """
+    Benchmark one Todo-like model (title, description, is_completed,
+    created_at): load `rows` generated rows, then time the read paths and,
+    for partitioned models, partition maintenance.
+
+    Rows are added to the model's table and removed again by :meth:`cleanup`,
+    so run it against a development database. Every timed operation is a
+    zero-argument callable in :meth:`operations`, so it can also be handed to
+    pytest-benchmark's `benchmark` fixture.
+    """
+
+    def __init__(self, model, rows=10000, distribution="uniform", months=12, seed=0):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution {distribution!r}")
+        self.model = model
+        self.rows = rows
+        self.distribution = distribution
+        self.months = months
+        self.rng = random.Random(seed)
+        self.now = timezone.now()
+        self.partitioned = issubclass(model, PostgresPartitionedModel)
+        self.table = model._meta.db_table
+
+    def _rows(self):
+        for i, created_at in enumerate(
+            timestamps(self.rows, self.distribution, self.months, self.now, self.rng)
+        ):
+            yield {
+                "title": f"bench {self.rng.choice(WORDS)} #{i}",
+                "description": "benchmark row",
+                "is_completed": self.rng.random() < 0.5,
+                "created_at": created_at,
+            }
+
+    def setup(self):
+        """Remember where the benchmark rows start and make sure their partitions exist."""
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(self.table)}")
+            self.first_id = cursor.fetchone()[0]
+        if self.partitioned:
+            start = (self.now - relativedelta(months=self.months)).replace(tzinfo=None)
+            PartitioningService(self.model).ensure_partitions_between(
+                "created_at", start, self.now.replace(tzinfo=None)
+            )
+
+    def insert(self):
+        """Load the rows with COPY. :return: result dict with rows per second"""
+        loader = CopyLoader(self.model, fields=["title", "description", "is_completed", "created_at"])
+        started = time.perf_counter()
+        loader.load(self._rows())
+        seconds = time.perf_counter() - started
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(self.table)}")
+        return {"seconds": round(seconds, 3), "rows_per_second": round(self.rows / seconds)}
+
+    def operations(self):
+        """:return: {name: zero-argument callable} of the timed read operations"""
+        objects = self.model._default_manager
+        ordered = objects.order_by("-created_at", "-id")
+        sample = list(
+            objects.filter(id__gt=self.first_id).values_list("id", "created_at")[:1000]
+        )
+        depth = min(self.rows // 2, 10000)
+        key = ordered.values_list("created_at", "id")[depth]
+        cursor = KeysetPaginator.encode_cursor(key, "next")
+        window = self.now - timedelta(days=30)
+
+        ops = {
+            "pk_lookup": lambda: objects.get(pk=self.rng.choice(sample)[0]),
+            "recent_window": lambda: list(ordered.filter(created_at__gte=window)[:50]),
+            "deep_offset": lambda: list(ordered[depth:depth + 50]),
+            "deep_keyset": lambda: KeysetPaginator(objects.all(), 50).page(cursor),
+            "text_search": lambda: list(objects.filter(title__icontains=self.rng.choice(WORDS))[:50]),
+            "count": lambda: objects.count(),
+            "window_count": lambda: objects.filter(created_at__gte=window).count(),
+        }
+        if self.partitioned:
+            # With the partition key the lookup is pruned to a single partition.
+            ops["pk_lookup_with_key"] = lambda: objects.get(
+                **dict(zip(("pk", "created_at"), self.rng.choice(sample)))
+            )
+        return ops
+
+    def maintenance(self, repeat=3):
+        """Time partition DDL: creating a year of monthly partitions, and a catalog snapshot load."""
+        if not self.partitioned:
+            return {}
+        service = PartitioningService(self.model, partition_size="month")
+        start = datetime(2090, 1, 1)
+
+        def create():
+            partitions = service._missing_partitions(start, datetime(2090, 12, 1))
+            list(service.apply_partitions(partitions))
+            return partitions
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            partitions = create()
+            timings.append((time.perf_counter() - started) * 1000)
+            with connection.cursor() as cursor:
+                for partition in partitions:
+                    cursor.execute(
+                        f"DROP TABLE {connection.ops.quote_name(f'{self.table}_{partition.name()}')}"
+                    )
+            catalog.invalidate(self.table)
+
+        return {
+            "create_12_partitions": {
+                "repeat": repeat,
+                "mean_ms": round(statistics.fmean(timings), 3),
+                "min_ms": round(min(timings), 3),
+            },
+            "catalog_snapshot": measure(lambda: catalog._load(self.table), repeat=20),
+        }
+
+    def cleanup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {connection.ops.quote_name(self.table)} WHERE id > %s AND title LIKE 'bench %%'",
+                [self.first_id],
+            )
+
+    def run(self, repeat=20, keep=False):
+        """Run the whole benchmark. :return: list of result dicts"""
+        name = self.model.__name__
+        self.setup()
+        try:
+            results = [{"model": name, "operation": "insert", "rows": self.rows, **self.insert()}]
+            for operation, func in self.operations().items():
+                results.append({"model": name, "operation": operation, **measure(func, repeat)})
+            for operation, result in self.maintenance().items():
+                results.append({"model": name, "operation": operation, **result})
+        finally:
+            if not keep:
+                self.cleanup()
+        return results
+
+
+def environment():
+    """Metadata stored with every result set, to compare runs across releases."""
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW server_version")
+        server_version = cursor.fetchone()[0]
+    return {
+        "started_at": datetime.now(dt_timezone.utc).isoformat(),
+        "postgres": server_version,
+        "engine": connection.settings_dict["ENGINE"],
+    }
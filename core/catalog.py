@@ -0,0 +1,153 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection, transaction
+
+
+# Every partition of a table with its bounds, parsed out of the partition
+# bound expression ("FOR VALUES FROM ('...') TO ('...')"), the planner's row
+# estimate and its leaf tables: itself, or its sub-partitions when it is
+# partitioned again (estimates summed, -1 while none was analyzed). Bounds
+# are NULL for the default partition.
+PARTITION_CATALOG_SQL = r"""
+    SELECT child.relname, bounds[1]::timestamptz, bounds[2]::timestamptz,
+           COALESCE(leaves.reltuples, child.reltuples), COALESCE(leaves.names, ARRAY[child.relname::text])
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    CROSS JOIN LATERAL regexp_match(
+        pg_get_expr(child.relpartbound, child.oid),
+        'FROM \(''([^'']*)''\) TO \(''([^'']*)''\)'
+    ) AS bounds
+    LEFT JOIN LATERAL (
+        SELECT array_agg(leaf.relname::text ORDER BY leaf.relname) AS names,
+               CASE WHEN bool_and(leaf.reltuples < 0) THEN -1 ELSE SUM(GREATEST(leaf.reltuples, 0)) END AS reltuples
+        FROM pg_partition_tree(child.oid) AS tree
+        JOIN pg_class leaf ON leaf.oid = tree.relid
+        WHERE tree.isleaf
+        HAVING child.relkind = 'p'
+    ) AS leaves ON TRUE
+    WHERE parent.relname = %s
+    ORDER BY 2 NULLS FIRST
+"""
+
+
+Partition = namedtuple("Partition", ["name", "range_from", "range_to", "reltuples", "leaves"])
+
+
+class PartitionSnapshot:
+    """
+    Partition metadata of one table as of a single catalog query.
+
+    Range partitions are kept sorted by their lower bound, so overlap checks
+    against a desired set of ranges are a bisect each.
+    """
+
+    def __init__(self, table, partitions, default=None):
+        """
+        :param table: partitioned table name
+        :param partitions: range partitions (Partition), ordered by range_from
+        :param default: the default partition (Partition) or None
+        """
+        self.table = table
+        self.partitions = partitions
+        self.default = default
+        self.taken_at = time.monotonic()
+        self._starts = [p.range_from for p in partitions]
+
+    def bounds(self):
+        """:return: list of (name, range_from, range_to) ordered by range_from"""
+        return [(p.name, p.range_from, p.range_to) for p in self.partitions]
+
+    def reltuples(self):
+        """:return: {partition name: row estimate}, default partition included"""
+        estimates = {p.name: p.reltuples for p in self.partitions}
+        if self.default:
+            estimates[self.default.name] = self.default.reltuples
+        return estimates
+
+    def leaves(self):
+        """:return: names of every leaf table (hash sub-partitions included), default partition last"""
+        leaves = [leaf for p in self.partitions for leaf in p.leaves]
+        if self.default:
+            leaves.extend(self.default.leaves)
+        return leaves
+
+    def overlapping(self, range_from, range_to):
+        """:return: the partitions intersecting [range_from, range_to)"""
+        index = bisect_left(self._starts, range_to)
+        found = []
+        # Partitions do not overlap, so their upper bounds are sorted as well.
+        while index > 0 and self.partitions[index - 1].range_to > range_from:
+            index -= 1
+            found.append(self.partitions[index])
+        return found[::-1]
+
+    def missing(self, ranges):
+        """
+        Diff a desired set of ranges against the snapshot in one pass.
+
+        :param ranges: iterable of (range_from, range_to, ...) tuples
+        :return: the ranges that do not overlap any existing partition
+        """
+        return [r for r in ranges if not self.overlapping(r[0], r[1])]
+
+
+class PartitionCatalog:
+    """
+    In-process cache of partition snapshots shared by all services.
+
+    A snapshot is reloaded once it is older than `PARTITION_CATALOG_TTL`
+    seconds, or after :meth:`invalidate` bumps the table's version, which
+    every code path running partition DDL does. A load that raced with an
+    invalidation is returned but not cached.
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self, table):
+        """:return: PartitionSnapshot of `table`, from cache when fresh"""
+        ttl = getattr(settings, "PARTITION_CATALOG_TTL", 60)
+        with self._lock:
+            snapshot = self._snapshots.get(table)
+            version = self._versions.get(table, 0)
+        if snapshot and time.monotonic() - snapshot.taken_at < ttl:
+            return snapshot
+
+        snapshot = self._load(table)
+        with self._lock:
+            if self._versions.get(table, 0) == version:
+                self._snapshots[table] = snapshot
+        return snapshot
+
+    def _load(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(PARTITION_CATALOG_SQL, [table])
+            rows = [Partition(*row) for row in cursor.fetchall()]
+
+        default = next((p for p in rows if p.range_from is None), None)
+        return PartitionSnapshot(table, [p for p in rows if p.range_from is not None], default)
+
+    def _drop(self, table):
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+            self._snapshots.pop(table, None)
+
+    def invalidate(self, table):
+        """
+        Forget the snapshot of `table` after running DDL on it. Inside a
+        transaction it is forgotten again on commit, so other threads
+        cannot keep a snapshot loaded before the DDL became visible.
+        """
+        self._drop(table)
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: self._drop(table))
+
+
+catalog = PartitionCatalog()
@@ -1,9 +1,36 @@
-from celery import shared_task
-from todo.models import Todo
-from services import PartitioningService
-
-@shared_task
-def repair_todo_partitions():
-    service = PartitioningService(Todo, partition_size="month", extra_future=12)
-    result = service.ensure_and_repair()
-    return result
+import os
+
+from celery import Celery
+from celery.schedules import crontab
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+app = Celery("core")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
+
+app.conf.beat_schedule = {
+    # Samples the insert rate on every run; keep well below the planner's `lead`.
+    "provision-partitions": {
+        "task": "todo.tasks.provision_partitions",
+        "schedule": crontab(minute="*/15"),
+    },
+    # Cheap when the default partition is empty: one pg_stat_user_tables read.
+    "monitor-default-partitions": {
+        "task": "todo.tasks.monitor_default_partitions",
+        "schedule": crontab(minute="*/5"),
+    },
+    # Off-peak: detaching and archiving old months reads whole partitions.
+    "apply-partition-retention": {
+        "task": "todo.tasks.apply_partition_retention",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "refresh-partition-rollups": {
+        "task": "todo.tasks.refresh_partition_rollups",
+        "schedule": crontab(minute="*/10"),
+    },
+    "apply-partition-tiering": {
+        "task": "todo.tasks.apply_partition_tiering",
+        "schedule": crontab(hour=4, minute=30),
+    },
+}
@@ -0,0 +1,409 @@
+import time
+from datetime import timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.backends.utils import truncate_name
+from psqlextra.partitioning import PostgresTimePartition
+
+from core.catalog import catalog
+from core.parallel import run_in_threads
+from core.services import PartitioningService
+
+CHECKPOINT_TABLE = "partition_conversion_checkpoint"
+BACKFILL_PROGRESS_TABLE = "partition_conversion_backfill"
+
+
+class TableConverter:
+    """
+    Convert a plain table into a table range partitioned by `created_at`.
+
+    The historical rows are copied partition by partition, straight into
+    each leaf with `INSERT ... SELECT`. Every partition commits on its own
+    together with a checkpoint row, so partitions can be copied concurrently
+    on several connections, and an interrupted conversion resumes where it
+    stopped. Finally, row counts are verified per partition.
+    """
+
+    def __init__(self, model, source_table, target_table, partition_size="month"):
+        """
+        :param model: the (unpartitioned) Django model whose table is converted
+        :param source_table: table holding the existing rows
+        :param target_table: partitioned table to create and fill
+        :param partition_size: "month" | "year" | "day"
+        """
+        self.model = model
+        self.source_table = source_table
+        self.target_table = target_table
+        # Partition and index names the table ends up with.
+        self.partition_prefix = target_table
+        self.index_suffix = ""
+        # Only used for its partition size / boundary helpers.
+        self.sizing = PartitioningService(model, partition_size=partition_size)
+        self.columns = [f.column for f in model._meta.concrete_fields if not f.generated]
+
+    def _qn(self, name):
+        return connection.ops.quote_name(name)
+
+    def _exists(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [table])
+            return cursor.fetchone()[0] is not None
+
+    def move_aside(self):
+        """
+        Rename the live table (named like the target) to the source name,
+        along with its indexes so their names are free for the new table.
+        """
+        if self._exists(self.source_table) or not self._exists(self.target_table):
+            return False
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = %s", [self.target_table]
+            )
+            for (index,) in cursor.fetchall():
+                renamed = truncate_name(f"{index}_old", connection.ops.max_name_length())
+                cursor.execute(f"ALTER INDEX {self._qn(index)} RENAME TO {self._qn(renamed)}")
+            cursor.execute(
+                f"ALTER TABLE {self._qn(self.target_table)} RENAME TO {self._qn(self.source_table)}"
+            )
+        return True
+
+    def create_partitioned_table(self):
+        """Create the target as a partitioned copy of the source's structure, if missing."""
+        if self._exists(self.target_table):
+            return False
+
+        qn = self._qn
+        target, pk = qn(self.target_table), qn(self.model._meta.pk.column)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {target} (LIKE {qn(self.source_table)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+                f"PARTITION BY RANGE (created_at)"
+            )
+            cursor.execute(f"ALTER TABLE {target} ADD PRIMARY KEY ({pk}, created_at)")
+            cursor.execute(
+                f"CREATE TABLE {qn(self.partition_prefix + '_default')} PARTITION OF {target} DEFAULT"
+            )
+            schema_editor = connection.schema_editor()
+            for index in self.model._meta.indexes:
+                statement = index.create_sql(self.model, schema_editor)
+                statement.parts["table"] = target
+                statement.parts["name"] = qn(self._index_name(index.name))
+                cursor.execute(str(statement))
+        return True
+
+    def _index_name(self, name):
+        return truncate_name(f"{name}{self.index_suffix}", connection.ops.max_name_length())
+
+    def source_bounds(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN(created_at), MAX(created_at) FROM {self._qn(self.source_table)}")
+            return cursor.fetchone()
+
+    def create_partitions(self, start, end):
+        """
+        Create the leaf partitions covering start..end, all in one transaction;
+        the default partition is still empty, so nothing has to be scanned.
+
+        :return: list of (table_name, range_from, range_to)
+        """
+        size = self.sizing._get_partition_size()
+        start, end = (value.astimezone(dt_timezone.utc).replace(tzinfo=None) for value in (start, end))
+        partitions = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            for boundary in self.sizing._generate_boundaries(size.start(start), end):
+                partition = PostgresTimePartition(size=size, start_datetime=boundary)
+                table = f"{self.partition_prefix}_{partition.name()}"
+                cursor.execute(connection.ops.compose_sql(
+                    f"CREATE TABLE IF NOT EXISTS {self._qn(table)} PARTITION OF {self._qn(self.target_table)} "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [partition.from_values, partition.to_values],
+                ))
+                partitions.append((table, partition.from_values, partition.to_values))
+            catalog.invalidate(self.target_table)
+        return partitions
+
+    def _ensure_checkpoint_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                    source_table text NOT NULL,
+                    partition text NOT NULL,
+                    rows bigint NOT NULL,
+                    seconds double precision NOT NULL,
+                    copied_at timestamptz NOT NULL DEFAULT now(),
+                    PRIMARY KEY (source_table, partition)
+                )
+                """
+            )
+
+    def copied_partitions(self):
+        """Partitions already copied by a previous (possibly interrupted) run."""
+        self._ensure_checkpoint_table()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT partition FROM {CHECKPOINT_TABLE} WHERE source_table = %s", [self.source_table]
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def reset_checkpoints(self):
+        self._ensure_checkpoint_table()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {CHECKPOINT_TABLE} WHERE source_table = %s", [self.source_table])
+
+    def copy_partition(self, partition):
+        """
+        Copy one partition's rows and record its checkpoint, in a single
+        transaction. The leaf is truncated first, so re-copying a partition
+        (e.g. after `reset_checkpoints`) never duplicates rows.
+        """
+        table, range_from, range_to = partition
+        columns = ", ".join(self._qn(c) for c in self.columns)
+        started = time.monotonic()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self._qn(table)}")
+            cursor.execute(
+                f"INSERT INTO {self._qn(table)} ({columns}) "
+                f"SELECT {columns} FROM {self._qn(self.source_table)} "
+                f"WHERE created_at >= %s AND created_at < %s",
+                [range_from, range_to],
+            )
+            rows = cursor.rowcount
+            cursor.execute(
+                f"INSERT INTO {CHECKPOINT_TABLE} (source_table, partition, rows, seconds) "
+                f"VALUES (%s, %s, %s, %s)",
+                [self.source_table, table, rows, time.monotonic() - started],
+            )
+        return rows
+
+    def copy_partitions(self, partitions, workers=1):
+        """
+        Copy every partition not yet checkpointed, `workers` at a time.
+
+        :return: iterator of (partition, rows copied)
+        """
+        done = self.copied_partitions()
+        pending = [p for p in partitions if p[0] not in done]
+        return run_in_threads(self.copy_partition, pending, workers)
+
+    def verify_partition(self, partition):
+        """:return: (source rows, target rows) for one partition's range"""
+        table, range_from, range_to = partition
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT "
+                f"(SELECT COUNT(*) FROM {self._qn(self.source_table)} WHERE created_at >= %s AND created_at < %s), "
+                f"(SELECT COUNT(*) FROM {self._qn(table)})",
+                [range_from, range_to],
+            )
+            return cursor.fetchone()
+
+    def verify(self, partitions, workers=1):
+        """:return: list of (partition, source rows, target rows) where the counts differ"""
+        return [
+            (partition[0], *counts)
+            for partition, counts in run_in_threads(self.verify_partition, partitions, workers)
+            if counts[0] != counts[1]
+        ]
+
+    def sync_sequence(self):
+        """Move the new table's identity sequence past the copied ids."""
+        pk = self.model._meta.pk.column
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, %s), "
+                f"COALESCE((SELECT MAX({self._qn(pk)}) FROM {self._qn(self.target_table)}), 0) + 1, false)",
+                [self.target_table, pk],
+            )
+
+
+class OnlineTableConverter(TableConverter):
+    """
+    Convert a plain table into a partitioned one while the app keeps writing.
+
+    The partitioned table is built alongside the live one (`<table>_partitioned`)
+    and a trigger on the live table mirrors every insert, update and delete
+    into it. Historical rows are then backfilled in small, throttled,
+    checkpointed chunks. Finally, a short transaction swaps the table names.
+    Only the swap takes an ACCESS EXCLUSIVE lock.
+    """
+
+    def __init__(self, model, source_table, partition_size="month"):
+        """
+        :param model: the (unpartitioned) Django model whose table is converted
+        :param source_table: the live table; it keeps its name after the swap
+        :param partition_size: "month" | "year" | "day"
+        """
+        super().__init__(model, source_table, f"{source_table}_partitioned", partition_size)
+        # Leaf partitions get their final names right away; indexes are renamed on swap.
+        self.partition_prefix = source_table
+        self.index_suffix = "_p"
+        self.function = f"{source_table}_dual_write"
+
+    def install_trigger(self):
+        """Mirror every write on the live table into the partitioned table."""
+        qn = self._qn
+        columns = ", ".join(qn(c) for c in self.columns)
+        values = ", ".join(f"NEW.{qn(c)}" for c in self.columns)
+        pk = qn(self.model._meta.pk.column)
+        target = qn(self.target_table)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                CREATE OR REPLACE FUNCTION {qn(self.function)}() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                        DELETE FROM {target} WHERE {pk} = OLD.{pk} AND created_at = OLD.created_at;
+                    END IF;
+                    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                        INSERT INTO {target} ({columns}) VALUES ({values}) ON CONFLICT DO NOTHING;
+                    END IF;
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql
+                """
+            )
+            cursor.execute(f"DROP TRIGGER IF EXISTS {qn(self.function)} ON {qn(self.source_table)}")
+            cursor.execute(
+                f"CREATE TRIGGER {qn(self.function)} AFTER INSERT OR UPDATE OR DELETE "
+                f"ON {qn(self.source_table)} FOR EACH ROW EXECUTE FUNCTION {qn(self.function)}()"
+            )
+
+    def _ensure_backfill_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {BACKFILL_PROGRESS_TABLE} (
+                    source_table text PRIMARY KEY,
+                    last_id bigint NOT NULL,
+                    rows bigint NOT NULL,
+                    updated_at timestamptz NOT NULL DEFAULT now()
+                )
+                """
+            )
+
+    def reset_backfill(self):
+        """Forget the backfill progress, so the next backfill starts again from the first id."""
+        self._ensure_backfill_table()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {BACKFILL_PROGRESS_TABLE} WHERE source_table = %s", [self.source_table])
+
+    def _backfill_progress(self):
+        self._ensure_backfill_table()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT last_id, rows FROM {BACKFILL_PROGRESS_TABLE} WHERE source_table = %s",
+                [self.source_table],
+            )
+            return cursor.fetchone() or (0, 0)
+
+    def backfill_chunk(self, last_id, chunk_size):
+        """
+        Copy the next `chunk_size` rows after `last_id` and record progress.
+
+        Rows are read `FOR SHARE`, so a concurrent update or delete either
+        waits for the chunk to commit (then the trigger fixes the copy) or
+        finishes first (then the chunk copies the new version). Rows the
+        trigger already mirrored are skipped with ON CONFLICT DO NOTHING.
+
+        :return: (rows copied, new last_id), last_id None when done
+        """
+        qn = self._qn
+        columns = ", ".join(qn(c) for c in self.columns)
+        pk = qn(self.model._meta.pk.column)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH chunk AS (
+                    SELECT {columns} FROM {qn(self.source_table)}
+                    WHERE {pk} > %s ORDER BY {pk} LIMIT %s
+                    FOR SHARE
+                ), inserted AS (
+                    INSERT INTO {qn(self.target_table)} ({columns})
+                    SELECT {columns} FROM chunk
+                    ON CONFLICT DO NOTHING
+                )
+                SELECT COUNT(*), MAX({pk}) FROM chunk
+                """,
+                [last_id, chunk_size],
+            )
+            rows, new_last_id = cursor.fetchone()
+            if new_last_id is not None:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {BACKFILL_PROGRESS_TABLE} (source_table, last_id, rows) VALUES (%s, %s, %s)
+                    ON CONFLICT (source_table) DO UPDATE SET
+                        last_id = EXCLUDED.last_id,
+                        rows = {BACKFILL_PROGRESS_TABLE}.rows + EXCLUDED.rows,
+                        updated_at = now()
+                    """,
+                    [self.source_table, new_last_id, rows],
+                )
+        return rows, new_last_id
+
+    def backfill(self, chunk_size=5000, throttle=0.1):
+        """
+        Backfill the historical rows, resuming after the last recorded chunk.
+
+        :param chunk_size: rows per chunk (and per transaction)
+        :param throttle: seconds to sleep between chunks, to leave headroom for production load
+        :return: iterator of (total rows copied, last id) after each chunk
+        """
+        last_id, total = self._backfill_progress()
+        while True:
+            rows, last_id = self.backfill_chunk(last_id, chunk_size)
+            if last_id is None:
+                return
+            total += rows
+            yield total, last_id
+            time.sleep(throttle)
+
+    def swap(self, lock_timeout="3s"):
+        """
+        In one short transaction: drop the trigger, rename the live table (and
+        its indexes) to `<table>_old`, give the partitioned table and its
+        indexes the live names, continue the id sequence where the old
+        table's stopped, and forget the backfill progress, so a later
+        conversion of the same table starts afresh.
+        """
+        qn = self._qn
+        old_table = f"{self.source_table}_old"
+        pk = self.model._meta.pk.column
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('lock_timeout', %s, true)", [lock_timeout])
+            cursor.execute(f"LOCK TABLE {qn(self.source_table)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(f"DROP TRIGGER {qn(self.function)} ON {qn(self.source_table)}")
+            cursor.execute(f"DROP FUNCTION {qn(self.function)}()")
+
+            cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [self.source_table, pk])
+            old_sequence = cursor.fetchone()[0]
+
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [self.source_table])
+            for (index,) in cursor.fetchall():
+                renamed = truncate_name(f"{index}_old", connection.ops.max_name_length())
+                cursor.execute(f"ALTER INDEX {qn(index)} RENAME TO {qn(renamed)}")
+            cursor.execute(f"ALTER TABLE {qn(self.source_table)} RENAME TO {qn(old_table)}")
+
+            cursor.execute(f"ALTER TABLE {qn(self.target_table)} RENAME TO {qn(self.source_table)}")
+            cursor.execute(
+                f"ALTER TABLE {qn(self.source_table)} RENAME CONSTRAINT "
+                f"{qn(self.target_table + '_pkey')} TO {qn(self.source_table + '_pkey')}"
+            )
+            for index in self.model._meta.indexes:
+                cursor.execute(
+                    f"ALTER INDEX {qn(self._index_name(index.name))} RENAME TO {qn(index.name)}"
+                )
+
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence(%s, %s), nextval(%s))",
+                [self.source_table, pk, old_sequence],
+            )
+            cursor.execute(f"DELETE FROM {BACKFILL_PROGRESS_TABLE} WHERE source_table = %s", [self.source_table])
+            catalog.invalidate(self.source_table)
+            catalog.invalidate(self.target_table)
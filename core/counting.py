@@ -0,0 +1,157 @@
+import json
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from core.catalog import catalog
+from core.services import PartitioningService
+
+
+PartitionCount = namedtuple("PartitionCount", ["value", "exact"])
+
+
+class PartitionCountProvider:
+    """
+    Row counts for list views over a time partitioned model, without a
+    COUNT(*) across every partition.
+
+    For unfiltered or date-only queries the count is assembled per partition:
+    closed (past) partitions fully inside the window use a cached exact
+    count, keyed on the partition's tables and the rows inserted into and
+    deleted from them so far (`pg_stat_user_tables`), so a partition that
+    still receives rows (moves out of the default partition, backfills) or
+    is recreated (healing, rebalancing) is counted again; the current
+    partition and the default partition are counted live, restricted to the
+    window; all other partitions use `pg_class.reltuples`, scaled by how
+    much of their range the window covers.
+
+    Other filters (status, search) are not selective on the partition key:
+    windows holding at most `exact_limit` rows are counted exactly, larger
+    ones get the window count scaled by the planner's selectivity.
+    """
+
+    def __init__(self, model, cache_timeout=None, exact_limit=None):
+        """
+        :param model: TimePartitionedModel subclass
+        :param cache_timeout: seconds to keep exact counts of closed partitions
+                              (default: settings.PARTITION_COUNT_CACHE_TIMEOUT)
+        :param exact_limit: largest window, in rows, counted exactly when filtered
+                            (default: settings.PARTITION_COUNT_EXACT_LIMIT)
+        """
+        self.model = model
+        self.cache_timeout = settings.PARTITION_COUNT_CACHE_TIMEOUT if cache_timeout is None else cache_timeout
+        self.exact_limit = settings.PARTITION_COUNT_EXACT_LIMIT if exact_limit is None else exact_limit
+        self.service = PartitioningService(model)
+
+    def count(self, queryset, filtered=False, exact=False):
+        """
+        :param queryset: TimePartitionedQuerySet, optionally windowed with `between()`
+        :param filtered: the queryset filters more than the window
+        :param exact: always run a plain COUNT(*)
+        :return: PartitionCount(value, exact)
+        """
+        if exact:
+            return PartitionCount(queryset.count(), True)
+        window = self.count_window(*(queryset.window() or (None, None)))
+        if not filtered:
+            return window
+        if window.value <= self.exact_limit:
+            return PartitionCount(queryset.count(), True)
+        return PartitionCount(round(window.value * self.selectivity(queryset)), False)
+
+    async def acount(self, queryset, filtered=False, exact=False):
+        """Async version of :meth:`count`."""
+        if exact:
+            return PartitionCount(await queryset.acount(), True)
+        # Several raw per-partition queries: one thread hop for all of them.
+        return await sync_to_async(self.count)(queryset, filtered)
+
+    def estimate(self, queryset):
+        """Row estimate of the planner for an arbitrary queryset."""
+        plan = json.loads(queryset.explain(format="json"))[0]["Plan"]
+        return int(plan["Plan Rows"])
+
+    def selectivity(self, queryset):
+        """Fraction of the window's rows the planner expects `queryset` to return."""
+        base = self.model._default_manager.all()
+        if queryset.window():
+            base = base.between(*queryset.window())
+        return min(self.estimate(queryset) / max(self.estimate(base), 1), 1.0)
+
+    def count_window(self, start=None, end=None):
+        """Count rows with the partition key in [start, end) (unbounded when None)."""
+        now = timezone.now()
+        snapshot = catalog.snapshot(self.model._meta.db_table)
+        reltuples = snapshot.reltuples()
+        total, exact, closed = 0, True, []
+
+        for table, range_from, range_to in self.service.get_partitions():
+            lo = max(range_from, start) if start else range_from
+            hi = min(range_to, end) if end else range_to
+            if lo >= hi:
+                continue
+
+            covered = lo == range_from and hi == range_to
+            estimate = reltuples.get(table, -1)
+
+            if range_from <= now < range_to:
+                total += self._count_range(table, lo, hi)
+            elif range_to <= now and covered:
+                closed.append(table)
+            elif estimate < 0:
+                # Never analyzed, nothing to estimate from.
+                total += self._count_range(table, lo, hi)
+            else:
+                total += round(estimate * ((hi - lo) / (range_to - range_from)))
+                exact = False
+
+        if closed:
+            versions = self.versions([p for p in snapshot.partitions if p.name in closed])
+            total += sum(self._closed_count(table, versions.get(table, "")) for table in closed)
+
+        total += self._count_range(self.service.default_table, start, end)
+        return PartitionCount(total, exact)
+
+    def versions(self, partitions):
+        """
+        Version of each partition's rows: the oid of every leaf with the rows
+        inserted into and deleted from it so far. Updates leave the count as
+        it is. :return: {partition name: str}
+        """
+        leaves = {leaf: partition.name for partition in partitions for leaf in partition.leaves}
+        versions = {partition.name: [] for partition in partitions}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, relid, n_tup_ins + n_tup_del FROM pg_stat_user_tables "
+                "WHERE relname = ANY(%s) ORDER BY relid",
+                [list(leaves)],
+            )
+            for leaf, relid, writes in cursor.fetchall():
+                versions[leaves[leaf]].append(f"{relid}.{writes}")
+        return {name: "-".join(leaf_versions) for name, leaf_versions in versions.items()}
+
+    def _closed_count(self, table, version):
+        key = f"partition-count:{table}:{version}"
+        value = cache.get(key)
+        if value is None:
+            value = self._count_range(table)
+            cache.set(key, value, self.cache_timeout)
+        return value
+
+    def _count_range(self, table, start=None, end=None):
+        sql = f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)} WHERE TRUE"
+        params = []
+        if start:
+            sql += " AND created_at >= %s"
+            params.append(start)
+        if end:
+            sql += " AND created_at < %s"
+            params.append(end)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()[0]
@@ -0,0 +1,58 @@
+import json
+
+from django.db import connection
+
+
+def plan_relations(plan):
+    """Yield the name of every relation scanned in an EXPLAIN (FORMAT JSON) plan node."""
+    if "Relation Name" in plan:
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from plan_relations(child)
+
+
+def subplans_removed(plan):
+    """Count partitions removed by run-time pruning (executor startup) in a plan node."""
+    return plan.get("Subplans Removed", 0) + sum(
+        subplans_removed(child) for child in plan.get("Plans", [])
+    )
+
+
+def leaf_partitions(table_name):
+    """Return the names of all leaf partitions below a partitioned table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relid::regclass::text FROM pg_partition_tree(%s::regclass) WHERE isleaf",
+            [table_name],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def pruning_report(queryset):
+    """
+    EXPLAIN a queryset over a partitioned model and report how many of its
+    partitions the plan still touches.
+
+    :return: dict with "scanned" (partition names), "total" and "pruned" counts
+    """
+    plan = json.loads(queryset.explain(format="json"))[0]["Plan"]
+    return plan_pruning(plan, leaf_partitions(queryset.model._meta.db_table))
+
+
+def plan_pruning(plan, partitions):
+    """
+    Compare the relations scanned by a plan node with a table's partitions.
+
+    :param partitions: names of the table's leaf partitions
+    :return: dict with "scanned" (partition names), "total" and "pruned" counts
+    """
+    partitions = set(partitions)
+    scanned = sorted(partitions.intersection(plan_relations(plan)))
+    # Run-time pruned subplans still appear in a generic plan, so don't count them as scanned.
+    scanned_count = max(len(scanned) - subplans_removed(plan), 0)
+
+    return {
+        "scanned": scanned,
+        "total": len(partitions),
+        "pruned": len(partitions) - scanned_count,
+    }
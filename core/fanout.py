@@ -0,0 +1,117 @@
+import heapq
+
+from django.conf import settings
+from django.db.models.sql.datastructures import BaseTable
+
+from core.catalog import catalog
+from core.parallel import run_in_threads
+
+
+def on_table(queryset, table):
+    """
+    Clone `queryset` so that it reads `table` (e.g. one leaf partition)
+    instead of the model's table. The base table keeps its alias, so every
+    filter, annotation and join of the queryset still applies.
+    """
+    clone = queryset.all()
+    query = clone.query
+    alias = query.get_initial_alias()
+    query.alias_map[alias] = BaseTable(table, alias)
+    return clone
+
+
+def _sort_key(obj, name):
+    value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+    # Postgres puts NULLs last in ascending order (and first in descending).
+    return (value is None, value)
+
+
+class PartitionFanout:
+    """
+    Run a queryset on every partition concurrently and merge the results.
+
+    The queryset runs once per leaf partition overlapping its window (see
+    `between()`) plus the default partition, each on its own connection
+    from a pool of `workers` threads. Each per-partition query keeps the
+    queryset's ordering and gets its slice's upper bound as LIMIT; the
+    sorted partial results are then merged and sliced. Ordering must be by
+    plain field names of the model (or keys of `values()` rows).
+    """
+
+    def __init__(self, queryset, workers=None):
+        """
+        :param queryset: TimePartitionedQuerySet returning model instances or values() dicts
+        :param workers: concurrent queries (default: settings.FANOUT_WORKERS)
+        """
+        self.queryset = queryset
+        self.workers = workers or settings.FANOUT_WORKERS
+        self.model = queryset.model
+
+    def tables(self):
+        """:return: leaf partitions the queryset's window touches, oldest first, then the default"""
+        table = self.model._meta.db_table
+        snapshot = catalog.snapshot(table)
+        start, end = self.queryset.window() or (None, None)
+        partitions = snapshot.partitions
+        if start or end:
+            partitions = [
+                p for p in partitions
+                if (not end or p.range_from < end) and (not start or start < p.range_to)
+            ]
+        return [p.name for p in partitions] + [f"{table}_default"]
+
+    def _ordering(self):
+        query = self.queryset.query
+        ordering = query.order_by or (query.get_meta().ordering if query.default_ordering else ())
+        fields = []
+        for spec in ordering:
+            if not isinstance(spec, str) or spec == "?" or "__" in spec.lstrip("-"):
+                raise ValueError(f"Fan-out cannot merge on ordering {spec!r}")
+            fields.append((spec.lstrip("-"), spec.startswith("-")))
+        return fields
+
+    def _merge(self, parts, ordering):
+        if not ordering:
+            return [obj for part in parts for obj in part]
+
+        descending = {desc for _, desc in ordering}
+        if len(descending) == 1:
+            # Every partial result is already sorted the same way.
+            names = [name for name, _ in ordering]
+            return list(heapq.merge(
+                *parts,
+                key=lambda obj: tuple(_sort_key(obj, name) for name in names),
+                reverse=descending.pop(),
+            ))
+
+        rows = [obj for part in parts for obj in part]
+        for name, desc in reversed(ordering):
+            rows.sort(key=lambda obj: _sort_key(obj, name), reverse=desc)
+        return rows
+
+    def results(self):
+        """Evaluate the queryset across partitions. :return: list of results"""
+        query = self.queryset.query
+        low, high = query.low_mark, query.high_mark
+        ordering = self._ordering()
+
+        base = self.queryset.all()
+        base.query.clear_limits()
+        if high is not None:
+            # Any row of the final slice is within the first `high` rows of its partition.
+            base = base[:high]
+
+        tables = self.tables()
+        found = dict(run_in_threads(lambda table: list(on_table(base, table)), tables, self.workers))
+        rows = self._merge([found[table] for table in tables], ordering)
+        return rows[low:high]
+
+    def count(self):
+        """COUNT(*) per partition, summed."""
+        base = self.queryset.all()
+        return sum(
+            count
+            for _, count in run_in_threads(
+                lambda table: on_table(base, table).count(), self.tables(), self.workers
+            )
+        )
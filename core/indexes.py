@@ -0,0 +1,243 @@
+from django.db import connection
+from django.db.backends.utils import truncate_name
+
+
+def index_sql(model, index, table, name, concurrently=False, only=False):
+    """SQL creating the Django `index` of `model` as `name` on `table` (a partition, or ONLY the parent)."""
+    qn = connection.ops.quote_name
+    statement = index.create_sql(model, connection.schema_editor(), concurrently=concurrently)
+    statement.parts["table"] = f"ONLY {qn(table)}" if only else qn(table)
+    statement.parts["name"] = qn(name)
+    return str(statement)
+
+
+def partition_index_name(index_name, table, partition):
+    """`<index name>_<partition suffix>`, truncated (with a hash) to the identifier limit."""
+    suffix = partition[len(table) + 1:] if partition.startswith(f"{table}_") else partition
+    return truncate_name(f"{index_name}_{suffix}", connection.ops.max_name_length())
+
+
+class PartitionIndexBuilder:
+    """
+    Build an index declared in a partitioned model's `Meta.indexes` without
+    locking the table against writes.
+
+    The parent index is created `ON ONLY` the partitioned table (instant,
+    and invalid until every partition has its index). Each partition then
+    gets its own index built `CONCURRENTLY`, which is attached to the
+    parent. A partition that is itself partitioned (hash sub-partitions,
+    see core.subpartitions) gets an index `ON ONLY` it, attached to the
+    parent's, and its leaves are built and attached to that one. Leaves
+    whose index is already attached are skipped, so an interrupted build
+    can simply be run again.
+    """
+
+    def __init__(self, model, index_name):
+        """
+        :param model: Django model subclassing PostgresPartitionedModel
+        :param index_name: name of an index in `model._meta.indexes`
+        """
+        self.model = model
+        self.table = model._meta.db_table
+        self.index = next((i for i in model._meta.indexes if i.name == index_name), None)
+        if self.index is None:
+            raise ValueError(f"{model.__name__} declares no index named {index_name!r}")
+
+    def _statement(self, table, name, concurrently=False, only=False):
+        return index_sql(self.model, self.index, table, name, concurrently=concurrently, only=only)
+
+    def partition_index_name(self, partition):
+        return partition_index_name(self.index.name, self.table, partition)
+
+    def create_parent(self):
+        """
+        Create the parent index ON ONLY the partitioned table, and ON ONLY
+        each sub-partitioned partition (attached to it), where missing.
+        """
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [self.index.name])
+            if cursor.fetchone()[0] is None:
+                cursor.execute(self._statement(self.table, self.index.name, only=True))
+
+            cursor.execute(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE pg_inherits.inhparent = %s::regclass AND child.relkind = 'p'
+                ORDER BY child.relname
+                """,
+                [self.table],
+            )
+            for (partition,) in cursor.fetchall():
+                if self._partition_index(partition):
+                    continue
+                name = self.partition_index_name(partition)
+                cursor.execute("SELECT to_regclass(%s)", [name])
+                if cursor.fetchone()[0] is None:
+                    cursor.execute(self._statement(partition, name, only=True))
+                cursor.execute(f"ALTER INDEX {qn(self.index.name)} ATTACH PARTITION {qn(name)}")
+
+    def _partition_index(self, partition):
+        """:return: the index of `partition` attached to the parent index, or None"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT i.relname
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                JOIN pg_inherits attached ON attached.inhrelid = x.indexrelid
+                WHERE x.indrelid = %s::regclass AND attached.inhparent = %s::regclass
+                """,
+                [partition, self.index.name],
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def pending_partitions(self):
+        """Leaf partitions (sub-partitions included) whose index is not attached up to the parent index yet."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT leaf.relname
+                FROM pg_partition_tree(%s::regclass) AS tree
+                JOIN pg_class leaf ON leaf.oid = tree.relid
+                WHERE tree.isleaf AND tree.level > 0
+                  AND NOT EXISTS (
+                      SELECT 1
+                      FROM pg_index idx
+                      JOIN pg_inherits attached ON attached.inhrelid = idx.indexrelid
+                      WHERE idx.indrelid = leaf.oid
+                        AND (attached.inhparent = %s::regclass
+                             OR attached.inhparent IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass))
+                  )
+                ORDER BY leaf.relname
+                """,
+                [self.table, self.index.name, self.index.name],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def _parent_index(self, partition):
+        """
+        Index the index of `partition` attaches to: the parent index, or for
+        a sub-partition its range partition's (see :meth:`create_parent`).
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT parent.relname FROM pg_inherits JOIN pg_class parent ON parent.oid = inhparent "
+                "WHERE inhrelid = %s::regclass",
+                [partition],
+            )
+            parent = cursor.fetchone()[0]
+        if parent == self.table:
+            return self.index.name
+        index = self._partition_index(parent)
+        if index is None:
+            raise ValueError(f"{parent} has no {self.index.name} index yet; run create_parent() first")
+        return index
+
+    def build(self, partition):
+        """
+        Build the index on one leaf partition CONCURRENTLY and attach it.
+        Must run outside a transaction (Django's default autocommit).
+        """
+        qn = connection.ops.quote_name
+        name = self.partition_index_name(partition)
+        parent_index = self._parent_index(partition)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", [name]
+            )
+            row = cursor.fetchone()
+            if row and not row[0]:
+                # Leftover of an interrupted concurrent build.
+                cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {qn(name)}")
+                row = None
+            if row is None:
+                cursor.execute(self._statement(partition, name, concurrently=True))
+            cursor.execute(f"ALTER INDEX {qn(parent_index)} ATTACH PARTITION {qn(name)}")
+        return name
+
+    def is_valid(self):
+        """The parent index turns valid once every leaf's index is attached."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", [self.index.name]
+            )
+            row = cursor.fetchone()
+            return bool(row and row[0])
+
+
+class PartitionIndexPolicy:
+    """
+    Indexes a TimePartitionedModel declares by partition age instead of in
+    `Meta.indexes`: `hot_partition_indexes` for partitions still written
+    to, `cold_partition_indexes` for tiered ones (typically BRIN, see
+    core.basemodels.brin_index).
+
+    They are local indexes, created on each leaf table and not attached to
+    a parent index, so a partition can trade one set for the other: a
+    btree that speeds up lookups while rows arrive gives way to a BRIN
+    index a fraction of its size once the partition is closed and stored
+    in created_at order. Applied by core.tiering.PartitionTiering.
+    """
+
+    def __init__(self, model):
+        """
+        :param model: partitioned Django model
+        """
+        self.model = model
+        self.table = model._meta.db_table
+        self.hot = list(getattr(model, "hot_partition_indexes", ()))
+        self.cold = list(getattr(model, "cold_partition_indexes", ()))
+
+    def index_name(self, index, leaf):
+        return partition_index_name(index.name, self.table, leaf)
+
+    def _existing(self, leaf):
+        """:return: {index name: is valid} of the indexes on `leaf`"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT i.relname, x.indisvalid
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                WHERE x.indrelid = %s::regclass
+                """,
+                [leaf],
+            )
+            return dict(cursor.fetchall())
+
+    def create(self, leaf, indexes, concurrently=True):
+        """
+        Create the missing `indexes` on `leaf`; CONCURRENTLY must run
+        outside a transaction. :return: names of the indexes created
+        """
+        qn = connection.ops.quote_name
+        concurrent = " CONCURRENTLY" if concurrently else ""
+        existing = self._existing(leaf)
+        created = []
+        with connection.cursor() as cursor:
+            for index in indexes:
+                name = self.index_name(index, leaf)
+                if existing.get(name) is False:
+                    # Leftover of an interrupted concurrent build.
+                    cursor.execute(f"DROP INDEX{concurrent} IF EXISTS {qn(name)}")
+                elif name in existing:
+                    continue
+                cursor.execute(index_sql(self.model, index, leaf, name, concurrently=concurrently))
+                created.append(name)
+        return created
+
+    def drop(self, leaf, indexes, concurrently=True):
+        """Drop `indexes` from `leaf` where present. :return: names of the indexes dropped"""
+        qn = connection.ops.quote_name
+        concurrent = " CONCURRENTLY" if concurrently else ""
+        existing = self._existing(leaf)
+        dropped = [self.index_name(index, leaf) for index in indexes if self.index_name(index, leaf) in existing]
+        with connection.cursor() as cursor:
+            for name in dropped:
+                cursor.execute(f"DROP INDEX{concurrent} IF EXISTS {qn(name)}")
+        return dropped
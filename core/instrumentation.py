@@ -0,0 +1,199 @@
+import json
+import logging
+import random
+import re
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from psqlextra.models import PostgresPartitionedModel
+
+from core.catalog import catalog
+from core.explain import plan_pruning
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+if prometheus_client:
+    QUERY_SECONDS = prometheus_client.Histogram(
+        "partition_query_seconds", "Latency of queries on partitioned tables", ["table"]
+    )
+    PARTITIONS_SCANNED = prometheus_client.Histogram(
+        "partition_query_partitions_scanned", "Partitions scanned by explained queries", ["table"],
+        buckets=(1, 2, 3, 6, 12, 24, 48, 96, 192),
+    )
+    PARTITION_SCANS = prometheus_client.Counter(
+        "partition_scans_total", "Explained queries that scanned the partition", ["table", "partition"]
+    )
+    UNPRUNED_QUERIES = prometheus_client.Counter(
+        "partition_query_unpruned_total", "Explained queries that scanned every partition", ["table"]
+    )
+    QUERY_BUFFERS = prometheus_client.Counter(
+        "partition_query_buffers_total", "Shared buffers of analyzed queries", ["table", "source"]
+    )
+    SLOW_QUERIES = prometheus_client.Counter(
+        "partition_query_slow_total", "Queries slower than QUERY_SLOW_MS", ["table"]
+    )
+
+
+def export(record):
+    """
+    Default reporter: Prometheus metrics when prometheus_client is installed,
+    plus a structured log line for every explained query.
+    """
+    if prometheus_client:
+        for table in record["tables"]:
+            QUERY_SECONDS.labels(table).observe(record["duration_ms"] / 1000)
+            if record["slow"]:
+                SLOW_QUERIES.labels(table).inc()
+        for table, pruning in record.get("partitions", {}).items():
+            PARTITIONS_SCANNED.labels(table).observe(len(pruning["scanned"]))
+            for partition in pruning["scanned"]:
+                PARTITION_SCANS.labels(table, partition).inc()
+            if pruning["unpruned"]:
+                UNPRUNED_QUERIES.labels(table).inc()
+            if "shared_hit" in record:
+                QUERY_BUFFERS.labels(table, "hit").inc(record["shared_hit"])
+                QUERY_BUFFERS.labels(table, "read").inc(record["shared_read"])
+
+    if "partitions" in record:
+        level = logging.WARNING if record["slow"] else logging.INFO
+        logger.log(level, "partition query %s", json.dumps(record), extra={"partition_query": record})
+
+
+class PartitionQueryInstrument:
+    """
+    `connection.execute_wrapper` that measures SELECTs on partitioned tables.
+
+    Every such query gets its latency recorded. A `sample_rate` fraction of
+    them is run again under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) for the
+    partitions scanned vs pruned, shared buffers hit/read and the planning and
+    execution time; queries slower than `slow_ms` get a plain EXPLAIN (no
+    second execution) so a query that stopped pruning shows up with its plan.
+
+    Usage::
+
+        with connection.execute_wrapper(PartitionQueryInstrument(sample_rate=1.0)):
+            ...
+
+    or :func:`install` to instrument every connection.
+    """
+
+    def __init__(self, sample_rate=None, slow_ms=None, report=export):
+        """
+        :param sample_rate: fraction of queries to EXPLAIN ANALYZE (default: settings.QUERY_SAMPLE_RATE)
+        :param slow_ms: EXPLAIN queries slower than this; None disables (default: settings.QUERY_SLOW_MS)
+        :param report: callable receiving one dict per measured query
+        """
+        self.sample_rate = settings.QUERY_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.slow_ms = settings.QUERY_SLOW_MS if slow_ms is None else slow_ms
+        self.report = report
+        self._local = threading.local()
+        self._pattern = None
+
+    def tables(self, sql):
+        """:return: the partitioned tables referenced (quoted, as Django writes them) by `sql`"""
+        if self._pattern is None:
+            names = sorted(
+                model._meta.db_table
+                for model in apps.get_models()
+                if issubclass(model, PostgresPartitionedModel)
+            )
+            self._pattern = re.compile(r'"(%s)"' % "|".join(map(re.escape, names))) if names else False
+        if not self._pattern:
+            return []
+        return list(dict.fromkeys(self._pattern.findall(sql)))
+
+    def __call__(self, execute, sql, params, many, context):
+        if many or getattr(self._local, "active", False) or sql.lstrip()[:6].upper() != "SELECT":
+            return execute(sql, params, many, context)
+        tables = self.tables(sql)
+        if not tables:
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        slow = self.slow_ms is not None and duration_ms >= self.slow_ms
+        record = {"tables": tables, "duration_ms": round(duration_ms, 3), "slow": slow, "sql": sql}
+        analyze = random.random() < self.sample_rate
+        if analyze or slow:
+            try:
+                record.update(self.explain(context["connection"], sql, params, tables, analyze))
+            except DatabaseError as exc:
+                logger.warning(f"Could not EXPLAIN query on {', '.join(tables)}: {exc}")
+        self.report(record)
+        return result
+
+    def explain(self, connection, sql, params, tables, analyze=True):
+        """
+        EXPLAIN `sql` on `connection`, in a savepoint so a failure cannot
+        break the caller's transaction. Queries issued here are not measured.
+
+        :return: dict with "partitions" ({table: plan_pruning() + "unpruned"}),
+                 and for `analyze` the buffer counts and timings
+        """
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+        self._local.active = True
+        try:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN ({options}) {sql}", params)
+                explained = cursor.fetchone()[0]
+            if isinstance(explained, str):
+                explained = json.loads(explained)
+
+            plan = explained[0]["Plan"]
+            partitions = {}
+            for table in tables:
+                pruning = plan_pruning(plan, catalog.snapshot(table).leaves())
+                pruning["unpruned"] = pruning["total"] > 1 and pruning["pruned"] == 0
+                partitions[table] = pruning
+        finally:
+            self._local.active = False
+
+        found = {"partitions": partitions, "analyzed": analyze}
+        if analyze:
+            found.update({
+                "shared_hit": plan.get("Shared Hit Blocks", 0),
+                "shared_read": plan.get("Shared Read Blocks", 0),
+                "planning_ms": explained[0].get("Planning Time"),
+                "execution_ms": explained[0].get("Execution Time"),
+            })
+        return found
+
+
+instrument = None
+
+
+def _instrument_connection(sender, connection, **kwargs):
+    if instrument not in connection.execute_wrappers:
+        connection.execute_wrappers.append(instrument)
+
+
+def install():
+    """
+    Add the shared :class:`PartitionQueryInstrument` to every database
+    connection as it is opened, unless both QUERY_SAMPLE_RATE and
+    QUERY_SLOW_MS are off. Called from `TodoConfig.ready()`.
+    """
+    global instrument
+    if instrument or (not settings.QUERY_SAMPLE_RATE and settings.QUERY_SLOW_MS is None):
+        return
+    instrument = PartitionQueryInstrument()
+    connection_created.connect(_instrument_connection, dispatch_uid="partition_query_instrument")
+
+
+def metrics(request):
+    """Prometheus scrape endpoint (404 without prometheus_client)."""
+    if not prometheus_client:
+        raise Http404("prometheus_client is not installed.")
+    return HttpResponse(prometheus_client.generate_latest(), content_type=prometheus_client.CONTENT_TYPE_LATEST)
@@ -0,0 +1,280 @@
+import logging
+from collections import namedtuple
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from core.rollups import forget_rollups
+from core.services import PartitioningService
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+# Cache key of the numbers the checks leave for /metrics/: checks run in
+# Celery workers, the scrape endpoint in the web process.
+METRICS_CACHE_KEY = "default-partition-metrics"
+
+
+def _update_metrics(table, **values):
+    """Merge `values` into the stored metrics of `table`; "inserted" and "healed" are added to their totals."""
+    metrics = cache.get(METRICS_CACHE_KEY, {})
+    entry = metrics.setdefault(table, {"rows": 0, "inserts_total": 0, "healed_total": 0, "periods": {}})
+    entry["inserts_total"] += values.pop("inserted", 0)
+    entry["healed_total"] += values.pop("healed", 0)
+    entry.update(values)
+    cache.set(METRICS_CACHE_KEY, metrics, None)
+
+
+class DefaultPartitionCollector:
+    """Prometheus collector serving the numbers stored by :class:`DefaultPartitionMonitor` checks."""
+
+    def _families(self):
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+        return (
+            GaugeMetricFamily("default_partition_rows", "Live rows in the default partition", labels=["table"]),
+            CounterMetricFamily(
+                "default_partition_inserts", "Rows inserted into the default partition", labels=["table"]
+            ),
+            GaugeMetricFamily(
+                "default_partition_period_rows", "Estimated default partition rows per missing period",
+                labels=["table", "period"],
+            ),
+            CounterMetricFamily(
+                "default_partition_healed_rows", "Rows moved out of the default partition", labels=["table"]
+            ),
+        )
+
+    def describe(self):
+        # Lets the registry learn the metric names without reading the cache.
+        return list(self._families())
+
+    def collect(self):
+        rows, inserts, period_rows, healed = self._families()
+        for table, entry in cache.get(METRICS_CACHE_KEY, {}).items():
+            rows.add_metric([table], entry["rows"])
+            inserts.add_metric([table], entry["inserts_total"])
+            healed.add_metric([table], entry["healed_total"])
+            for period, count in entry["periods"].items():
+                period_rows.add_metric([table, period], count)
+        return [rows, inserts, period_rows, healed]
+
+
+_collector = None
+
+
+def register_metrics():
+    """Serve the default partition metrics from /metrics/ (no-op without prometheus_client)."""
+    global _collector
+    if prometheus_client and _collector is None:
+        _collector = DefaultPartitionCollector()
+        prometheus_client.REGISTRY.register(_collector)
+
+
+# Insert counter and live rows of one table.
+TABLE_STATS_SQL = "SELECT n_tup_ins, n_live_tup FROM pg_stat_user_tables WHERE relid = %s::regclass"
+
+# Whether a table has any index whose first column is created_at.
+CREATED_AT_INDEX_SQL = """
+    SELECT EXISTS (
+        SELECT 1 FROM pg_index x
+        JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = x.indkey[0]
+        WHERE x.indrelid = %s::regclass AND a.attname = 'created_at'
+    )
+"""
+
+
+OverflowReport = namedtuple("OverflowReport", [
+    "inserted",        # rows inserted into the default partition since the last check
+    "rows",            # live rows in the default partition
+    "periods",         # [(period start, estimated rows)] of the rows found there, oldest first
+    "sampled",         # periods were estimated from a TABLESAMPLE rather than counted
+])
+
+
+class DefaultPartitionMonitor:
+    """
+    Notice rows landing in the default partition as soon as they arrive, and
+    move them out while there are few of them.
+
+    Each check reads the default partition's insert counter
+    (`pg_stat_user_tables.n_tup_ins`) and compares it with the previous
+    check's (kept in the shared cache). Only when it moved, or live rows
+    remain, are the rows bucketed by `partition_size` period: counted exactly
+    while the default holds fewer than `exact_below` rows, otherwise
+    estimated from a `TABLESAMPLE SYSTEM (sample_percent)`. The results go to
+    a warning log, and to the cache, from which /metrics/ serves them (see
+    :func:`register_metrics`).
+
+    With `auto_heal`, the periods found get their partitions, and just the
+    rows of those periods move there, see :meth:`heal`.
+    """
+
+    def __init__(self, model, partition_size="month", auto_heal=False, exact_below=100000,
+                 sample_percent=1, lock_timeout="5s"):
+        """
+        :param model: PostgresPartitionedModel subclass, range partitioned on created_at
+        :param partition_size: "month" | "year" | "day"; also the bucket size
+        :param auto_heal: create the missing partitions and move the rows there
+        :param exact_below: count periods exactly while the default has fewer live rows
+        :param sample_percent: percentage of pages sampled above that
+        :param lock_timeout: lock wait allowed for the heal transaction
+        """
+        self.model = model
+        self.partition_size = partition_size
+        self.auto_heal = auto_heal
+        self.exact_below = exact_below
+        self.sample_percent = sample_percent
+        self.lock_timeout = lock_timeout
+        self.table = model._meta.db_table
+        self.service = PartitioningService(model, partition_size=partition_size)
+        self.default_table = self.service.default_table
+
+    def _qn(self, name):
+        return connection.ops.quote_name(name)
+
+    def _cache_key(self):
+        return f"default-partition-inserts:{self.default_table}"
+
+    def stats(self):
+        """:return: (n_tup_ins, n_live_tup) of the default partition"""
+        with connection.cursor() as cursor:
+            cursor.execute(TABLE_STATS_SQL, [self.default_table])
+            row = cursor.fetchone()
+        return row or (0, 0)
+
+    def ensure_brin_index(self):
+        """
+        Give a default partition with no created_at index a small BRIN one,
+        so the range deletes of :meth:`heal` do not scan it whole. Built
+        CONCURRENTLY, so run it outside a transaction.
+
+        :return: True if an index was created
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(CREATED_AT_INDEX_SQL, [self.default_table])
+            if cursor.fetchone()[0]:
+                return False
+            cursor.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self._qn(f'{self.default_table}_created_at_brin')} "
+                f"ON {self._qn(self.default_table)} USING brin (created_at)"
+            )
+        return True
+
+    def periods(self, rows):
+        """
+        Bucket the default partition's rows by period.
+
+        :param rows: live row estimate, decides between counting and sampling
+        :return: ([(period start, rows)], sampled)
+        """
+        sampled = rows >= self.exact_below
+        sample = f"TABLESAMPLE SYSTEM ({float(self.sample_percent)})" if sampled else ""
+        scale = 100 / self.sample_percent if sampled else 1
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT date_trunc(%s, created_at AT TIME ZONE 'UTC') AS period, COUNT(*) "
+                f"FROM {self._qn(self.default_table)} {sample} GROUP BY period ORDER BY period",
+                [self.partition_size],
+            )
+            return [(period, round(count * scale)) for period, count in cursor.fetchall()], sampled
+
+    def check(self):
+        """:return: OverflowReport; `periods` is empty when nothing is in the default partition"""
+        inserts, rows = self.stats()
+        previous = cache.get(self._cache_key())
+        cache.set(self._cache_key(), inserts, None)
+        # A statistics reset makes the counter go backwards.
+        inserted = inserts - previous if previous is not None and inserts >= previous else 0
+
+        periods, sampled = [], False
+        if inserted or rows:
+            periods, sampled = self.periods(rows)
+
+        _update_metrics(
+            self.table, rows=rows, inserted=inserted,
+            periods={f"{period:%Y-%m-%d}": count for period, count in periods},
+        )
+        if periods:
+            logger.warning(
+                f"{self.default_table}: {inserted} new rows, ~{rows} live; periods "
+                + ", ".join(f"{period:%Y-%m-%d} (~{count})" for period, count in periods)
+            )
+        return OverflowReport(inserted, rows, periods, sampled)
+
+    def heal(self, periods):
+        """
+        Create the partitions of `periods` and move their rows out of the
+        default partition, in one transaction:
+
+        1. DELETE the rows of those periods from the default into a
+           temporary table;
+        2. create the partitions; the default no longer holds rows in their
+           ranges, and scanning it to check is cheap while it stays small;
+        3. INSERT the rows through the parent into the new partitions.
+
+        Other rows in the default, and inserts, are not affected.
+
+        :param periods: period starts (naive UTC datetimes), e.g. from :meth:`check`
+        :return: number of rows moved
+        """
+        partitions = []
+        for period in periods:
+            partitions.extend(self.service._missing_partitions(period, period))
+        if not partitions:
+            return 0
+
+        qn = self._qn
+        columns = ", ".join(qn(f.column) for f in self.model._meta.concrete_fields if not f.generated)
+        ranges = [
+            (p.start_datetime.replace(tzinfo=dt_timezone.utc), p.end_datetime.replace(tzinfo=dt_timezone.utc))
+            for p in partitions
+        ]
+        condition = " OR ".join("(created_at >= %s AND created_at < %s)" for _ in ranges)
+        params = [value for pair in ranges for value in pair]
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT set_config('lock_timeout', %s, true)", [self.lock_timeout])
+                cursor.execute(
+                    f"CREATE TEMPORARY TABLE default_stray ON COMMIT DROP AS "
+                    f"SELECT {columns} FROM {qn(self.default_table)} WITH NO DATA"
+                )
+                cursor.execute(
+                    f"WITH moved AS (DELETE FROM {qn(self.default_table)} WHERE {condition} RETURNING {columns}) "
+                    f"INSERT INTO default_stray SELECT * FROM moved",
+                    params,
+                )
+                moved = cursor.rowcount
+            self.service._create_partitions(partitions)
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {qn(self.table)} ({columns}) SELECT {columns} FROM default_stray")
+            # A partition recreated under a dropped one's name would reuse its stale rollup.
+            forget_rollups(self.model, [f"{self.table}_{partition.name()}" for partition in partitions])
+
+        _update_metrics(self.table, healed=moved)
+        logger.info(f"Moved {moved} rows out of {self.default_table} into {len(partitions)} new partitions")
+        return moved
+
+    def apply(self):
+        """
+        Check the default partition, and heal the periods found if `auto_heal`.
+
+        :return: str status message
+        """
+        report = self.check()
+        if not report.periods:
+            return f"✅ {self.default_table} is empty."
+
+        found = ", ".join(f"{period:%Y-%m-%d}" for period, _ in report.periods)
+        if not self.auto_heal:
+            return f"✅ {self.default_table}: ~{report.rows} rows in {found}; auto-heal is off."
+
+        self.ensure_brin_index()
+        moved = self.heal([period for period, _ in report.periods])
+        return f"✅ {self.default_table}: moved {moved} rows of {found} into new partitions."
@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class KeysetPage:
+    """One page of a :class:`KeysetPaginator`, with opaque cursors to its neighbours."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Seek pagination, newest first, keyed on (time field, pk).
+
+    Each page filters `(created_at, id) < cursor` instead of using OFFSET.
+    The extra `created_at <= cursor` bound prunes newer partitions at plan
+    time, and the `(created_at, id)` index lets Postgres walk the remaining
+    partitions newest first (an ordered Append, or a Merge Append when a
+    default partition exists), stopping as soon as the page is full. Deep
+    pages cost the same as the first one, and no COUNT(*) is needed.
+    """
+
+    def __init__(self, queryset, per_page, time_field="created_at"):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.time_field = time_field
+
+    @staticmethod
+    def encode_cursor(key, direction):
+        payload = json.dumps({"k": [key[0].isoformat(), key[1]], "d": direction})
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            (timestamp, pk), direction = payload["k"], payload["d"]
+            if direction not in ("next", "prev"):
+                raise ValueError(direction)
+            return (datetime.fromisoformat(timestamp), int(pk)), direction
+        except (ValueError, TypeError, KeyError) as exc:
+            raise InvalidCursor(cursor) from exc
+
+    def _key(self, obj):
+        return getattr(obj, self.time_field), obj.pk
+
+    def _seek(self, key, direction):
+        """Filter and order the queryset to rows strictly after `key` in `direction`."""
+        t, pk = self.time_field, "pk"
+        if direction == "next":
+            return self.queryset.filter(**{f"{t}__lte": key[0]}).filter(
+                Q(**{f"{t}__lt": key[0]}) | Q(**{t: key[0], f"{pk}__lt": key[1]})
+            ).order_by(f"-{t}", f"-{pk}")
+        return self.queryset.filter(**{f"{t}__gte": key[0]}).filter(
+            Q(**{f"{t}__gt": key[0]}) | Q(**{t: key[0], f"{pk}__gt": key[1]})
+        ).order_by(t, pk)
+
+    def _page_query(self, cursor):
+        """:return: (queryset of up to per_page + 1 rows, direction)"""
+        if cursor:
+            key, direction = self.decode_cursor(cursor)
+            queryset = self._seek(key, direction)
+        else:
+            direction = "next"
+            queryset = self.queryset.order_by(f"-{self.time_field}", "-pk")
+        return queryset[: self.per_page + 1], direction
+
+    def _build(self, rows, direction, cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if direction == "prev":
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(self._key(rows[-1]), "next") if rows and has_next else None,
+            previous_cursor=self.encode_cursor(self._key(rows[0]), "prev") if rows and has_previous else None,
+        )
+
+    def page(self, cursor=None):
+        """Return the page after (or before) `cursor`; the newest page without one."""
+        queryset, direction = self._page_query(cursor)
+        return self._build(list(queryset), direction, cursor)
+
+    async def apage(self, cursor=None):
+        """Async version of :meth:`page`."""
+        queryset, direction = self._page_query(cursor)
+        return self._build([obj async for obj in queryset.aiterator()], direction, cursor)
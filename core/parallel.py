@@ -0,0 +1,57 @@
+import queue
+import threading
+
+from django.db import connection
+
+
+def run_in_threads(func, items, workers=1):
+    """
+    Call `func(item)` for every item on `workers` threads. Each thread opens
+    one database connection, reuses it for all the items it picks up, and
+    closes it when the queue is drained.
+
+    :return: iterator of (item, result) in completion order; an exception
+             raised by `func` stops the remaining work and propagates when
+             its result is reached
+    """
+    if workers <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+
+    pending = queue.SimpleQueue()
+    total = 0
+    for item in items:
+        pending.put(item)
+        total += 1
+    done = queue.SimpleQueue()
+    stop = threading.Event()
+
+    def worker():
+        try:
+            while not stop.is_set():
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    done.put((item, func(item), None))
+                except BaseException as exc:
+                    done.put((item, None, exc))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(workers, total))]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for _ in range(total):
+            item, result, exc = done.get()
+            if exc is not None:
+                raise exc
+            yield item, result
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
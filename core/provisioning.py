@@ -0,0 +1,202 @@
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import connection
+
+from core.catalog import catalog
+from core.services import PartitioningService
+
+logger = logging.getLogger(__name__)
+
+# Cumulative inserts per leaf partition since the last statistics reset.
+INSERT_STATS_SQL = """
+    SELECT stat.relname, stat.n_tup_ins
+    FROM pg_partition_tree(%s::regclass) AS tree
+    JOIN pg_stat_user_tables AS stat ON stat.relid = tree.relid
+    WHERE tree.isleaf
+"""
+
+
+# Cache backends whose entries only the process that wrote them can read.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def check_shared_cache(app_configs=None, **kwargs):
+    """
+    System check: samples written by one Celery worker process must be
+    readable by the next run, whichever process takes it.
+    """
+    if settings.CACHES["default"]["BACKEND"] in PROCESS_LOCAL_CACHES:
+        return [checks.Warning(
+            "The default cache is local to each process, so partition provisioning never sees "
+            "its previous ingest samples and default partition checks never see their previous counts.",
+            hint="Use a shared cache backend (database or Redis), see CACHES in core/settings.py.",
+            id="core.W001",
+        )]
+    return []
+
+
+IngestSample = namedtuple("IngestSample", ["at", "inserts", "frontier"])
+
+ProvisioningPlan = namedtuple("ProvisioningPlan", [
+    "rate",            # rows/sec into the whole table over the sampling window
+    "rates",           # {leaf partition: rows/sec}, partitions with inserts only
+    "frontier",        # newest created_at seen in the partitions taking inserts
+    "speed",           # how fast the frontier moves, in seconds of data per second
+    "boundary",        # upper bound of the newest partition
+    "reached_in",      # projected time until the frontier reaches `boundary` (None: never)
+    "partitions",      # PostgresTimePartitions to create
+])
+
+
+class PartitionProvisioner:
+    """
+    Create future partitions just ahead of the data instead of a fixed
+    number of periods.
+
+    Every run samples the insert counters of the table's partitions
+    (`pg_stat_user_tables.n_tup_ins`) and the newest `created_at` of the
+    newest partition taking inserts (the frontier). The samples of the last
+    `window` are kept in the cache, which must be shared by the worker
+    processes (see :func:`check_shared_cache`); from them the planner derives the rows/sec
+    per partition and how fast the frontier advances (1.0 for rows stamped
+    with the current time), projects when it crosses the newest partition
+    boundary, and creates the partitions the frontier will reach within
+    `lead`. `lead` must be comfortably longer than the interval between runs.
+    """
+
+    def __init__(self, model, partition_size="month", lead=timedelta(days=7),
+                 window=timedelta(hours=1), max_ahead=3):
+        """
+        :param model: PostgresPartitionedModel subclass, range partitioned on created_at
+        :param partition_size: "month" | "year" | "day"
+        :param lead: how far ahead of the projected frontier partitions must exist
+        :param window: how far back samples are used to measure the rates
+        :param max_ahead: never create more partitions than this in one run
+        """
+        self.model = model
+        self.table = model._meta.db_table
+        self.lead = lead
+        self.window = window
+        self.max_ahead = max_ahead
+        self.service = PartitioningService(model, partition_size=partition_size)
+
+    def _cache_key(self):
+        return f"partition-ingest:{self.table}"
+
+    def _frontier(self, snapshot, inserts, previous):
+        """Newest created_at of the newest range partition whose insert counter moved."""
+        if not previous:
+            return None
+        hot = [
+            p for p in snapshot.partitions
+            if any(inserts.get(leaf, 0) > previous.inserts.get(leaf, 0) for leaf in p.leaves)
+        ]
+        if not hot:
+            return previous.frontier
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT MAX(created_at) FROM {connection.ops.quote_name(hot[-1].name)}")
+            return cursor.fetchone()[0]
+
+    def sample(self):
+        """
+        Take one sample and store it with the previous ones in the cache.
+
+        :return: list of IngestSample within `window`, oldest first
+        """
+        snapshot = catalog.snapshot(self.table)
+        with connection.cursor() as cursor:
+            cursor.execute(INSERT_STATS_SQL, [self.table])
+            inserts = dict(cursor.fetchall())
+
+        samples = cache.get(self._cache_key(), [])
+        if samples and sum(inserts.values()) < sum(samples[-1].inserts.values()):
+            # Statistics were reset; earlier samples cannot be compared.
+            samples = []
+        previous = samples[-1] if samples else None
+        now = time.time()
+
+        samples.append(IngestSample(now, inserts, self._frontier(snapshot, inserts, previous)))
+        window = self.window.total_seconds()
+        # Keep one sample older than the window, so a full window is measured.
+        while len(samples) > 2 and samples[1].at < now - window:
+            samples.pop(0)
+        cache.set(self._cache_key(), samples, int(window * 2))
+        return samples
+
+    def _rates(self, samples):
+        first, last = samples[0], samples[-1]
+        elapsed = last.at - first.at
+        if elapsed <= 0:
+            return 0.0, {}
+        rates = {
+            name: (count - first.inserts.get(name, 0)) / elapsed
+            for name, count in last.inserts.items()
+            if count > first.inserts.get(name, 0)
+        }
+        return sum(rates.values()), rates
+
+    def _speed(self, samples):
+        known = [s for s in samples if s.frontier]
+        if len(known) >= 2 and known[-1].at > known[0].at:
+            speed = (known[-1].frontier - known[0].frontier).total_seconds() / (known[-1].at - known[0].at)
+            if speed > 0:
+                return speed
+        # Not enough history, or a stalled frontier: assume rows are stamped with the current time.
+        return 1.0
+
+    def plan(self):
+        """Sample, then work out which partitions the frontier will reach within `lead`."""
+        samples = self.sample()
+        rate, rates = self._rates(samples)
+        snapshot = catalog.snapshot(self.table)
+        default = snapshot.default.name if snapshot.default else None
+        if default in rates:
+            logger.warning(f"{rates[default]:.1f} rows/sec are landing in {default}")
+
+        now = datetime.now(dt_timezone.utc)
+        frontier = max(samples[-1].frontier or now, now)
+        speed = self._speed(samples)
+        boundary = snapshot.partitions[-1].range_to if snapshot.partitions else None
+
+        reached_in = None
+        if boundary:
+            reached_in = timedelta(seconds=round(max((boundary - frontier).total_seconds(), 0) / speed))
+
+        partitions = []
+        if not boundary or reached_in < self.lead:
+            target = frontier + timedelta(seconds=self.lead.total_seconds() * speed)
+            start = boundary or frontier
+            partitions = self.service._missing_partitions(
+                start.replace(tzinfo=None), target.replace(tzinfo=None)
+            )[:self.max_ahead]
+
+        return ProvisioningPlan(rate, rates, frontier, speed, boundary, reached_in, partitions)
+
+    def apply(self, dry_run=False):
+        """
+        Plan and create the partitions.
+
+        :param dry_run: only report the plan
+        :return: str status message
+        """
+        plan = self.plan()
+        if plan.partitions and not dry_run:
+            for _ in self.service.apply_partitions(plan.partitions):
+                pass
+
+        reached = f"reached in {plan.reached_in}" if plan.boundary else "no partitions yet"
+        names = ", ".join(partition.name() for partition in plan.partitions) or "none"
+        return (
+            f"✅ {self.model.__name__}: {plan.rate:.1f} rows/sec, frontier {plan.frontier:%Y-%m-%d %H:%M} "
+            f"(x{plan.speed:.2f}), boundary {reached}; "
+            f"{'would create' if dry_run else 'created'} {len(plan.partitions)} partitions ({names})."
+        )
@@ -0,0 +1,123 @@
+import re
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Q
+from django.utils import timezone
+from psqlextra.manager import PostgresManager
+from psqlextra.partitioning import PostgresTimePartitionSize
+from psqlextra.query import PostgresQuerySet
+
+from core.explain import pruning_report
+
+
+def partition_size_for(model) -> PostgresTimePartitionSize:
+    """Parse a model's `PartitioningMeta.range_interval` ("1 month", "7 days", ...)."""
+    interval = getattr(model.PartitioningMeta, "range_interval", "1 month")
+    match = re.fullmatch(r"\s*(\d+)\s*(day|week|month|year)s?\s*", interval)
+    if not match:
+        raise ValueError(f"Unsupported range_interval {interval!r} on {model.__name__}")
+    return PostgresTimePartitionSize(**{f"{match[2]}s": int(match[1])})
+
+
+class TimePartitionedQuerySet(PostgresQuerySet):
+    """
+    QuerySet for models range partitioned by time.
+
+    Every helper filters the partition key with timezone-aware bounds so
+    Postgres can prune partitions when planning, and upper bounds are
+    aligned to partition boundaries so future (empty) partitions are skipped.
+    """
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._window = self.window()
+        return clone
+
+    def window(self):
+        """The (start, end) partition key bounds set by :meth:`between`, if any."""
+        return getattr(self, "_window", None)
+
+    def _aware(self, value):
+        """Turn dates and naive datetimes into aware datetimes in the current timezone."""
+        if isinstance(value, date) and not isinstance(value, datetime):
+            value = datetime.combine(value, time.min)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    def partition_start(self, value=None):
+        """Start of the partition holding `value` (default: now), as an aware UTC datetime."""
+        value = self._aware(value or timezone.now()).astimezone(dt_timezone.utc)
+        return partition_size_for(self.model).start(value).replace(tzinfo=dt_timezone.utc)
+
+    def partition_end(self, value=None):
+        """End (exclusive) of the partition holding `value` (default: now)."""
+        return self.partition_start(value) + partition_size_for(self.model).as_delta()
+
+    def between(self, start, end):
+        """Filter the partition key to [start, end)."""
+        key = self.model._partitioning_meta.key[0]
+        start, end = self._aware(start), self._aware(end)
+        clone = self.filter(**{f"{key}__gte": start, f"{key}__lt": end})
+        clone._window = (start, end)
+        return clone
+
+    def since(self, delta):
+        """Rows newer than now - delta, up to the end of the current partition."""
+        return self.between(timezone.now() - delta, self.partition_end())
+
+    def recent_partitions(self, count):
+        """Rows in the `count` most recent partitions, the current one included."""
+        start = self.partition_start() - partition_size_for(self.model).as_delta() * (count - 1)
+        return self.between(start, self.partition_end())
+
+    def search(self, query, full_text=False):
+        """
+        Filter on the model's `search_fields`.
+
+        Substring search ORs `icontains` over the fields, which the trigram
+        indexes serve; `full_text` matches the generated `search_vector`
+        column with websearch syntax instead.
+        """
+        if full_text:
+            return self.filter(search_vector=SearchQuery(
+                query, config=self.model.search_config, search_type="websearch",
+            ))
+
+        condition = Q()
+        for field in self.model.search_fields:
+            condition |= Q(**{f"{field}__icontains": query})
+        return self.filter(condition)
+
+    def pruning(self):
+        """EXPLAIN this queryset and report scanned vs pruned partitions."""
+        return pruning_report(self)
+
+    def fanout(self, workers=None):
+        """
+        Opt in to running this queryset per partition, concurrently; see
+        :class:`core.fanout.PartitionFanout` (`.results()`, `.count()`).
+        """
+        from core.fanout import PartitionFanout
+
+        return PartitionFanout(self, workers)
+
+    def rollup(self):
+        """
+        Aggregates over this queryset's window (see `between()`), answered
+        from the per-partition rollups. Other filters are ignored.
+        """
+        from core.rollups import PartitionRollups
+
+        return PartitionRollups(self.model).summary(*(self.window() or (None, None)))
+
+    def rollup_report(self):
+        """Per-partition aggregates over this queryset's window, from the rollups."""
+        from core.rollups import PartitionRollups
+
+        return PartitionRollups(self.model).report(*(self.window() or (None, None)))
+
+
+class TimePartitionedManager(PostgresManager.from_queryset(TimePartitionedQuerySet)):
+    """Manager exposing :class:`TimePartitionedQuerySet` helpers on the model."""
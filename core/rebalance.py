@@ -0,0 +1,377 @@
+import logging
+import time
+from collections import namedtuple
+from datetime import timedelta, timezone as dt_timezone
+
+from dateutil.relativedelta import relativedelta
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+from psqlextra.partitioning.constants import AUTO_PARTITIONED_COMMENT
+
+from core.catalog import catalog
+from core.rollups import forget_rollups
+from core.services import PartitioningService, is_lock_timeout
+
+logger = logging.getLogger(__name__)
+
+# New partitions are built under a staging table named like the parent plus this suffix.
+STAGING_SUFFIX = "_rebalance"
+
+# Partition sizes from finest to coarsest, with the span each one covers.
+GRANULARITIES = [
+    ("day", relativedelta(days=1)),
+    ("month", relativedelta(months=1)),
+    ("year", relativedelta(years=1)),
+]
+
+# Bytes of every partition, summed over its hash sub-partitions if it has any.
+PARTITION_BYTES_SQL = """
+    SELECT child.relname, (SELECT SUM(pg_total_relation_size(relid)) FROM pg_partition_tree(child.oid))
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = %s::regclass
+"""
+
+Rebalance = namedtuple("Rebalance", ["action", "old", "new"])
+
+
+def granularity(partition):
+    """:return: "day" | "month" | "year" for a partition spanning exactly one such period, else None"""
+    span = relativedelta(partition.range_to, partition.range_from)
+    for size, delta in GRANULARITIES:
+        if span == delta:
+            return size
+    return None
+
+
+class PartitionRebalancer:
+    """
+    Make partition sizes follow data volume instead of one fixed
+    `partition_size`.
+
+    A closed partition above `max_rows` / `max_bytes` is split into
+    partitions of the next finer size (a year into months, a month into
+    days). Adjacent closed partitions that are all below `min_rows` /
+    `min_bytes` and together cover exactly one period of the next coarser
+    size are merged into it. The partition still written to is never
+    touched. Sizes come from `pg_class.reltuples` and
+    `pg_total_relation_size`, so analyze the table first.
+
+    A replacement is online and every row stays visible on the parent:
+
+    1. the new partitions are built as partitions of a staging table
+       (`<table>_rebalance`), each with a CHECK constraint matching its range;
+    2. a trigger on the old partitions mirrors every insert, update and
+       delete into the staging table;
+    3. the old rows are copied over in chunks of `chunk_size` rows, each its
+       own transaction, read `FOR SHARE` like the online conversion's backfill;
+    4. one short transaction under `lock_timeout` locks the parent, drops
+       the trigger, detaches the old partitions and attaches the filled new
+       ones; their CHECK constraints spare the validation scan.
+
+    Until step 4 the parent is not changed, so an interrupted run is simply
+    discarded (staging table and trigger) and planned again by the next one.
+    """
+
+    def __init__(self, model, max_rows=None, max_bytes=None, min_rows=None, min_bytes=None,
+                 merge_min_age=relativedelta(months=1), chunk_size=10000, lock_timeout="5s", retries=3):
+        """
+        :param model: PostgresPartitionedModel subclass, range partitioned on created_at
+        :param max_rows: split partitions with more rows than this
+        :param max_bytes: split partitions larger than this (table, indexes and TOAST)
+        :param min_rows: merge partitions with fewer rows than this
+        :param min_bytes: merge partitions smaller than this
+        :param merge_min_age: relativedelta; only partitions ending before now - merge_min_age are merged
+        :param chunk_size: rows copied per transaction
+        :param lock_timeout: lock wait allowed for the swap transaction
+        :param retries: extra attempts for that transaction after a lock timeout
+        """
+        self.model = model
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.min_rows = min_rows
+        self.min_bytes = min_bytes
+        self.merge_min_age = merge_min_age
+        self.chunk_size = chunk_size
+        self.lock_timeout = lock_timeout
+        self.retries = retries
+        self.table = model._meta.db_table
+        self.staging_table = f"{self.table}{STAGING_SUFFIX}"
+        self.function = f"{self.table}_rebalance_mirror"
+        self.columns = [f.column for f in model._meta.concrete_fields if not f.generated]
+
+    def _qn(self, name):
+        return connection.ops.quote_name(name)
+
+    def sizes(self):
+        """:return: {partition name: (row estimate, bytes)}"""
+        reltuples = catalog.snapshot(self.table).reltuples()
+        with connection.cursor() as cursor:
+            cursor.execute(PARTITION_BYTES_SQL, [self.table])
+            return {name: (reltuples.get(name, -1), size) for name, size in cursor.fetchall()}
+
+    def _oversized(self, rows, size):
+        return (self.max_rows is not None and rows > self.max_rows) or (
+            self.max_bytes is not None and size > self.max_bytes
+        )
+
+    def _undersized(self, rows, size):
+        if self.min_rows is None and self.min_bytes is None:
+            return False
+        return (self.min_rows is None or 0 <= rows < self.min_rows) and (
+            self.min_bytes is None or size < self.min_bytes
+        )
+
+    def _partitions(self, size, range_from, range_to):
+        """PostgresTimePartitions of `size` covering [range_from, range_to)."""
+        service = PartitioningService(self.model, partition_size=size)
+        return service._partitions_between(
+            range_from.replace(tzinfo=None), (range_to - timedelta(microseconds=1)).replace(tzinfo=None)
+        )
+
+    def plan(self):
+        """:return: list of Rebalance(action, old partitions, new PostgresTimePartitions)"""
+        sizes = self.sizes()
+        partitions = catalog.snapshot(self.table).partitions
+        plan = []
+
+        now = timezone.now()
+        for partition in partitions:
+            size = granularity(partition)
+            if (
+                size and size != GRANULARITIES[0][0]
+                and partition.range_to <= now
+                and self._oversized(*sizes.get(partition.name, (-1, 0)))
+            ):
+                finer = GRANULARITIES[[s for s, _ in GRANULARITIES].index(size) - 1][0]
+                plan.append(Rebalance(
+                    "split", [partition], self._partitions(finer, partition.range_from, partition.range_to)
+                ))
+
+        cutoff = timezone.now() - self.merge_min_age
+        for (size, _), (coarser, _) in zip(GRANULARITIES, GRANULARITIES[1:]):
+            groups = {}
+            for partition in partitions:
+                if (
+                    granularity(partition) == size
+                    and partition.range_to <= cutoff
+                    and self._undersized(*sizes.get(partition.name, (-1, 0)))
+                ):
+                    target = self._partitions(coarser, partition.range_from, partition.range_to)[0]
+                    groups.setdefault(target.name(), (target, []))[1].append(partition)
+
+            for target, members in groups.values():
+                rows = sum(max(sizes[p.name][0], 0) for p in members)
+                total = sum(sizes[p.name][1] for p in members)
+                covered = (
+                    members[0].range_from.replace(tzinfo=None) == target.start_datetime
+                    and members[-1].range_to.replace(tzinfo=None) == target.end_datetime
+                    and all(a.range_to == b.range_from for a, b in zip(members, members[1:]))
+                )
+                if len(members) > 1 and covered and not self._oversized(rows, total):
+                    plan.append(Rebalance("merge", members, [target]))
+        return plan
+
+    def _bounds(self, partition):
+        """(range_from, range_to) of a PostgresTimePartition as aware UTC datetimes."""
+        return (
+            partition.start_datetime.replace(tzinfo=dt_timezone.utc),
+            partition.end_datetime.replace(tzinfo=dt_timezone.utc),
+        )
+
+    def discard(self):
+        """
+        Drop the staging table and mirror trigger left by an interrupted run.
+
+        :return: True if there was anything to drop
+        """
+        qn = self._qn
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s), to_regproc(%s)", [self.staging_table, self.function])
+            staging, function = cursor.fetchone()
+            if function:
+                cursor.execute(f"DROP FUNCTION {qn(self.function)}() CASCADE")
+            if staging:
+                cursor.execute(f"DROP TABLE {qn(self.staging_table)}")
+        return bool(staging or function)
+
+    def build(self, rebalance):
+        """
+        Create the staging table with the new partitions, and mirror writes
+        on the old partitions into it from now on.
+        """
+        qn = self._qn
+        columns = ", ".join(qn(c) for c in self.columns)
+        values = ", ".join(f"NEW.{qn(c)}" for c in self.columns)
+        pk = qn(self.model._meta.pk.column)
+        staging = qn(self.staging_table)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {staging} (LIKE {qn(self.table)} INCLUDING CONSTRAINTS INCLUDING GENERATED "
+                f"INCLUDING INDEXES) PARTITION BY RANGE (created_at)"
+            )
+            for partition in rebalance.new:
+                name = f"{self.table}_{partition.name()}"
+                cursor.execute(connection.ops.compose_sql(
+                    f"CREATE TABLE {qn(name)} PARTITION OF {staging} FOR VALUES FROM (%s) TO (%s)",
+                    self._bounds(partition),
+                ))
+                # Kept after detaching from the staging table, so attaching skips the scan.
+                cursor.execute(connection.ops.compose_sql(
+                    f"ALTER TABLE {qn(name)} ADD CONSTRAINT {qn(f'{name}_bounds')} "
+                    f"CHECK (created_at >= %s AND created_at < %s)",
+                    self._bounds(partition),
+                ))
+            cursor.execute(
+                f"""
+                CREATE FUNCTION {qn(self.function)}() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                        DELETE FROM {staging} WHERE {pk} = OLD.{pk} AND created_at = OLD.created_at;
+                    END IF;
+                    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                        INSERT INTO {staging} ({columns}) VALUES ({values}) ON CONFLICT DO NOTHING;
+                    END IF;
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql
+                """
+            )
+            for partition in rebalance.old:
+                cursor.execute(
+                    f"CREATE TRIGGER {qn(self.function)} AFTER INSERT OR UPDATE OR DELETE "
+                    f"ON {qn(partition.name)} FOR EACH ROW EXECUTE FUNCTION {qn(self.function)}()"
+                )
+
+    def copy_chunk(self, source, last_key):
+        """
+        Copy the next `chunk_size` rows of `source` after `last_key` into the
+        staging table. Rows are read `FOR SHARE`, so a concurrent update or
+        delete either waits for the chunk to commit (then the trigger fixes
+        the copy) or finishes first (then the chunk copies the new version).
+
+        :return: (rows copied, last_key) where last_key is None once `source` is done
+        """
+        qn = self._qn
+        columns = ", ".join(qn(c) for c in self.columns)
+        pk = qn(self.model._meta.pk.column)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH chunk AS (
+                    SELECT {columns} FROM {qn(source)}
+                    WHERE (created_at, {pk}) > (%s, %s)
+                    ORDER BY created_at, {pk}
+                    LIMIT %s
+                    FOR SHARE
+                ), inserted AS (
+                    INSERT INTO {qn(self.staging_table)} ({columns})
+                    SELECT {columns} FROM chunk
+                    ON CONFLICT DO NOTHING
+                )
+                SELECT (SELECT COUNT(*) FROM chunk), created_at, {pk}
+                FROM chunk
+                ORDER BY created_at DESC, {pk} DESC
+                LIMIT 1
+                """,
+                [*last_key, self.chunk_size],
+            )
+            row = cursor.fetchone()
+
+        if not row:
+            return 0, None
+        return row[0], (row[1], row[2])
+
+    def fill(self, rebalance):
+        """Copy the rows of the old partitions. :return: number of rows copied"""
+        copied = 0
+        for partition in rebalance.old:
+            last_key = (partition.range_from, 0)
+            while last_key:
+                count, last_key = self.copy_chunk(partition.name, last_key)
+                copied += count
+        return copied
+
+    def swap(self, rebalance):
+        """
+        Replace the old partitions by the filled new ones, in one transaction
+        retried on lock timeouts. The parent is locked first, in the order
+        writers take their locks, so a write waiting on it cannot deadlock
+        with the swap.
+        """
+        qn = self._qn
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT set_config('lock_timeout', %s, true)", [self.lock_timeout])
+                        cursor.execute(f"LOCK TABLE {qn(self.table)} IN ACCESS EXCLUSIVE MODE")
+                        cursor.execute(f"DROP FUNCTION {qn(self.function)}() CASCADE")
+                        for partition in rebalance.new:
+                            cursor.execute(
+                                f"ALTER TABLE {qn(self.staging_table)} "
+                                f"DETACH PARTITION {qn(f'{self.table}_{partition.name()}')}"
+                            )
+                        cursor.execute(f"DROP TABLE {qn(self.staging_table)}")
+                        for partition in rebalance.old:
+                            cursor.execute(f"ALTER TABLE {qn(self.table)} DETACH PARTITION {qn(partition.name)}")
+                            cursor.execute(f"DROP TABLE {qn(partition.name)}")
+                        for partition in rebalance.new:
+                            name = f"{self.table}_{partition.name()}"
+                            cursor.execute(connection.ops.compose_sql(
+                                f"ALTER TABLE {qn(self.table)} ATTACH PARTITION {qn(name)} "
+                                f"FOR VALUES FROM (%s) TO (%s)",
+                                self._bounds(partition),
+                            ))
+                            cursor.execute(f"ALTER TABLE {qn(name)} DROP CONSTRAINT {qn(f'{name}_bounds')}")
+                            cursor.execute(connection.ops.compose_sql(
+                                f"COMMENT ON TABLE {qn(name)} IS %s", [AUTO_PARTITIONED_COMMENT]
+                            ))
+                    catalog.invalidate(self.table)
+                return
+            except OperationalError as exc:
+                if not is_lock_timeout(exc) or attempt > self.retries:
+                    raise
+                logger.warning(f"Lock timeout rebalancing {self.table}, retry {attempt}/{self.retries}")
+                time.sleep(attempt)
+
+    def replace(self, rebalance):
+        """Carry out one Rebalance. :return: number of rows copied"""
+        self.build(rebalance)
+        try:
+            copied = self.fill(rebalance)
+            self.swap(rebalance)
+        except Exception:
+            self.discard()
+            raise
+        forget_rollups(self.model, [f"{self.table}_{partition.name()}" for partition in rebalance.new])
+        return copied
+
+    def apply(self, dry_run=False):
+        """
+        Resume interrupted runs, then split and merge as planned.
+
+        :param dry_run: only report the plan
+        :return: str status message
+        """
+        lines, done = [], {"split": 0, "merge": 0}
+        if not dry_run and self.discard():
+            lines.append(f"Discarded {self.staging_table} of an interrupted run")
+
+        for rebalance in self.plan():
+            old = ", ".join(p.name for p in rebalance.old)
+            new = ", ".join(p.name() for p in rebalance.new)
+            copied = "" if dry_run else f" ({self.replace(rebalance)} rows copied)"
+            done[rebalance.action] += 1
+            lines.append(f"{'Would ' + rebalance.action if dry_run else rebalance.action.capitalize()} "
+                         f"{old} -> {new}{copied}")
+
+        lines.append(
+            f"✅ Rebalanced {self.model.__name__}: {done['split']} partitions split, "
+            f"{done['merge']} merged{' (dry run)' if dry_run else ''}."
+        )
+        return "\n".join(lines)
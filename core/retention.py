@@ -0,0 +1,230 @@
+import gzip
+import logging
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.utils import timezone
+
+from core.catalog import catalog
+from core.services import is_lock_timeout
+
+logger = logging.getLogger(__name__)
+
+# Marks a partition the retention engine is removing, so a run interrupted
+# between detach and drop is picked up again by the next one.
+RETENTION_COMMENT = "partition_retention_detached"
+
+ARCHIVE_SUFFIXES = {"gzip": ".csv.gz", "zstd": ".csv.zst", "parquet": ".parquet"}
+
+
+class PartitionRetention:
+    """
+    Remove partitions older than `max_age` without blocking inserts.
+
+    Each expired partition is detached with `DETACH PARTITION ... CONCURRENTLY`,
+    which only takes SHARE UPDATE EXCLUSIVE on the parent. Postgres refuses
+    CONCURRENTLY while the table has a default partition; then a plain DETACH
+    runs under a short `lock_timeout` and is retried, so it never queues in
+    front of the insert path for long. The detached table is optionally
+    exported to a compressed file under `PARTITION_ARCHIVE_DIR` and then
+    dropped, which no longer touches the parent.
+    """
+
+    def __init__(self, model, max_age, archive=None, archive_dir=None, lock_timeout="5s", retries=3):
+        """
+        :param model: partitioned Django model
+        :param max_age: relativedelta; partitions ending before now - max_age are removed
+        :param archive: None | "gzip" | "zstd" | "parquet"
+        :param archive_dir: where archives are written (default: settings.PARTITION_ARCHIVE_DIR)
+        :param lock_timeout: lock wait allowed for a plain (non-concurrent) DETACH
+        :param retries: extra attempts for a plain DETACH after a lock timeout
+        """
+        if archive not in (None, *ARCHIVE_SUFFIXES):
+            raise ValueError(f"Unknown archive format: {archive}")
+        self.model = model
+        self.max_age = max_age
+        self.archive_format = archive
+        self.archive_dir = Path(archive_dir or settings.PARTITION_ARCHIVE_DIR)
+        self.lock_timeout = lock_timeout
+        self.retries = retries
+        self.table = model._meta.db_table
+
+    def _qn(self, name):
+        return connection.ops.quote_name(name)
+
+    def expired(self):
+        """:return: names of the partitions whose whole range is older than max_age"""
+        cutoff = timezone.now() - self.max_age
+        snapshot = catalog.snapshot(self.table)
+        return [p.name for p in snapshot.partitions if p.range_to <= cutoff]
+
+    def leftovers(self):
+        """:return: tables detached by an earlier run that were never dropped"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT relname FROM pg_class
+                WHERE relkind IN ('r', 'p') AND obj_description(oid, 'pg_class') = %s
+                  AND relname LIKE %s
+                  AND NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = pg_class.oid)
+                """,
+                [RETENTION_COMMENT, f"{self.table}\\_%"],
+            )
+            return [name for (name,) in cursor.fetchall()]
+
+    def detach(self, partition):
+        """Detach `partition`, finishing a previously interrupted concurrent detach."""
+        qn = self._qn
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT inhdetachpending FROM pg_inherits WHERE inhrelid = %s::regclass", [partition]
+            )
+            row = cursor.fetchone()
+            cursor.execute(
+                connection.ops.compose_sql(f"COMMENT ON TABLE {qn(partition)} IS %s", [RETENTION_COMMENT])
+            )
+            cursor.execute(
+                "SELECT 1 FROM pg_inherits JOIN pg_class ON pg_class.oid = inhrelid "
+                "WHERE inhparent = %s::regclass AND pg_get_expr(relpartbound, pg_class.oid) = 'DEFAULT'",
+                [self.table],
+            )
+            has_default = cursor.fetchone() is not None
+
+        statement = f"ALTER TABLE {qn(self.table)} DETACH PARTITION {qn(partition)}"
+        if row and row[0]:
+            self._execute(f"{statement} FINALIZE")
+        elif has_default:
+            self._execute_with_retry(statement)
+        else:
+            # Must run outside a transaction block, so no atomic() here.
+            self._execute(f"{statement} CONCURRENTLY")
+        catalog.invalidate(self.table)
+
+    def _execute(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+
+    def _execute_with_retry(self, sql):
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute("SELECT set_config('lock_timeout', %s, true)", [self.lock_timeout])
+                    cursor.execute(sql)
+                return
+            except OperationalError as exc:
+                if not is_lock_timeout(exc) or attempt > self.retries:
+                    raise
+                logger.warning(f"Lock timeout detaching from {self.table}, retry {attempt}/{self.retries}")
+                time.sleep(attempt)
+
+    def archive_path(self, table):
+        return self.archive_dir / f"{table}{ARCHIVE_SUFFIXES[self.archive_format]}"
+
+    def archive(self, table):
+        """
+        Export a detached table to `archive_path(table)`. The file is written
+        under a temporary name and renamed once complete.
+
+        :return: Path of the archive
+        """
+        path = self.archive_path(table)
+        partial = path.with_name(path.name + ".part")
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.archive_format == "parquet":
+            self._write_parquet(table, partial)
+        else:
+            with open(partial, "wb") as raw_file, self._compressor(raw_file) as out:
+                self._copy_out(table, out)
+
+        os.replace(partial, path)
+        return path
+
+    def _require(self):
+        """Import the optional package the archive format needs, before anything is detached."""
+        if self.archive_format == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise ImproperlyConfigured("zstd archives require the 'zstandard' package.")
+            return zstandard
+        if self.archive_format == "parquet":
+            try:
+                import pyarrow.parquet
+            except ImportError:
+                raise ImproperlyConfigured("Parquet archives require the 'pyarrow' package.")
+            return pyarrow
+
+    def _compressor(self, raw_file):
+        if self.archive_format == "gzip":
+            return gzip.GzipFile(fileobj=raw_file, mode="wb")
+        return self._require().ZstdCompressor().stream_writer(raw_file)
+
+    def _copy_out(self, table, out):
+        sql = f"COPY (SELECT * FROM {self._qn(table)}) TO STDOUT (FORMAT CSV, HEADER)"
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if is_psycopg3:
+                with raw.copy(sql) as copy:
+                    for data in copy:
+                        out.write(data)
+            else:
+                raw.copy_expert(sql, out)
+
+    def _write_parquet(self, table, path, batch_size=50000):
+        pa = self._require()
+        pq = pa.parquet
+
+        writer = None
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(f"SELECT * FROM {self._qn(table)}")
+            columns = [column.name for column in cursor.description]
+            while rows := cursor.fetchmany(batch_size):
+                batch = pa.Table.from_pylist([dict(zip(columns, row)) for row in rows])
+                if writer is None:
+                    writer = pq.ParquetWriter(path, batch.schema, compression="zstd")
+                writer.write_table(batch.cast(writer.schema))
+        if writer is None:
+            pq.write_table(pa.table({column: [] for column in columns}), path)
+        else:
+            writer.close()
+
+    def drop(self, table):
+        self._execute(f"DROP TABLE {self._qn(table)}")
+
+    def remove(self, table):
+        """Archive (if configured) and drop a detached table."""
+        path = self.archive(table) if self.archive_format else None
+        self.drop(table)
+        logger.info(f"Dropped {table}" + (f", archived to {path}" if path else ""))
+        return path
+
+    def apply(self):
+        """
+        Detach, archive and drop every expired partition, after finishing
+        whatever an interrupted run left detached.
+
+        :return: str status message
+        """
+        self._require()
+
+        removed = []
+        for table in self.leftovers():
+            self.remove(table)
+            removed.append(table)
+
+        for partition in self.expired():
+            self.detach(partition)
+            self.remove(partition)
+            removed.append(partition)
+
+        if not removed:
+            return f"✅ No expired partitions for {self.model.__name__}."
+        return f"✅ Removed {len(removed)} partitions of {self.model.__name__}: {', '.join(removed)}"
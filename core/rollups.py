@@ -0,0 +1,187 @@
+from django.apps import apps
+from django.db import connection
+from django.utils import timezone
+
+from core.catalog import catalog
+
+
+# Aggregates stored per partition; the keys are fields of the rollup model.
+ROLLUP_AGGREGATES = {
+    "total": "COUNT(*)",
+    "completed": "COUNT(*) FILTER (WHERE is_completed)",
+    "overdue": "COUNT(*) FILTER (WHERE NOT is_completed AND deadline < now())",
+    "min_created_at": "MIN(created_at)",
+    "max_created_at": "MAX(created_at)",
+}
+
+
+def forget_rollups(model, partitions):
+    """
+    Drop the rollups of `partitions` (names) after rows were moved into
+    them; aggregates fall back to live queries until the next refresh.
+    """
+    if model.rollup_model:
+        apps.get_model(model.rollup_model).objects.filter(partition__in=partitions).delete()
+
+
+class PartitionRollups:
+    """
+    Per-partition aggregates of a time partitioned model, kept in its
+    `rollup_model` table.
+
+    A partition's rollup is computed once after the partition closes (its
+    range ended); only open partitions are recomputed on each
+    :meth:`refresh`. Rows still reach closed partitions: moves out of the
+    default partition drop the affected rollups (:func:`forget_rollups`),
+    and a final rollup whose partition has been written to since, going by
+    the write counters in `pg_stat_user_tables`, is computed again.
+    Aggregate queries then read one row per partition
+    instead of every row, and only the partially covered partitions at the
+    edges of a window and the default partition are aggregated live.
+
+    `overdue` counts pending rows past their deadline as of `computed_at`,
+    so for closed partitions it is frozen when their rollup becomes final.
+    """
+
+    def __init__(self, model):
+        """
+        :param model: TimePartitionedModel subclass with `rollup_model` set
+        """
+        if not model.rollup_model:
+            raise ValueError(f"{model.__name__} has no rollup_model.")
+        self.model = model
+        self.rollup_model = apps.get_model(model.rollup_model)
+        self.table = model._meta.db_table
+        self.default_table = f"{self.table}_default"
+
+    def aggregate(self, table, start=None, end=None):
+        """Compute the aggregates live over `table`, optionally within [start, end)."""
+        expressions = ", ".join(ROLLUP_AGGREGATES.values())
+        sql = f"SELECT {expressions} FROM {connection.ops.quote_name(table)} WHERE TRUE"
+        params = []
+        if start:
+            sql += " AND created_at >= %s"
+            params.append(start)
+        if end:
+            sql += " AND created_at < %s"
+            params.append(end)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return dict(zip(ROLLUP_AGGREGATES, cursor.fetchone()))
+
+    def writes(self, partitions):
+        """
+        Rows inserted, updated and deleted so far in each partition, summed
+        over its leaves. :return: {partition name: count}
+        """
+        leaves = {leaf: partition.name for partition in partitions for leaf in partition.leaves}
+        writes = dict.fromkeys((partition.name for partition in partitions), 0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables "
+                "WHERE relname = ANY(%s)",
+                [list(leaves)],
+            )
+            for leaf, count in cursor.fetchall():
+                writes[leaves[leaf]] += count
+        return writes
+
+    def refresh(self):
+        """
+        Bring the rollups up to date: compute closed partitions that have no
+        final rollup yet or were written to since, recompute open ones, and
+        forget dropped partitions.
+
+        :return: str status message
+        """
+        now = timezone.now()
+        partitions = catalog.snapshot(self.table).partitions
+        final = dict(
+            self.rollup_model.objects.filter(closed=True).values_list("partition", "writes")
+        )
+        # Read before aggregating, so rows written meanwhile trigger a recompute next time.
+        writes = self.writes(partitions)
+
+        computed = 0
+        for partition in partitions:
+            if final.get(partition.name) == writes[partition.name]:
+                continue
+            closed = partition.range_to <= now
+            values = self.aggregate(partition.name)
+            self.rollup_model.objects.update_or_create(
+                partition=partition.name,
+                defaults={
+                    **values,
+                    "range_from": partition.range_from,
+                    "range_to": partition.range_to,
+                    "closed": closed,
+                    "writes": writes[partition.name],
+                    "computed_at": now,
+                },
+            )
+            computed += 1
+
+        removed, _ = self.rollup_model.objects.exclude(
+            partition__in=[p.name for p in partitions]
+        ).delete()
+
+        return (
+            f"✅ Refreshed {computed} rollups of {self.model.__name__} "
+            f"({len(partitions) - computed} final kept, {removed} removed)."
+        )
+
+    def _combine(self, parts):
+        summary = {
+            "total": sum(part["total"] for part in parts),
+            "completed": sum(part["completed"] for part in parts),
+            "overdue": sum(part["overdue"] for part in parts),
+            "min_created_at": min((p["min_created_at"] for p in parts if p["min_created_at"]), default=None),
+            "max_created_at": max((p["max_created_at"] for p in parts if p["max_created_at"]), default=None),
+        }
+        summary["pending"] = summary["total"] - summary["completed"]
+        return summary
+
+    def _parts(self, start, end):
+        """Yield (partition name, aggregates) covering [start, end), default partition last."""
+        rollups = {
+            rollup.partition: rollup
+            for rollup in self.rollup_model.objects.filter(closed=True)
+        }
+
+        for partition in catalog.snapshot(self.table).partitions:
+            lo = max(partition.range_from, start) if start else partition.range_from
+            hi = min(partition.range_to, end) if end else partition.range_to
+            if lo >= hi:
+                continue
+
+            rollup = rollups.get(partition.name)
+            if rollup and lo == partition.range_from and hi == partition.range_to:
+                yield partition.name, {field: getattr(rollup, field) for field in ROLLUP_AGGREGATES}
+            else:
+                yield partition.name, self.aggregate(partition.name, lo, hi)
+
+        yield self.default_table, self.aggregate(self.default_table, start, end)
+
+    def summary(self, start=None, end=None):
+        """
+        Aggregates for rows with the partition key in [start, end) (unbounded
+        when None), answered from the rollups wherever a partition is fully
+        inside the window and its rollup is final.
+
+        :return: dict with total, completed, pending, overdue, min_created_at, max_created_at
+        """
+        return self._combine([values for _, values in self._parts(start, end)])
+
+    def report(self, start=None, end=None):
+        """
+        Per-partition aggregates over [start, end), e.g. for month-over-month
+        reports; empty partitions are left out.
+
+        :return: list of dicts like :meth:`summary`, with a `partition` key, oldest first
+        """
+        return [
+            {"partition": name, **self._combine([values])}
+            for name, values in self._parts(start, end)
+            if values["total"]
+        ]
@@ -1,16 +1,41 @@
-from datetime import datetime
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
 from dateutil.relativedelta import relativedelta
-from django.db import connection, transaction
+from django.db import DatabaseError, OperationalError, connection, transaction
 from django.utils import timezone
 
 from psqlextra.partitioning import (
-    PostgresPartitioningManager,
     PostgresCurrentTimePartitioningStrategy,
     PostgresTimePartitionSize,
-    PostgresRangePartitioningStrategy,
 )
-from psqlextra.partitioning.range_partition import PostgresRangePartition
-from psqlextra.partitioning.config import PostgresPartitioningConfig
+from psqlextra.partitioning import PostgresTimePartition
+from psqlextra.partitioning.constants import AUTO_PARTITIONED_COMMENT
+
+from core.catalog import catalog
+from core.rollups import forget_rollups
+from core.subpartitions import hash_subpartitioned, missing_subpartitions, subpartition_name, subpartitioning
+
+
+logger = logging.getLogger(__name__)
+
+DDLBatch = namedtuple("DDLBatch", ["number", "partitions", "seconds", "attempts"])
+
+
+def is_lock_timeout(exc):
+    """True when a database error was raised by `lock_timeout` (SQLSTATE 55P03)."""
+    cause = exc.__cause__
+    return (getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)) == "55P03"
+
+
+def is_already_created(exc):
+    """
+    True when creating a partition failed because a table of that name
+    (42P07) or a partition overlapping its range (42P17) already exists.
+    """
+    cause = exc.__cause__
+    return (getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)) in ("42P07", "42P17")
 
 
 class PartitioningService:
@@ -18,15 +43,17 @@ class PartitioningService:
     Service to manage PostgreSQL table partitions using django-postgres-extra.
     """
 
-    def __init__(self, model, partition_size="month", extra_future=12):
+    def __init__(self, model, partition_size="month", extra_future=12, batch_size=10000):
         """
         :param model: Django model subclassing PostgresPartitionedModel
         :param partition_size: "month" | "year" | "day"
         :param extra_future: how many future periods to create beyond max timestamp
+        :param batch_size: rows moved per chunk (and per commit) out of the default partition
         """
         self.model = model
         self.partition_size = partition_size
         self.extra_future = extra_future
+        self.batch_size = batch_size
         self.default_table = f"{model._meta.db_table}_default"
 
     def _get_partition_size(self):
@@ -71,40 +98,214 @@ class PartitioningService:
         else:  # month
             count = delta.years * 12 + delta.months + self.extra_future
 
-        config = PostgresPartitioningConfig(
-            model=self.model,
-            strategy=PostgresCurrentTimePartitioningStrategy(
-                size=self._get_partition_size(),
-                count=count,
-                max_age=None,
-                name_format=None
-            ),
+        strategy = PostgresCurrentTimePartitioningStrategy(
+            size=self._get_partition_size(),
+            count=count,
+            max_age=None,
+            name_format=None
         )
 
-        manager = PostgresPartitioningManager([config])
-        manager.sync()
+        # One catalog snapshot serves the whole diff, instead of the
+        # partitioning manager introspecting every partition.
+        for _ in self.apply_partitions(self._unplanned(strategy.to_create())):
+            pass
 
         return f"✅ Synced partitions for {self.model.__name__} ({self.partition_size})."
 
-    def move_default_data(self):
-        """Move rows from default partition → correct partitions."""
-        with connection.cursor() as cursor:
-            cursor.execute(f"SELECT * FROM {self.default_table}")
-            rows = cursor.fetchall()
+    def get_partitions(self):
+        """
+        List the range partitions currently attached to the model's table.
 
-        if not rows:
-            return "✅ No rows in default partition."
+        :return: list of (table_name, range_from, range_to) ordered by range_from;
+                 the default partition is not included
+        """
+        return catalog.snapshot(self.model._meta.db_table).bounds()
+
+    def _unplanned(self, partitions):
+        """Keep the PostgresTimePartitions that overlap no existing partition."""
+        snapshot = catalog.snapshot(self.model._meta.db_table)
+        return [
+            partition
+            for partition in partitions
+            if not snapshot.overlapping(
+                datetime.fromisoformat(partition.from_values).replace(tzinfo=dt_timezone.utc),
+                datetime.fromisoformat(partition.to_values).replace(tzinfo=dt_timezone.utc),
+            )
+        ]
+
+    def _not_created(self, partitions, exc):
+        """
+        After creating `partitions` failed with `exc`, keep the ones still
+        missing from a fresh catalog snapshot. The cached snapshot of this
+        process can predate partitions another process (web, Celery worker)
+        created since.
+
+        :return: list of PostgresTimePartition, or None when `exc` is not
+                 explained by partitions created meanwhile
+        """
+        if not is_already_created(exc):
+            return None
+        catalog.invalidate(self.model._meta.db_table)
+        remaining = self._unplanned(partitions)
+        if len(remaining) == len(partitions):
+            return None
+        logger.info(f"Skipping {len(partitions) - len(remaining)} partitions of {self.model.__name__} created meanwhile")
+        return remaining
+
+    def _create_partitions(self, partitions):
+        """
+        Create `partitions` in one transaction and drop the stale catalog
+        snapshot. Partitions created meanwhile by another process are skipped.
+
+        :return: the partitions created
+        """
+        while partitions:
+            try:
+                with transaction.atomic():
+                    with connection.schema_editor() as schema_editor:
+                        for partition in hash_subpartitioned(self.model, partitions):
+                            partition.create(self.model, schema_editor, comment=AUTO_PARTITIONED_COMMENT)
+                    catalog.invalidate(self.model._meta.db_table)
+                break
+            except DatabaseError as exc:
+                remaining = self._not_created(partitions, exc)
+                if remaining is None:
+                    raise
+                partitions = remaining
+        return partitions
+
+    def partition_ddl(self, partitions):
+        """
+        Render the DDL creating `partitions` without running it. Current and
+        future periods of a model declaring sub-partitioning are created with
+        their hash sub-partitions, see core.subpartitions.
 
-        # Map rows into model instances
-        objs = [self.model(**dict(zip([f.name for f in self.model._meta.fields], row))) for row in rows]
+        :return: list of SQL statements per partition, in order
+        """
+        ddl = []
+        with connection.schema_editor(collect_sql=True, atomic=False) as schema_editor:
+            for partition in hash_subpartitioned(self.model, partitions):
+                first = len(schema_editor.collected_sql)
+                partition.create(self.model, schema_editor, comment=AUTO_PARTITIONED_COMMENT)
+                ddl.append(schema_editor.collected_sql[first:])
+        return ddl
+
+    def apply_partitions(self, partitions, ddl_batch_size=100, lock_timeout="5s", retries=3, retry_delay=1.0):
+        """
+        Create `partitions` in batches: each batch is one transaction and one
+        round trip, so the parent table's lock is taken once per batch rather
+        than once per partition. A batch that hits `lock_timeout` is rolled
+        back and retried with a growing delay, so it never queues behind a
+        long-running query for long. A batch that fails because another
+        process created some of its partitions meanwhile is retried without
+        them.
+
+        :param ddl_batch_size: partitions created per transaction
+        :param lock_timeout: how long each batch may wait for its locks
+        :param retries: extra attempts for a batch after a lock timeout
+        :param retry_delay: seconds slept before the first retry (grows linearly)
+        :return: iterator of DDLBatch, one per committed batch
+        """
+        for number, first in enumerate(range(0, len(partitions), ddl_batch_size), 1):
+            batch = partitions[first:first + ddl_batch_size]
+
+            attempt = 0
+            while batch:
+                attempt += 1
+                started = time.monotonic()
+                sql = "\n".join(statement for statements in self.partition_ddl(batch) for statement in statements)
+                try:
+                    with transaction.atomic(), connection.cursor() as cursor:
+                        cursor.execute("SELECT set_config('lock_timeout', %s, true)", [lock_timeout])
+                        cursor.execute(sql)
+                    break
+                except OperationalError as exc:
+                    if not is_lock_timeout(exc) or attempt > retries:
+                        raise
+                    time.sleep(retry_delay * attempt)
+                except DatabaseError as exc:
+                    remaining = self._not_created(batch, exc)
+                    if remaining is None:
+                        raise
+                    batch = remaining
+
+            catalog.invalidate(self.model._meta.db_table)
+            if batch:
+                yield DDLBatch(number, len(batch), time.monotonic() - started, attempt)
+
+    def _move_chunk(self, partition_table, range_from, range_to, last_key, source=None):
+        """
+        Move one keyset-paginated chunk of rows from the default partition
+        (or `source`) into `partition_table`, entirely inside Postgres.
+
+        :return: (moved_count, last_key) where last_key is None once the range is drained
+        """
+        qn = connection.ops.quote_name
+        source = source or self.default_table
+        columns = ", ".join(
+            qn(f.column) for f in self.model._meta.concrete_fields if not f.generated
+        )
+        pk = qn(self.model._meta.pk.column)
+
+        sql = f"""
+            WITH batch AS (
+                SELECT created_at, {pk} AS pk
+                FROM {qn(source)}
+                WHERE created_at >= %s AND created_at < %s
+                  AND (created_at, {pk}) > (%s, %s)
+                ORDER BY created_at, {pk}
+                LIMIT %s
+            ), moved AS (
+                DELETE FROM {qn(source)} AS d
+                USING batch
+                WHERE d.created_at = batch.created_at AND d.{pk} = batch.pk
+                RETURNING d.*
+            ), inserted AS (
+                INSERT INTO {qn(partition_table)} ({columns})
+                SELECT {columns} FROM moved
+                ON CONFLICT DO NOTHING
+            )
+            SELECT (SELECT COUNT(*) FROM moved), created_at, pk
+            FROM batch
+            ORDER BY created_at DESC, pk DESC
+            LIMIT 1
+        """
 
         with transaction.atomic():
-            self.model.objects.bulk_create(objs, ignore_conflicts=True)
             with connection.cursor() as cursor:
-                cursor.execute(f"DELETE FROM {self.default_table}")
+                cursor.execute(sql, [range_from, range_to, *last_key, self.batch_size])
+                row = cursor.fetchone()
+
+        if not row:
+            return 0, None
+        moved, last_created_at, last_pk = row
+        return moved, (last_created_at, last_pk)
+
+    def move_default_data(self):
+        """
+        Move rows from default partition → correct partitions.
+
+        Works per target partition with `DELETE ... RETURNING` feeding an
+        `INSERT ... SELECT`, so rows never leave Postgres. Each partition's
+        range is walked in keyset order on (created_at, pk) in chunks of
+        `batch_size` rows, and every chunk commits on its own: memory stays
+        flat and row locks are held for one chunk at a time.
+        """
+        total, filled = 0, []
+        for partition_table, range_from, range_to in self.get_partitions():
+            last_key = (range_from, 0)
+            while last_key:
+                moved, last_key = self._move_chunk(partition_table, range_from, range_to, last_key)
+                total += moved
+                if moved and partition_table not in filled:
+                    filled.append(partition_table)
+        forget_rollups(self.model, filled)
+
+        if not total:
+            return "✅ No rows in default partition."
+
+        return f"✅ Moved {total} rows into partitions."
 
-        return f"✅ Moved {len(objs)} rows into partitions."
-    
     def _generate_boundaries(self, start_date: datetime, end_date: datetime):
         """Generate boundaries for partitions between start_date and end_date."""
         boundaries = []
@@ -129,13 +330,26 @@ class PartitioningService:
 
         return boundaries
     
-    def ensure_partitions_between(self, partition_by, start_date: datetime, end_date: datetime):
+    def ensure_partitions_between(
+        self,
+        partition_by,
+        start_date: datetime,
+        end_date: datetime,
+        ddl_batch_size=100,
+        lock_timeout="5s",
+        retries=3,
+        dry_run=False,
+    ):
         """
         Ensure partitions exist between start_date and end_date.
         Creates them if missing, keeps existing ones.
 
         :param start_date: datetime (aligned to start of period ideally)
         :param end_date: datetime (inclusive range)
+        :param ddl_batch_size: partitions created per transaction, see :meth:`apply_partitions`
+        :param lock_timeout: how long each batch may wait for its locks
+        :param retries: extra attempts for a batch after a lock timeout
+        :param dry_run: only return the SQL that would run
         :return: str status message
         """
         if start_date > end_date:
@@ -150,28 +364,257 @@ class PartitioningService:
         else:  # month
             count = delta.years * 12 + delta.months + 1
 
-        boundaries = self._generate_boundaries(start_date, end_date)
+        missing = self._missing_partitions(start_date, end_date)
+
+        if dry_run:
+            return "\n".join(
+                statement for statements in self.partition_ddl(missing) for statement in statements
+            ) or "✅ Nothing to create."
+
+        batches = list(self.apply_partitions(missing, ddl_batch_size, lock_timeout, retries))
+        lines = [
+            f"Batch {batch.number}: {batch.partitions} partitions in {batch.seconds:.2f}s"
+            + (f" ({batch.attempts} attempts)" if batch.attempts > 1 else "")
+            for batch in batches
+        ]
 
-        # Define config
-        config = PostgresPartitioningConfig(
-            model=self.model,
-            strategy=PostgresRangePartitioningStrategy(
-                key=partition_by,  # your partition key
-                boundaries=boundaries
-            ),
+        lines.append(
+            f"✅ Ensured partitions for {self.model.__name__} "
+            f"from {start_date.date()} to {end_date.date()} ({self.partition_size}, {count} partitions, "
+            f"{sum(batch.partitions for batch in batches)} created)."
+        )
+        return "\n".join(lines)
+
+    def _partitions_between(self, start: datetime, end: datetime):
+        """
+        Build the partitions of `partition_size` covering start..end (inclusive).
+
+        :return: list of PostgresTimePartition, oldest first
+        """
+        size = self._get_partition_size()
+
+        partitions = []
+        current = size.start(start)
+        while current <= end.replace(tzinfo=None):
+            partition = PostgresTimePartition(size=size, start_datetime=current)
+            partitions.append(partition)
+            current = partition.end_datetime
+        return partitions
+
+    def _missing_partitions(self, start: datetime, end: datetime):
+        """
+        Build the partitions of `partition_size` covering start..end (inclusive)
+        that do not overlap any partition already attached to the table.
+
+        :return: list of PostgresTimePartition, oldest first
+        """
+        return self._unplanned(self._partitions_between(start, end))
+
+    def _default_check_sql(self):
+        """
+        Build a CHECK expression excluding every range covered by a partition,
+        i.e. the default partition's own partition constraint. Adjacent ranges
+        are coalesced to keep the expression short.
+        """
+        ranges = []
+        for _, range_from, range_to in self.get_partitions():
+            if ranges and ranges[-1][1] == range_from:
+                ranges[-1][1] = range_to
+            else:
+                ranges.append([range_from, range_to])
+
+        if not ranges:
+            return None, []
+
+        clauses = " OR ".join("(created_at >= %s AND created_at < %s)" for _ in ranges)
+        return f"NOT ({clauses})", [value for pair in ranges for value in pair]
+
+    def repair_detached(self, lock_timeout="5s"):
+        """
+        Repair an overloaded default partition without scanning it under lock.
+
+        1. Detach `<table>_default` (metadata only).
+        2. Create the missing range partitions; with no default attached,
+           Postgres has nothing to scan.
+        3. Bulk-move the overlapping rows out of the detached table.
+        4. Add a CHECK constraint matching the default's partition constraint,
+           so `ATTACH PARTITION` skips its validation scan, and reattach.
+
+        While the default is detached, inserts for ranges without a partition
+        fail, so keep the move (step 3) short by running this before the
+        default grows too large. When a step after the detach fails, the
+        default is reattached if its rows allow it; otherwise it stays
+        detached and the next run, finding it so, resumes from step 2.
+
+        :param lock_timeout: how long the DDL statements may wait for locks
+        :return: str status message
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relispartition FROM pg_class WHERE oid = %s::regclass", [self.default_table])
+            attached = cursor.fetchone()[0]
+
+        start, end = self._get_time_range()
+        if not end:
+            if not attached:
+                self._reattach_default(lock_timeout)
+            return "✅ No data in default partition."
+
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        default_table = qn(self.default_table)
+        constraint = qn(f"{self.default_table}_check")
+
+        partitions = self._missing_partitions(start, end)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT set_config('lock_timeout', %s, true)", [lock_timeout])
+                if attached:
+                    cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {default_table}")
+            self._create_partitions(partitions)
+
+        try:
+            move_msg = self.move_default_data()
+
+            check_sql, params = self._default_check_sql()
+            with connection.cursor() as cursor:
+                # Left behind by an interrupted run, and its ranges may be out of date.
+                cursor.execute(f"ALTER TABLE {default_table} DROP CONSTRAINT IF EXISTS {constraint}")
+                if check_sql:
+                    # The default is detached, so validating only scans (and locks) itself.
+                    cursor.execute(connection.ops.compose_sql(
+                        f"ALTER TABLE {default_table} ADD CONSTRAINT {constraint} CHECK ({check_sql}) NOT VALID",
+                        params,
+                    ))
+                    cursor.execute(f"ALTER TABLE {default_table} VALIDATE CONSTRAINT {constraint}")
+        except Exception:
+            try:
+                self._reattach_default(lock_timeout)
+            except DatabaseError as exc:
+                # Rows of the new partitions' ranges are still in the default.
+                logger.error(f"{self.default_table} left detached ({exc}); the next run resumes the repair")
+            raise
+        self._reattach_default(lock_timeout)
+
+        return (
+            f"✅ Created {len(partitions)} partitions for {self.model.__name__} "
+            f"with {self.default_table} detached.\n{move_msg}"
         )
 
-        # Sync partitions
-        manager = PostgresPartitioningManager([config])
-        manager.plan().apply()
+    def _reattach_default(self, lock_timeout="5s", retries=3):
+        """Attach the default partition back and drop its temporary CHECK, retried on lock timeouts."""
+        qn = connection.ops.quote_name
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT set_config('lock_timeout', %s, true)", [lock_timeout])
+                        cursor.execute(
+                            f"ALTER TABLE {qn(self.model._meta.db_table)} "
+                            f"ATTACH PARTITION {qn(self.default_table)} DEFAULT"
+                        )
+                        cursor.execute(
+                            f"ALTER TABLE {qn(self.default_table)} "
+                            f"DROP CONSTRAINT IF EXISTS {qn(f'{self.default_table}_check')}"
+                        )
+                    catalog.invalidate(self.model._meta.db_table)
+                return
+            except OperationalError as exc:
+                if not is_lock_timeout(exc) or attempt > retries:
+                    raise
+                time.sleep(attempt)
 
+    def _plain_future_partitions(self):
+        """Empty partitions of future periods created before sub-partitioning was declared."""
+        size = self._get_partition_size()
+        now = timezone.now()
+        found = []
+        for partition in catalog.snapshot(self.model._meta.db_table).partitions:
+            if partition.range_from <= now or partition.leaves != [partition.name]:
+                continue
+            planned = PostgresTimePartition(size=size, start_datetime=partition.range_from.replace(tzinfo=None))
+            if planned.end_datetime != partition.range_to.replace(tzinfo=None):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {connection.ops.quote_name(partition.name)})")
+                if not cursor.fetchone()[0]:
+                    found.append((partition.name, planned))
+        return found
+
+    def repair_subpartitions(self, lock_timeout="5s"):
+        """
+        Maintain the second partitioning level of a model declaring one:
+        create hash sub-partitions missing from its sub-partitioned range
+        partitions (e.g. after one was dropped by hand), and recreate empty
+        plain partitions of future periods as sub-partitioned ones.
+
+        :param lock_timeout: how long the DDL may wait for locks
+        :return: str status message
+        """
+        if not subpartitioning(self.model):
+            return "✅ No sub-partitioning declared."
+
+        qn = connection.ops.quote_name
+        table = self.model._meta.db_table
+        # Candidates are picked from a fresh snapshot, then checked again under lock below.
+        catalog.invalidate(table)
+        missing = missing_subpartitions(self.model)
+        plain = self._plain_future_partitions()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT set_config('lock_timeout', %s, true)", [lock_timeout])
+                for partition, remainder, modulus in missing:
+                    cursor.execute(
+                        f"CREATE TABLE {qn(subpartition_name(partition, remainder))} PARTITION OF {qn(partition)} "
+                        f"FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder})"
+                    )
+                emptied = []
+                for name, planned in plain:
+                    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+                    if not cursor.fetchone()[0]:
+                        continue
+                    # Checked again under the lock: rows may have arrived since the first look,
+                    # and the partition may have been detached or sub-partitioned meanwhile.
+                    cursor.execute(f"LOCK TABLE {qn(name)} IN ACCESS EXCLUSIVE MODE")
+                    cursor.execute(
+                        f"""
+                        SELECT EXISTS (
+                            SELECT 1 FROM pg_inherits JOIN pg_class child ON child.oid = inhrelid
+                            WHERE inhrelid = %s::regclass AND inhparent = %s::regclass AND child.relkind = 'r'
+                        ) AND NOT EXISTS (SELECT 1 FROM {qn(name)})
+                        """,
+                        [name, table],
+                    )
+                    if not cursor.fetchone()[0]:
+                        continue
+                    cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+                    cursor.execute(f"DROP TABLE {qn(name)}")
+                    emptied.append(planned)
+            self._create_partitions(emptied)
+
+        if not missing and not emptied:
+            return "✅ Sub-partitions complete."
         return (
-            f"✅ Ensured partitions for {self.model.__name__} "
-            f"from {start_date.date()} to {end_date.date()} ({self.partition_size}, {count} partitions)."
+            f"✅ Created {len(missing)} missing sub-partitions, "
+            f"sub-partitioned {len(emptied)} empty future partitions."
         )
 
-    def ensure_and_repair(self):
-        """High-level operation: sync partitions & repair default."""
+    def ensure_and_repair(self, mode="sync"):
+        """
+        High-level operation: sync partitions & repair default.
+
+        :param mode: "sync" creates the partitions missing from the catalog
+                     snapshot with :meth:`apply_partitions`, which makes Postgres
+                     scan the default partition for every new range; "detach"
+                     uses :meth:`repair_detached` instead
+        """
+        if mode == "detach":
+            return f"{self.repair_detached()}\n{self.repair_subpartitions()}"
+
         sync_msg = self.sync_partitions()
+        sub_msg = self.repair_subpartitions()
         move_msg = self.move_default_data()
-        return f"{sync_msg}\n{move_msg}"
+        return f"{sync_msg}\n{sub_msg}\n{move_msg}"
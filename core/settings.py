@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'debug_toolbar',
     'psqlextra', # For PostgreSQL partitioning support
     'todo',
@@ -78,6 +79,8 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+
 DATABASES = {
     "default": {
         "ENGINE": config("ENGINE", "psqlextra.backend"),
@@ -86,11 +89,85 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD"),
         "HOST": config("HOST"),
         "PORT": config("DATABASE_PORT"),
+        # Keep connections (and their prepared statements) across requests;
+        # Django's pool requires 0, it manages connection reuse itself.
+        "CONN_MAX_AGE": 0 if DB_POOL else config("CONN_MAX_AGE", default=60, cast=int),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
     }
 }
 
+# psycopg3 connection pool. Under ASGI each async ORM call runs on a
+# request-scoped worker thread; pooled connections are handed back at the end
+# of the request instead of being opened and torn down per request.
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+        "max_size": config("DB_POOL_MAX_SIZE", default=20, cast=int),
+        "timeout": config("DB_POOL_TIMEOUT", default=10, cast=int),
+    }
+
+# Server-side parameter binding; psycopg then prepares a statement once it has
+# run DB_PREPARE_THRESHOLD times on a connection. Not compatible with
+# transaction-mode PgBouncer. See the README on generic plans and pruning.
+# Postgres cannot bind parameters into DDL, so raw-cursor DDL with values
+# composes them client-side with connection.ops.compose_sql().
+if config("DB_SERVER_SIDE_BINDING", default=False, cast=bool):
+    DATABASES["default"]["OPTIONS"]["server_side_binding"] = True
+    DATABASES["default"]["OPTIONS"]["prepare_threshold"] = config("DB_PREPARE_THRESHOLD", default=5, cast=int)
+
+# "auto" (Postgres default), "force_custom_plan" or "force_generic_plan"
+DB_PLAN_CACHE_MODE = config("DB_PLAN_CACHE_MODE", default="")
+if DB_PLAN_CACHE_MODE:
+    DATABASES["default"]["OPTIONS"]["options"] = f"-c plan_cache_mode={DB_PLAN_CACHE_MODE}"
+
 PSQLEXTRA_PARTITIONING_MANAGER = 'todo.partitioning.manager'
 
+# Number of most recent partitions the todo list shows when no date filter is set
+TODO_LIST_DEFAULT_PARTITIONS = config("TODO_LIST_DEFAULT_PARTITIONS", default=3, cast=int)
+
+# Filtered list counts (search, status) are exact up to this many rows in the
+# date window, and a selectivity-scaled estimate above it (see core.counting)
+PARTITION_COUNT_EXACT_LIMIT = config("PARTITION_COUNT_EXACT_LIMIT", default=10000, cast=int)
+
+# Seconds an exact row count of a closed partition stays cached; the key
+# changes whenever rows are inserted into or deleted from the partition
+PARTITION_COUNT_CACHE_TIMEOUT = config("PARTITION_COUNT_CACHE_TIMEOUT", default=86400, cast=int)
+
+# Seconds a cached partition catalog snapshot stays fresh (see core.catalog);
+# DDL run through the services invalidates it immediately
+PARTITION_CATALOG_TTL = config("PARTITION_CATALOG_TTL", default=60, cast=int)
+
+# Where the retention job writes archives of dropped partitions (see core.retention)
+PARTITION_ARCHIVE_DIR = config("PARTITION_ARCHIVE_DIR", default=str(BASE_DIR / "archive"))
+
+# Tablespace closed partitions are moved to (see todo.partitioning.tiering); unset keeps them in place
+PARTITION_COLD_TABLESPACE = config("PARTITION_COLD_TABLESPACE", default=None)
+
+# Concurrent per-partition queries (and connections) used by `objects.fanout()`, see core.fanout
+FANOUT_WORKERS = config("FANOUT_WORKERS", default=4, cast=int)
+
+# Fraction of queries on partitioned tables re-run under EXPLAIN ANALYZE for
+# per-partition scan metrics, and the latency (ms) above which a query is
+# EXPLAINed and logged as slow (0 disables); see core.instrumentation
+QUERY_SAMPLE_RATE = config("QUERY_SAMPLE_RATE", default=0.0, cast=float)
+QUERY_SLOW_MS = config("QUERY_SLOW_MS", default=500, cast=int) or None
+
+# Cache shared by the web and Celery worker processes: ingest samples (core.provisioning)
+# and default partition checks (core.monitoring) are compared across runs, so a
+# per-process backend (LocMemCache) never sees the previous one. The database backend
+# needs `python manage.py createcachetable`; for Redis set
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://localhost:6379/1
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": config("CACHE_LOCATION", default="django_cache"),
+    }
+}
+
+# Celery (see core/celery.py for the beat schedule)
+CELERY_BROKER_URL = config("CELERY_BROKER_URL", default="redis://localhost:6379/0")
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
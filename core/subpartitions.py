@@ -0,0 +1,132 @@
+import re
+from datetime import timezone as dt_timezone
+
+from django.db import connection
+from django.utils import timezone
+from psqlextra.partitioning import PostgresCurrentTimePartitioningStrategy, PostgresTimePartition
+
+# Hash bound of a sub-partition: "FOR VALUES WITH (modulus 4, remainder 1)".
+HASH_BOUND = re.compile(r"modulus (\d+), remainder (\d+)")
+
+# Every hash sub-partitioned range partition of a table, with the bounds of
+# its sub-partitions.
+SUBPARTITIONED_SQL = """
+    SELECT child.relname,
+           array_agg(pg_get_expr(leaf.relpartbound, leaf.oid)) FILTER (WHERE leaf.oid IS NOT NULL)
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    LEFT JOIN pg_inherits sub ON sub.inhparent = child.oid
+    LEFT JOIN pg_class leaf ON leaf.oid = sub.inhrelid
+    WHERE pg_inherits.inhparent = %s::regclass AND child.relkind = 'p'
+    GROUP BY child.relname, child.oid
+"""
+
+
+def subpartitioning(model):
+    """
+    Second partitioning level declared in the model's `PartitioningMeta`
+    (`subpartition_key` and `subpartition_count`).
+
+    :return: (key, count) or None
+    """
+    meta = getattr(model, "PartitioningMeta", None)
+    key = getattr(meta, "subpartition_key", None)
+    if not key:
+        return None
+    return key, getattr(meta, "subpartition_count", 4)
+
+
+def subpartition_name(table, remainder):
+    return f"{table}_h{remainder}"
+
+
+class HashSubPartitionedTimePartition(PostgresTimePartition):
+    """
+    Time range partition that is itself HASH partitioned on `key` into
+    `count` sub-partitions (`<partition>_h0` .. `<partition>_h<count-1>`).
+
+    Inserts for the period then spread over `count` heaps and index sets
+    instead of one, and each sub-partition is vacuumed on its own. The
+    partitioned indexes of the parent cascade to every sub-partition.
+    """
+
+    def __init__(self, size, start_datetime, key, count, name_format=None):
+        super().__init__(size=size, start_datetime=start_datetime, name_format=name_format)
+        self.key = key
+        self.count = count
+
+    def create(self, model, schema_editor, comment=None):
+        qn = schema_editor.quote_name
+        table = schema_editor.create_partition_table_name(model, self.name())
+        schema_editor.execute(
+            f"CREATE TABLE {qn(table)} PARTITION OF {qn(model._meta.db_table)} "
+            f"FOR VALUES FROM (%s) TO (%s) PARTITION BY HASH ({qn(self.key)})",
+            (self.from_values, self.to_values),
+        )
+        for remainder in range(self.count):
+            schema_editor.execute(
+                f"CREATE TABLE {qn(subpartition_name(table, remainder))} PARTITION OF {qn(table)} "
+                f"FOR VALUES WITH (MODULUS {self.count}, REMAINDER {remainder})"
+            )
+        if comment:
+            schema_editor.set_comment_on_table(table, comment)
+
+    def deconstruct(self):
+        return {**super().deconstruct(), "subpartition_key": self.key, "subpartition_count": self.count}
+
+
+def hash_subpartitioned(model, partitions, now=None):
+    """
+    Replace the partitions of `model` that are hot (their range has not
+    ended yet) with HashSubPartitionedTimePartitions, if the model declares
+    sub-partitioning. Closed periods stay plain range partitions.
+
+    :param partitions: PostgresTimePartitions
+    :return: list of partitions, same order
+    """
+    declared = subpartitioning(model)
+    if not declared:
+        return list(partitions)
+    now = (now or timezone.now()).astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return [
+        HashSubPartitionedTimePartition(partition.size, partition.start_datetime, *declared, partition.name_format)
+        if type(partition) is PostgresTimePartition and partition.end_datetime.replace(tzinfo=None) > now
+        else partition
+        for partition in partitions
+    ]
+
+
+def missing_subpartitions(model):
+    """
+    Hash sub-partitions that a sub-partitioned range partition of `model`
+    lacks; without them, inserts hashing to the missing remainder fail.
+
+    :return: list of (partition, remainder, modulus)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(SUBPARTITIONED_SQL, [model._meta.db_table])
+        rows = cursor.fetchall()
+
+    declared = subpartitioning(model)
+    missing = []
+    for partition, bounds in rows:
+        found = [tuple(map(int, HASH_BOUND.search(bound).groups())) for bound in bounds or []]
+        modulus = found[0][0] if found else declared[1] if declared else 1
+        present = {remainder for _, remainder in found}
+        missing.extend((partition, remainder, modulus) for remainder in range(modulus) if remainder not in present)
+    return missing
+
+
+class SubPartitionedTimePartitioningStrategy(PostgresCurrentTimePartitioningStrategy):
+    """
+    PostgresCurrentTimePartitioningStrategy for the partitioning manager
+    that creates the partitions of a model declaring sub-partitioning as
+    hash sub-partitioned ones.
+    """
+
+    def __init__(self, model, size, count, max_age=None, name_format=None):
+        super().__init__(size=size, count=count, max_age=max_age, name_format=name_format)
+        self.model = model
+
+    def to_create(self):
+        return hash_subpartitioned(self.model, super().to_create())
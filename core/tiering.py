@@ -0,0 +1,240 @@
+import logging
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from core.catalog import catalog
+from core.indexes import PartitionIndexPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionTiering:
+    """
+    Turn closed partitions into compact, read-only "cold" storage.
+
+    A partition whose range ended more than `min_age` ago is never written
+    again, so it can be:
+
+    1. stripped of local indexes (created on the partition itself rather
+       than inherited from the parent; Postgres does not allow dropping
+       inherited ones per partition), including the model's
+       `hot_partition_indexes`;
+    2. rewritten in `created_at` order (CLUSTER on a created_at index, or
+       VACUUM FULL when there is none) with fillfactor 100, dropping bloat;
+    3. moved, with its indexes, to the cold `tablespace`, which copies the
+       already compacted files instead of rewriting the rows a second time;
+    4. given the model's `cold_partition_indexes`, built once the rows are
+       in created_at order, so a BRIN index there has tight page ranges;
+    5. frozen and analyzed, so autovacuum has nothing left to do there.
+
+    Every step only locks the partition being tiered. The explicit
+    `fillfactor=100` reloption, kept only once the rewrite and the move
+    succeeded, marks a partition as rewritten; it is done when it also has
+    every one of the `cold_partition_indexes`. A rewritten partition missing
+    one (tiered before they were declared, or their build failed) only gets
+    those built on the next run. A hash sub-partitioned partition is tiered
+    one sub-partition at a time. Partitions not old enough yet get the
+    `hot_partition_indexes` they lack, built CONCURRENTLY, see
+    core.indexes.PartitionIndexPolicy.
+    """
+
+    def __init__(self, model, min_age, tablespace=None, cluster=True, drop_local_indexes=False, freeze=True):
+        """
+        :param model: partitioned Django model
+        :param min_age: relativedelta; partitions ending before now - min_age are tiered
+        :param tablespace: cold tablespace name (None keeps partitions where they are)
+        :param cluster: rewrite partitions in created_at order
+        :param drop_local_indexes: drop non-unique indexes created on the partition itself
+        :param freeze: run VACUUM (FREEZE, ANALYZE) afterwards
+        """
+        self.model = model
+        self.min_age = min_age
+        self.tablespace = tablespace
+        self.cluster = cluster
+        self.drop_local_indexes = drop_local_indexes
+        self.freeze = freeze
+        self.table = model._meta.db_table
+        self.indexes = PartitionIndexPolicy(model)
+
+    def _qn(self, name):
+        return connection.ops.quote_name(name)
+
+    def _execute(self, sql, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall() if cursor.description else None
+
+    def _rewritten(self, leaves):
+        """:return: the leaves marked with the explicit fillfactor=100 of a completed rewrite"""
+        return {
+            name
+            for (name,) in self._execute(
+                "SELECT relname FROM pg_class WHERE relname = ANY(%s) AND reloptions @> '{fillfactor=100}'",
+                [list(leaves)],
+            )
+        }
+
+    def _cold_indexed(self, leaves):
+        """:return: the leaves that have a valid index for every one of `cold_partition_indexes`"""
+        if not self.indexes.cold:
+            return set(leaves)
+        valid = {
+            name
+            for (name,) in self._execute(
+                "SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+                "WHERE i.relname = ANY(%s) AND x.indisvalid",
+                [[self.indexes.index_name(index, leaf) for leaf in leaves for index in self.indexes.cold]],
+            )
+        }
+        return {
+            leaf for leaf in leaves
+            if all(self.indexes.index_name(index, leaf) in valid for index in self.indexes.cold)
+        }
+
+    def candidates(self):
+        """
+        :return: names of closed partitions old enough and not tiered yet, or
+                 lacking a declared cold index, oldest first
+        """
+        cutoff = timezone.now() - self.min_age
+        partitions = [p for p in catalog.snapshot(self.table).partitions if p.range_to <= cutoff]
+        if not partitions:
+            return []
+        leaves = [leaf for p in partitions for leaf in p.leaves]
+        done = self._rewritten(leaves) & self._cold_indexed(leaves)
+        return [p.name for p in partitions if not done.issuperset(p.leaves)]
+
+    def hot_leaves(self):
+        """:return: tables of the partitions not old enough to be tiered (their sub-partitions if any)"""
+        cutoff = timezone.now() - self.min_age
+        return [leaf for p in catalog.snapshot(self.table).partitions if p.range_to > cutoff for leaf in p.leaves]
+
+    def index_hot(self):
+        """Build missing `hot_partition_indexes` CONCURRENTLY. :return: names of the indexes created"""
+        if not self.indexes.hot:
+            return []
+        return [name for leaf in self.hot_leaves() for name in self.indexes.create(leaf, self.indexes.hot)]
+
+    def _cluster_index(self, partition):
+        rows = self._execute(
+            """
+            SELECT i.relname
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            JOIN pg_am am ON am.oid = i.relam
+            JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = x.indkey[0]
+            WHERE x.indrelid = %s::regclass AND a.attname = 'created_at' AND am.amname = 'btree'
+            ORDER BY x.indnatts
+            LIMIT 1
+            """,
+            [partition],
+        )
+        return rows[0][0] if rows else None
+
+    def local_indexes(self, partition):
+        """:return: non-unique indexes of `partition` that are not attached to a parent index"""
+        return [
+            name
+            for (name,) in self._execute(
+                """
+                SELECT i.relname
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                WHERE x.indrelid = %s::regclass AND NOT x.indisunique
+                  AND NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = x.indexrelid)
+                """,
+                [partition],
+            )
+        ]
+
+    def _check_tablespace(self):
+        if self.tablespace and not self._execute(
+            "SELECT 1 FROM pg_tablespace WHERE spcname = %s", [self.tablespace]
+        ):
+            raise ImproperlyConfigured(f"Tablespace {self.tablespace!r} does not exist.")
+
+    def tier(self, partition):
+        """
+        Run the tiering steps on one partition, or on each of its hash
+        sub-partitions when it has them. :return: seconds taken
+        """
+        started = time.monotonic()
+        snapshot = catalog.snapshot(self.table)
+        leaves = next((p.leaves for p in snapshot.partitions if p.name == partition), [partition])
+        rewritten = self._rewritten(leaves)
+        for leaf in leaves:
+            if leaf in rewritten:
+                # Tiered before its cold indexes were declared, or their build failed.
+                self._index_cold(leaf)
+            else:
+                self._tier_table(leaf)
+        return time.monotonic() - started
+
+    def _index_cold(self, partition):
+        # Nothing writes here any more, so a plain build's write lock costs nothing.
+        for index in self.indexes.create(partition, self.indexes.cold, concurrently=False):
+            if self.tablespace:
+                self._execute(f"ALTER INDEX {self._qn(index)} SET TABLESPACE {self._qn(self.tablespace)}")
+
+    def _tier_table(self, partition):
+        qn = self._qn
+
+        self.indexes.drop(partition, self.indexes.hot, concurrently=False)
+        if self.drop_local_indexes:
+            for index in self.local_indexes(partition):
+                self._execute(f"DROP INDEX {qn(index)}")
+
+        # Not a rewrite by itself: the CLUSTER / VACUUM FULL below applies it.
+        # It also marks the rewrite and move as done, so it is taken back if
+        # either fails.
+        self._execute(f"ALTER TABLE {qn(partition)} SET (fillfactor = 100)")
+        try:
+            index = self._cluster_index(partition) if self.cluster else None
+            if index:
+                self._execute(f"CLUSTER {qn(partition)} USING {qn(index)}")
+            else:
+                self._execute(f"VACUUM FULL {qn(partition)}")
+
+            # CLUSTER cannot write into another tablespace: move the compacted files.
+            if self.tablespace:
+                self._execute(f"ALTER TABLE {qn(partition)} SET TABLESPACE {qn(self.tablespace)}")
+                for (index,) in self._execute(
+                    "SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass", [partition]
+                ):
+                    self._execute(f"ALTER INDEX {index} SET TABLESPACE {qn(self.tablespace)}")
+        except DatabaseError:
+            self._execute(f"ALTER TABLE {qn(partition)} RESET (fillfactor)")
+            raise
+
+        self._index_cold(partition)
+
+        if self.freeze:
+            self._execute(f"VACUUM (FREEZE, ANALYZE) {qn(partition)}")
+
+    def apply(self):
+        """
+        Index the hot partitions, then tier every candidate partition, one
+        at a time.
+
+        :return: str status message
+        """
+        self._check_tablespace()
+
+        built = self.index_hot()
+        if built:
+            logger.info(f"Built hot partition indexes {', '.join(built)}")
+
+        lines = []
+        for partition in self.candidates():
+            seconds = self.tier(partition)
+            logger.info(f"Tiered {partition} in {seconds:.1f}s")
+            lines.append(f"{partition}: {seconds:.1f}s")
+
+        indexed = f"Built {len(built)} hot partition indexes.\n" if built else ""
+        if not lines:
+            return f"{indexed}✅ No partitions of {self.model.__name__} to tier."
+        lines.append(f"✅ Tiered {len(lines)} partitions of {self.model.__name__}.")
+        return indexed + "\n".join(lines)
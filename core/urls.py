@@ -18,8 +18,11 @@ from django.contrib import admin
 from django.urls import path, include
 from debug_toolbar.toolbar import debug_toolbar_urls
 
+from core.instrumentation import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('todos/', include('todo.urls')),  # Include the todo app URLs
+    path('metrics/', metrics),  # Prometheus metrics of partitioned queries
 ] + debug_toolbar_urls()
     
\ No newline at end of file
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class TodoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'todo'
+
+    def ready(self):
+        from django.core import checks
+
+        from core.instrumentation import install
+        from core.monitoring import register_metrics
+        from core.provisioning import check_shared_cache
+
+        install()
+        register_metrics()
+        checks.register(check_shared_cache)
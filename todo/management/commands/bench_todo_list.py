@@ -0,0 +1,137 @@
+import copy
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import RequestFactory
+
+from todo.views import TodoListView
+
+# Connection settings compared by the benchmark, applied on top of DATABASES["default"].
+MODES = {
+    # A new connection per request (CONN_MAX_AGE = 0, no pool).
+    "fresh": {"CONN_MAX_AGE": 0, "OPTIONS": {}},
+    # One connection reused across requests.
+    "persistent": {"CONN_MAX_AGE": None, "OPTIONS": {}},
+    # Reused connection + server-side binding, statements prepared after one run.
+    "prepared": {
+        "CONN_MAX_AGE": None,
+        "OPTIONS": {"server_side_binding": True, "prepare_threshold": 1},
+    },
+    # Same, but Postgres re-plans every execution, pruning partitions at plan time.
+    "prepared-custom": {
+        "CONN_MAX_AGE": None,
+        "OPTIONS": {
+            "server_side_binding": True,
+            "prepare_threshold": 1,
+            "options": "-c plan_cache_mode=force_custom_plan",
+        },
+    },
+    # psycopg3 pool, connection handed back after every request.
+    "pool": {"CONN_MAX_AGE": 0, "OPTIONS": {"pool": {"min_size": 1, "max_size": 2}}},
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark TodoListView latency under different connection / prepared statement settings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Timed requests per mode and query (default: 200)"
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Untimed requests before each measurement (default: 10)"
+        )
+        parser.add_argument(
+            "--mode",
+            action="append",
+            choices=list(MODES),
+            help="Mode to run (repeatable; default: all)"
+        )
+        parser.add_argument(
+            "--query",
+            action="append",
+            help='List query string to request (repeatable; default: "", "status=pending", "date=30days")'
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the results as JSON"
+        )
+
+    def _apply(self, mode):
+        connection.close()
+        if connection.pool:
+            connection.close_pool()
+        settings_dict = copy.deepcopy(self.original)
+        settings_dict.update(copy.deepcopy(MODES[mode]))
+        settings_dict["OPTIONS"] = {**self.original.get("OPTIONS", {}), **MODES[mode]["OPTIONS"]}
+        if "pool" not in MODES[mode]["OPTIONS"]:
+            settings_dict["OPTIONS"].pop("pool", None)
+        connection.settings_dict = settings_dict
+
+    def _request(self, query):
+        request = self.factory.get(f"/todos/?{query}")
+        response = self.view(request)
+        response.render()
+        # What the request_finished signal does at the end of a real request.
+        close_old_connections()
+        if response.status_code != 200:
+            raise CommandError(f"GET /todos/?{query} returned {response.status_code}")
+
+    def _measure(self, query, count, warmup):
+        for _ in range(warmup):
+            self._request(query)
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            self._request(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "p50_ms": round(timings[len(timings) // 2], 3),
+            "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        }
+
+    def handle(self, *args, **options):
+        modes = options["mode"] or list(MODES)
+        queries = options["query"] or ["", "status=pending", "date=30days"]
+
+        # The DEBUG pruning report EXPLAINs every list query; keep it out of the timings.
+        settings.DEBUG = False
+        self.factory = RequestFactory()
+        self.view = TodoListView.as_view()
+        self.original = copy.deepcopy(connection.settings_dict)
+
+        results = []
+        try:
+            for mode in modes:
+                self._apply(mode)
+                for query in queries:
+                    result = {"mode": mode, "query": query, **self._measure(query, options["requests"], options["warmup"])}
+                    results.append(result)
+                    if not options["json"]:
+                        self.stdout.write(
+                            f"{mode:<16} {query or '(default)':<16} "
+                            f"mean {result['mean_ms']:8.2f} ms  p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms"
+                        )
+        finally:
+            connection.close()
+            if connection.pool:
+                connection.close_pool()
+            connection.settings_dict = self.original
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Benchmark complete."))
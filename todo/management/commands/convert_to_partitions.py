@@ -1,13 +1,9 @@
 import logging
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.apps import apps
-from django.db import transaction, connection
 
-from psqlextra.partitioning import PostgresPartitioningManager, PostgresCurrentTimePartitioningStrategy, PostgresTimePartitionSize
-from psqlextra.partitioning.config import PostgresPartitioningConfig
+from core.conversion import OnlineTableConverter, TableConverter
 
 logger = logging.getLogger(__name__)
 
@@ -15,66 +11,130 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = "Convert existing Todo table into a partitioned table using django-postgres-extra."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Partitions copied concurrently, one DB connection each (default: 4)"
+        )
+        parser.add_argument(
+            "--size",
+            type=str,
+            choices=["day", "month", "year"],
+            default="month",
+            help="Partition size (default: month)"
+        )
+        parser.add_argument(
+            "--online",
+            action="store_true",
+            help="Convert while the app keeps writing: dual-write trigger, throttled backfill, then a quick swap"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Rows per backfill chunk in --online mode (default: 5000)"
+        )
+        parser.add_argument(
+            "--throttle",
+            type=float,
+            default=0.1,
+            help="Seconds to pause between backfill chunks in --online mode (default: 0.1)"
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore checkpoints of a previous run and copy every partition again "
+                 "(--online: backfill again from the first id)"
+        )
+
     def handle(self, *args, **options):
-        app_name = "todo"
-        model_name = "todo"
         Todo = apps.get_model("todo", "Todo")
+        db_table_name = Todo._meta.db_table
 
-        # Step 1: Register Todo as partitioned model (month-wise)
-        manager = PostgresPartitioningManager([
-            PostgresPartitioningConfig(
-                model=Todo,
-                strategy=PostgresCurrentTimePartitioningStrategy(
-                    size=PostgresTimePartitionSize(months=1),
-                    count=12,  # create 12 partitions ahead
-                ),
-            )
-        ])
-
-        db_table_name = f'{app_name}_{model_name}'
-
-        with connection.cursor() as cursor:
-            cursor.execute(f"SELECT to_regclass('{db_table_name}_old');")
-            exists = cursor.fetchone()[0]
+        if options["online"]:
+            return self.handle_online(Todo, options)
 
-        if not exists:
-            logger.info("Renaming existing todo table -> todo_old...")
-            with connection.cursor() as cursor:
-                cursor.execute(f"ALTER TABLE todo RENAME TO {db_table_name}_old;")
+        converter = TableConverter(
+            Todo,
+            source_table=f"{db_table_name}_old",
+            target_table=db_table_name,
+            partition_size=options["size"],
+        )
 
-        logger.info("Running sync to create base partitioned table...")
-        manager.sync(create=True, delete=False)
+        # Step 1: Move the live table aside and create the partitioned one in its place
+        if converter.move_aside():
+            logger.info(f"Renamed {db_table_name} -> {db_table_name}_old")
+        if converter.create_partitioned_table():
+            logger.info(f"Created partitioned table {db_table_name}")
 
         # Step 2: Figure out historical data range from old table
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT MIN(created_at), MAX(created_at) FROM {db_table_name}_old;")
-            min_date, max_date = cursor.fetchone()
-
+        min_date, max_date = converter.source_bounds()
         if not min_date or not max_date:
-            logger.warning("No data found in {db_table_name}_old.")
+            logger.warning(f"No data found in {db_table_name}_old.")
             return
 
         logger.info(f"Existing data: {min_date} → {max_date}")
 
-        # Step 3: Create required partitions covering this historical range
-        start = datetime(min_date.year, min_date.month, 1)
-        end = datetime(max_date.year, max_date.month, 1)
-
-        current = start
-        while current <= end:
-            logger.info(f"Ensuring partition for {current.strftime('%Y-%m')}")
-            manager.ensure_partitions(Todo, current, current + relativedelta(months=1))
-            current += relativedelta(months=1)
-
-        # Step 4: Move old data into new partitioned table
-        with transaction.atomic():
-            logger.info("Moving rows into partitioned table...")
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    INSERT INTO {db_table_name} (id, title, description, is_completed, created_at)
-                    SELECT id, title, description, is_completed, created_at
-                    FROM {db_table_name}_old;
-                """)
-
-        logger.info("✅ Migration complete. Data is now in partitioned table.")
-        logger.info("You can validate and DROP TABLE todo_old manually after verification.")
+        # Step 3: Create required partitions covering this historical range, in one go
+        partitions = converter.create_partitions(min_date, max_date)
+        logger.info(f"Ensured {len(partitions)} partitions")
+
+        # Step 4: Copy old data partition by partition, in parallel, committing each
+        if options["restart"]:
+            converter.reset_checkpoints()
+
+        for (table, _, _), rows in converter.copy_partitions(partitions, options["workers"]):
+            self.stdout.write(f"Copied {rows} rows into {table}")
+
+        # Step 5: Verify row counts per partition
+        mismatches = converter.verify(partitions, options["workers"])
+        for table, source_rows, target_rows in mismatches:
+            self.stderr.write(f"{table}: {source_rows} rows in {db_table_name}_old, {target_rows} copied")
+        if mismatches:
+            raise CommandError("Row counts differ; fix and re-run with --restart.")
+
+        converter.sync_sequence()
+
+        self.stdout.write(self.style.SUCCESS("✅ Migration complete. Data is now in partitioned table."))
+        logger.info(f"You can validate and DROP TABLE {db_table_name}_old manually after verification.")
+
+    def handle_online(self, Todo, options):
+        db_table_name = Todo._meta.db_table
+        converter = OnlineTableConverter(Todo, source_table=db_table_name, partition_size=options["size"])
+
+        # Step 1: Build the partitioned table next to the live one
+        if converter.create_partitioned_table():
+            logger.info(f"Created partitioned table {converter.target_table}")
+
+        min_date, max_date = converter.source_bounds()
+        if min_date and max_date:
+            partitions = converter.create_partitions(min_date, max_date)
+            logger.info(f"Ensured {len(partitions)} partitions")
+        else:
+            partitions = []
+
+        # Step 2: Mirror live writes, then backfill history in throttled chunks
+        converter.install_trigger()
+
+        if options["restart"]:
+            converter.reset_backfill()
+
+        for total, last_id in converter.backfill(options["chunk_size"], options["throttle"]):
+            self.stdout.write(f"Backfilled {total} rows (up to id {last_id})")
+
+        # Step 3: Verify, then swap names in one short transaction
+        mismatches = converter.verify(partitions, options["workers"])
+        for table, source_rows, target_rows in mismatches:
+            self.stderr.write(f"{table}: {source_rows} rows in {db_table_name}, {target_rows} in the new table")
+        if mismatches:
+            raise CommandError(
+                "Row counts differ; the trigger is still installed, re-run with --restart to backfill "
+                "every row again (rows already copied are skipped)."
+            )
+
+        converter.swap()
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {db_table_name} is now partitioned."))
+        logger.info(f"You can validate and DROP TABLE {db_table_name}_old manually after verification.")
@@ -27,6 +27,29 @@ class Command(BaseCommand):
             default="month",
             help="Partition size (default: month)"
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Partitions created per transaction (default: 100)"
+        )
+        parser.add_argument(
+            "--lock-timeout",
+            type=str,
+            default="5s",
+            help="How long each batch may wait for locks before it is retried (default: 5s)"
+        )
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=3,
+            help="Retries per batch after a lock timeout (default: 3)"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the SQL instead of running it"
+        )
 
     def handle(self, *args, **options):
         start_date = datetime.strptime(options["start"], "%Y-%m-%d")
@@ -34,6 +57,17 @@ class Command(BaseCommand):
         size = options["size"]
 
         service = PartitioningService(TodoNonExisting, partition_size=size)
-        result = service.ensure_partitions_between('created_at', start_date, end_date)
+        result = service.ensure_partitions_between(
+            'created_at',
+            start_date,
+            end_date,
+            ddl_batch_size=options["batch_size"],
+            lock_timeout=options["lock_timeout"],
+            retries=options["retries"],
+            dry_run=options["dry_run"],
+        )
 
-        self.stdout.write(self.style.SUCCESS(result))
+        if options["dry_run"]:
+            self.stdout.write(result)
+        else:
+            self.stdout.write(self.style.SUCCESS(result))
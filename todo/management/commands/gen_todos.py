@@ -1,15 +1,33 @@
 from django.core.management.base import BaseCommand
 import random
 from datetime import datetime
+from core.loaders import CopyLoader
 from todo.models import TodoNonExisting
 
 
 class Command(BaseCommand):
     help = "Generate dummy Todo records (fixed count: 150000)"
 
-    def handle(self, *args, **options):
-        num_records = 400000  # fixed count
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--method",
+            choices=["orm", "copy"],
+            default="orm",
+            help="Insert with bulk_create (orm) or stream with COPY (default: orm)"
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "binary"],
+            default="csv",
+            help="COPY format for --method copy (binary needs psycopg 3)"
+        )
+        parser.add_argument(
+            "--route",
+            action="store_true",
+            help="With --method copy, write straight into the leaf partitions"
+        )
 
+    def rows(self, num_records):
         titles = [
             "Buy groceries", "Finish project report", "Plan vacation",
             "Workout session", "Pay electricity bill", "Meeting with client",
@@ -24,7 +42,6 @@ class Command(BaseCommand):
             "Waiting for confirmation from others."
         ]
 
-        todos = []
         for i in range(num_records):
             title = random.choice(titles)
             description = random.choice(descriptions)
@@ -36,14 +53,27 @@ class Command(BaseCommand):
             minute = random.randint(0, 59)
             created_at = datetime(2025, month, day, hour, minute)
 
-            todos.append(
-                TodoNonExisting(
-                    title=f"{title} #{i+1}",
-                    description=description,
-                    is_completed=random.choice([True, False]),
-                    created_at=created_at,
-                )
+            yield dict(
+                title=f"{title} #{i+1}",
+                description=description,
+                is_completed=random.choice([True, False]),
+                created_at=created_at,
+            )
+
+    def handle(self, *args, **options):
+        num_records = 400000  # fixed count
+
+        if options["method"] == "copy":
+            loader = CopyLoader(TodoNonExisting, format=options["format"], route=options["route"])
+            loader.load(self.rows(num_records))
+            self.stdout.write(
+                self.style.SUCCESS(f"✅ Successfully inserted {num_records} records.")
             )
+            return
+
+        todos = []
+        for i, row in enumerate(self.rows(num_records)):
+            todos.append(TodoNonExisting(**row))
 
             if len(todos) >= 5000:
                 TodoNonExisting.objects.bulk_create(todos, batch_size=5000)
@@ -55,4 +85,4 @@ class Command(BaseCommand):
 
         self.stdout.write(
             self.style.SUCCESS(f"✅ Successfully inserted {num_records} records.")
-        )
\ No newline at end of file
+        )
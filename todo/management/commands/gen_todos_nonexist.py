@@ -1,15 +1,33 @@
 from django.core.management.base import BaseCommand
 import random
 from datetime import datetime, timedelta
+from core.loaders import CopyLoader
 from todo.models import TodoNonExisting
 
 
 class Command(BaseCommand):
     help = "Generate dummy Todo records (fixed count: 150000 within Aug 2025 - Jul 2026)"
 
-    def handle(self, *args, **options):
-        num_records = 150000  # fixed count
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--method",
+            choices=["orm", "copy"],
+            default="orm",
+            help="Insert with bulk_create (orm) or stream with COPY (default: orm)"
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "binary"],
+            default="csv",
+            help="COPY format for --method copy (binary needs psycopg 3)"
+        )
+        parser.add_argument(
+            "--route",
+            action="store_true",
+            help="With --method copy, write straight into the leaf partitions"
+        )
 
+    def rows(self, num_records):
         titles = [
             "Buy groceries", "Finish project report", "Plan vacation",
             "Workout session", "Pay electricity bill", "Meeting with client",
@@ -29,7 +47,6 @@ class Command(BaseCommand):
         end_date = datetime(2026, 7, 31, 23, 59, 59)  # Jul 31, 2026 end of day
         delta_seconds = int((end_date - start_date).total_seconds())
 
-        todos = []
         for i in range(num_records):
             title = random.choice(titles)
             description = random.choice(descriptions)
@@ -38,15 +55,28 @@ class Command(BaseCommand):
             random_seconds = random.randint(0, delta_seconds)
             created_at = start_date + timedelta(seconds=random_seconds)
 
-            todos.append(
-                TodoNonExisting(
-                    title=f"{title} #{i+1}",
-                    description=description,
-                    is_completed=random.choice([True, False]),
-                    created_at=created_at,
-                )
+            yield dict(
+                title=f"{title} #{i+1}",
+                description=description,
+                is_completed=random.choice([True, False]),
+                created_at=created_at,
             )
 
+    def handle(self, *args, **options):
+        num_records = 150000  # fixed count
+
+        if options["method"] == "copy":
+            loader = CopyLoader(TodoNonExisting, format=options["format"], route=options["route"])
+            loader.load(self.rows(num_records))
+            self.stdout.write(
+                self.style.SUCCESS(f"✅ Successfully inserted {num_records} records.")
+            )
+            return
+
+        todos = []
+        for i, row in enumerate(self.rows(num_records)):
+            todos.append(TodoNonExisting(**row))
+
             # Insert in batches for efficiency
             if len(todos) >= 5000:
                 TodoNonExisting.objects.bulk_create(todos, batch_size=5000)
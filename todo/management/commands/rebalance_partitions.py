@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.rebalance import PartitionRebalancer
+from todo.models import TodoNonExisting
+
+
+class Command(BaseCommand):
+    help = "Split oversized partitions into finer ranges and merge small closed ones into coarser ranges."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-rows",
+            type=int,
+            help="Split partitions with more rows than this"
+        )
+        parser.add_argument(
+            "--max-mb",
+            type=int,
+            help="Split partitions larger than this many MB (table + indexes)"
+        )
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            help="Merge closed partitions with fewer rows than this"
+        )
+        parser.add_argument(
+            "--min-mb",
+            type=int,
+            help="Merge closed partitions smaller than this many MB"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Rows copied per transaction (default: 10000)"
+        )
+        parser.add_argument(
+            "--lock-timeout",
+            type=str,
+            default="5s",
+            help="How long the final swap of old and new partitions may wait for locks (default: 5s)"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only print what would be split and merged"
+        )
+
+    def handle(self, *args, **options):
+        mb = 1024 * 1024
+        thresholds = [options["max_rows"], options["max_mb"], options["min_rows"], options["min_mb"]]
+        if all(value is None for value in thresholds):
+            raise CommandError("Give at least one of --max-rows, --max-mb, --min-rows, --min-mb.")
+
+        rebalancer = PartitionRebalancer(
+            TodoNonExisting,
+            max_rows=options["max_rows"],
+            max_bytes=options["max_mb"] * mb if options["max_mb"] is not None else None,
+            min_rows=options["min_rows"],
+            min_bytes=options["min_mb"] * mb if options["min_mb"] is not None else None,
+            chunk_size=options["chunk_size"],
+            lock_timeout=options["lock_timeout"],
+        )
+        self.stdout.write(self.style.SUCCESS(rebalancer.apply(dry_run=options["dry_run"])))
@@ -0,0 +1,88 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import DISTRIBUTIONS, ModelBenchmark, environment
+from todo.models import Todo, TodoNonExisting
+
+MODELS = {"todo": Todo, "todononexisting": TodoNonExisting}
+
+
+class Command(BaseCommand):
+    help = "Benchmark the plain Todo model against the partitioned TodoNonExisting and emit JSON results."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10000,
+            help="Rows generated per model (default: 10000)"
+        )
+        parser.add_argument(
+            "--distribution",
+            choices=DISTRIBUTIONS,
+            default="uniform",
+            help="How created_at is spread over the period (default: uniform)"
+        )
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=12,
+            help="Period covered by the generated rows, in months (default: 12)"
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Timed runs per read operation (default: 20)"
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed, for reproducible data (default: 0)"
+        )
+        parser.add_argument(
+            "--model",
+            action="append",
+            choices=list(MODELS),
+            help="Model to benchmark (repeatable; default: both)"
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            help="Write the JSON results to this file instead of stdout"
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the generated rows instead of deleting them afterwards"
+        )
+
+    def handle(self, *args, **options):
+        report = {
+            "environment": environment(),
+            "parameters": {
+                key: options[key] for key in ("rows", "distribution", "months", "repeat", "seed")
+            },
+            "results": [],
+        }
+
+        for name in options["model"] or list(MODELS):
+            self.stderr.write(f"Benchmarking {MODELS[name].__name__} ({options['rows']} rows)...")
+            benchmark = ModelBenchmark(
+                MODELS[name],
+                rows=options["rows"],
+                distribution=options["distribution"],
+                months=options["months"],
+                seed=options["seed"],
+            )
+            report["results"].extend(benchmark.run(repeat=options["repeat"], keep=options["keep"]))
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+            self.stdout.write(self.style.SUCCESS(f"✅ Results written to {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -1,11 +1,23 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.db import connection
 from datetime import datetime
+
+from core.instrumentation import PartitionQueryInstrument
 from todo.models import TodoNonExisting
 
 
 class Command(BaseCommand):
-    help = "Run a sample query and print executed SQL"
+    help = "Run a sample query and print its SQL, latency and the partitions it scanned"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fanout",
+            type=int,
+            default=0,
+            help="Run the query per partition on this many concurrent connections instead"
+        )
 
     def handle(self, *args, **options):
         # todo = TodoNonExisting.objects.create(
@@ -15,18 +27,35 @@ class Command(BaseCommand):
         #     created_at=datetime(2024, 3, 5, 12, 0, 0)
         # )
         todo1 = TodoNonExisting.objects.filter(title__endswith="#153")
+
+        if options["fanout"]:
+            started = time.monotonic()
+            results = todo1.fanout(options["fanout"]).results()
+            print(len(results))
+            self.stdout.write(self.style.WARNING(
+                f"Fan-out over {options['fanout']} connections: {time.monotonic() - started:.3f} seconds"
+            ))
+            return
         # todo1 = TodoNonExisting.objects.all()
         # todo2 = TodoNonExisting.objects.first()
         # print('Total records fetched: ', len(todo1))
         # print(f"Result: {todo1}")
         # print(f"First Todo: {todo2}")
 
-        print(len(todo1))
-
-        # Get last executed query details
-        last_query = connection.queries[-1]
-        sql = last_query.get('sql', '')
-        exec_time = last_query.get('time', '0')
+        # EXPLAIN ANALYZE the query as it runs; unlike connection.queries this works without DEBUG.
+        records = []
+        with connection.execute_wrapper(PartitionQueryInstrument(sample_rate=1.0, report=records.append)):
+            print(len(todo1))
 
-        self.stdout.write(self.style.WARNING(f"Executed SQL: {sql}"))
-        self.stdout.write(self.style.WARNING(f"Execution Time: {exec_time} seconds"))
+        record = records[-1]
+        self.stdout.write(self.style.WARNING(f"Executed SQL: {record['sql']}"))
+        self.stdout.write(self.style.WARNING(f"Execution Time: {record['duration_ms'] / 1000:.3f} seconds"))
+        for table, pruning in record.get("partitions", {}).items():
+            self.stdout.write(self.style.WARNING(
+                f"{table}: scanned {len(pruning['scanned'])} of {pruning['total']} partitions "
+                f"({pruning['pruned']} pruned): {', '.join(pruning['scanned'])}"
+            ))
+        if "shared_hit" in record:
+            self.stdout.write(self.style.WARNING(
+                f"Buffers: {record['shared_hit']} hit, {record['shared_read']} read"
+            ))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:50
+
+import core.querysets
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0004_todononexisting_status_alter_todo_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='todononexisting',
+            managers=[
+                ('objects', core.querysets.TimePartitionedManager()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='todo',
+            name='created_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 17, 12, 50, 57, 17504)),
+        ),
+        migrations.AlterField(
+            model_name='todononexisting',
+            name='created_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 17, 12, 50, 57, 26687)),
+        ),
+    ]
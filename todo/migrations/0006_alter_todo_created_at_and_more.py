@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:51
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0005_alter_todononexisting_managers_alter_todo_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='todo',
+            name='created_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 17, 12, 51, 32, 469844)),
+        ),
+        migrations.AlterField(
+            model_name='todononexisting',
+            name='created_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 17, 12, 51, 32, 478795)),
+        ),
+        migrations.AddIndex(
+            model_name='todononexisting',
+            index=models.Index(fields=['created_at', 'id'], name='todo_todono_created_2e8219_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:53
+
+import datetime
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0006_alter_todo_created_at_and_more'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddField(
+            model_name='todononexisting',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('title', 'description', config='english'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AlterField(
+            model_name='todo',
+            name='created_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 17, 12, 53, 9, 546590)),
+        ),
+        migrations.AlterField(
+            model_name='todononexisting',
+            name='created_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 17, 12, 53, 9, 554251)),
+        ),
+        migrations.AddIndex(
+            model_name='todononexisting',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='todo_title_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todononexisting',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('description'), name='gin_trgm_ops'), name='todo_description_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todononexisting',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='todo_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:13
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0007_todononexisting_search_vector_alter_todo_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='todo',
+            name='created_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 17, 13, 13, 51, 319878)),
+        ),
+        migrations.AlterField(
+            model_name='todononexisting',
+            name='created_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 17, 13, 13, 51, 331847)),
+        ),
+        migrations.CreateModel(
+            name='TodoPartitionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('partition', models.CharField(max_length=63, unique=True)),
+                ('range_from', models.DateTimeField()),
+                ('range_to', models.DateTimeField()),
+                ('total', models.BigIntegerField(default=0)),
+                ('completed', models.BigIntegerField(default=0)),
+                ('overdue', models.BigIntegerField(default=0)),
+                ('min_created_at', models.DateTimeField(blank=True, null=True)),
+                ('max_created_at', models.DateTimeField(blank=True, null=True)),
+                ('closed', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['range_from'],
+                'indexes': [models.Index(fields=['range_from'], name='todo_todopa_range_f_0538be_idx')],
+            },
+        ),
+    ]
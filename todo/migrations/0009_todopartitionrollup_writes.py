@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:56
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0008_todopartitionrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='todopartitionrollup',
+            name='writes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='todo',
+            name='created_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 17, 13, 56, 58, 501061)),
+        ),
+        migrations.AlterField(
+            model_name='todononexisting',
+            name='created_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 17, 13, 56, 58, 506091)),
+        ),
+    ]
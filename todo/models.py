@@ -15,9 +15,10 @@ class Todo(models.Model):
     def __str__(self):
         return self.title
 
-from core.basemodels import TimePartitionedModel
+from core.basemodels import TimePartitionedModel, brin_index, search_vector_field, trigram_index
 from psqlextra.models import PostgresPartitionedModel
 from psqlextra.types import PostgresPartitioningMethod
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from datetime import datetime
 
@@ -29,17 +30,63 @@ class TodoNonExisting(TimePartitionedModel):
     status = models.DateTimeField(blank=True, null=True)  # Optional field for deadlines
     # created_at = models.DateTimeField(auto_now_add=True) # Uncomment it when in production
     created_at = models.DateTimeField(default=datetime.now()) # For inserting the whole records manually
+    search_vector = search_vector_field("title", "description")
+
+    search_fields = ("title", "description")
+    rollup_model = "todo.TodoPartitionRollup"
+    # Built per partition by the tiering job (see todo.partitioning.tiering)
+    hot_partition_indexes = [
+        models.Index(fields=["deadline"], name="todo_deadline_hot_idx"),  # overdue lookups on open months
+    ]
+    cold_partition_indexes = [
+        brin_index("created_at", name="todo_created_brin", pages_per_range=32),  # range filters in closed months
+    ]
 
     class PartitioningMeta:
         method = PostgresPartitioningMethod.RANGE
         key = ["created_at"]
         # Partition per month
         range_interval = "1 month"
+        # Spread the current month's inserts over 4 tables
+        subpartition_key = "id"
+        subpartition_count = 4
 
     class Meta:
         indexes = [
             models.Index(fields=["title"]),  # helps with partitioning & queries
+            models.Index(fields=["created_at", "id"]),  # keyset pagination, newest first
+            trigram_index("title", name="todo_title_trgm_idx"),  # q= substring search
+            trigram_index("description", name="todo_description_trgm_idx"),
+            GinIndex(fields=["search_vector"], name="todo_search_vector_idx"),  # full-text search
         ]
 
     def __str__(self):
         return self.title
+
+
+class TodoPartitionRollup(models.Model):
+    """Aggregates of one TodoNonExisting partition, maintained by core.rollups."""
+    partition = models.CharField(max_length=63, unique=True)
+    range_from = models.DateTimeField()
+    range_to = models.DateTimeField()
+    total = models.BigIntegerField(default=0)
+    completed = models.BigIntegerField(default=0)
+    overdue = models.BigIntegerField(default=0)  # pending past their deadline at computed_at
+    min_created_at = models.DateTimeField(blank=True, null=True)
+    max_created_at = models.DateTimeField(blank=True, null=True)
+    closed = models.BooleanField(default=False)  # final: the partition's range has ended
+    writes = models.BigIntegerField(default=0)  # pg_stat_user_tables write counters at computed_at
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["range_from"]
+        indexes = [
+            models.Index(fields=["range_from"]),
+        ]
+
+    @property
+    def pending(self):
+        return self.total - self.completed
+
+    def __str__(self):
+        return self.partition
@@ -1,4 +1,6 @@
 # myapp/partitioning.py
+from datetime import timedelta
+
 from dateutil.relativedelta import relativedelta
 
 from psqlextra.partitioning import (
@@ -8,6 +10,13 @@ from psqlextra.partitioning import (
 )
 from psqlextra.partitioning.config import PostgresPartitioningConfig
 
+from django.conf import settings
+
+from core.monitoring import DefaultPartitionMonitor
+from core.provisioning import PartitionProvisioner
+from core.retention import PartitionRetention
+from core.subpartitions import SubPartitionedTimePartitioningStrategy
+from core.tiering import PartitionTiering
 from .models import Todo, TodoNonExisting
 
 manager = PostgresPartitioningManager([
@@ -21,10 +30,53 @@ manager = PostgresPartitioningManager([
     # ),
     PostgresPartitioningConfig(
         model=TodoNonExisting,
-        strategy=PostgresCurrentTimePartitioningStrategy(
+        strategy=SubPartitionedTimePartitioningStrategy(
+            TodoNonExisting,                            # hash sub-partitions, see its PartitioningMeta
             size=PostgresTimePartitionSize(months=1),   # one partition = 1 month
-            count=12,                                   # create 12 future partitions
-            max_age=relativedelta(months=6),            # drop older than 6 months
+            count=2,                                    # current and next month; see `provisioning` below
+            max_age=None,                               # old months are removed by `retention` below
         ),
     ),
 ])
+
+# Future months are created a week before the data reaches them, at the
+# ingest rate measured by the `provision_partitions` Celery task.
+provisioning = [
+    PartitionProvisioner(
+        TodoNonExisting,
+        partition_size="month",
+        lead=timedelta(days=7),                         # several runs before the boundary
+    ),
+]
+
+# Rows landing in the default partition are reported, and moved into new
+# partitions of their months, by the `monitor_default_partitions` Celery task.
+monitors = [
+    DefaultPartitionMonitor(
+        TodoNonExisting,
+        partition_size="month",
+        auto_heal=True,
+    ),
+]
+
+# Partitions older than max_age are detached (concurrently when possible),
+# archived and dropped by the `apply_partition_retention` Celery task.
+retention = [
+    PartitionRetention(
+        TodoNonExisting,
+        max_age=relativedelta(months=6),                # drop older than 6 months
+        archive="gzip",
+    ),
+]
+
+# Closed months are compacted, moved to the cold tablespace and frozen by the
+# `apply_partition_tiering` Celery task, which also swaps the model's hot
+# partition indexes for its cold (BRIN) ones.
+tiering = [
+    PartitionTiering(
+        TodoNonExisting,
+        min_age=relativedelta(months=1),                # one full month after closing
+        tablespace=settings.PARTITION_COLD_TABLESPACE,
+        drop_local_indexes=True,
+    ),
+]
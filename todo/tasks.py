@@ -0,0 +1,53 @@
+from celery import shared_task
+
+from core.services import PartitioningService
+
+
+@shared_task
+def repair_todo_partitions():
+    from todo.models import Todo
+
+    service = PartitioningService(Todo, partition_size="month", extra_future=12)
+    result = service.ensure_and_repair()
+    return result
+
+
+@shared_task
+def provision_partitions():
+    """Create the partitions the data will reach soon, from the measured ingest rate (see todo.partitioning)."""
+    from todo.partitioning import provisioning
+
+    return "\n".join(planner.apply() for planner in provisioning)
+
+
+@shared_task
+def monitor_default_partitions():
+    """Report rows in default partitions and heal their periods (see todo.partitioning)."""
+    from todo.partitioning import monitors
+
+    return "\n".join(monitor.apply() for monitor in monitors)
+
+
+@shared_task
+def apply_partition_retention():
+    """Detach, archive and drop partitions past their retention (see todo.partitioning)."""
+    from todo.partitioning import retention
+
+    return "\n".join(policy.apply() for policy in retention)
+
+
+@shared_task
+def apply_partition_tiering():
+    """Compact, move and freeze closed partitions (see todo.partitioning)."""
+    from todo.partitioning import tiering
+
+    return "\n".join(policy.apply() for policy in tiering)
+
+
+@shared_task
+def refresh_partition_rollups():
+    """Finalize rollups of closed partitions and recompute the open ones."""
+    from todo.models import TodoNonExisting
+    from core.rollups import PartitionRollups
+
+    return PartitionRollups(TodoNonExisting).refresh()
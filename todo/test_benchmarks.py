@@ -0,0 +1,71 @@
+"""
+pytest-benchmark harness for core.benchmarks.
+
+Each timed operation of :meth:`ModelBenchmark.operations` runs under the
+`benchmark` fixture, so results can be saved and compared across releases:
+
+    pytest todo/test_benchmarks.py --benchmark-autosave
+    pytest todo/test_benchmarks.py --benchmark-compare
+
+Rows are loaded into the test database once per model. Skipped when
+pytest-benchmark is not installed or Postgres is not reachable.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from django.db import connection  # noqa: E402
+from psqlextra.models import PostgresPartitionedModel  # noqa: E402
+
+from core.benchmarks import ModelBenchmark  # noqa: E402
+from core.catalog import catalog  # noqa: E402
+from todo.models import Todo, TodoNonExisting  # noqa: E402
+
+ROWS = 2000
+
+OPERATIONS = [
+    "pk_lookup",
+    "pk_lookup_with_key",
+    "recent_window",
+    "deep_offset",
+    "deep_keyset",
+    "text_search",
+    "count",
+    "window_count",
+]
+
+
+def _partitions(model):
+    if not issubclass(model, PostgresPartitionedModel):
+        return set()
+    catalog.invalidate(model._meta.db_table)
+    return {p.name for p in catalog.snapshot(model._meta.db_table).partitions}
+
+
+@pytest.fixture(scope="module", params=[Todo, TodoNonExisting], ids=lambda model: model.__name__)
+def operations(request, django_db_setup):
+    existing = _partitions(request.param)
+    bench = ModelBenchmark(request.param, rows=ROWS)
+    bench.setup()
+    try:
+        bench.insert()
+        yield bench.operations()
+    finally:
+        bench.cleanup()
+        # Leave the test database's partitions as the other tests expect them.
+        with connection.cursor() as cursor:
+            for name in _partitions(request.param) - existing:
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+        catalog.invalidate(request.param._meta.db_table)
+
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_operation(benchmark, operations, operation):
+    if operation not in operations:
+        pytest.skip(f"{operation} only applies to partitioned models")
+    benchmark.group = operation
+    benchmark(operations[operation])
+
+
+def test_operations_are_covered(operations):
+    assert set(operations) <= set(OPERATIONS)
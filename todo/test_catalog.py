@@ -0,0 +1,99 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.catalog import Partition, PartitionCatalog, PartitionSnapshot, catalog
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, months, partition, utc
+
+
+class PartitionSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        self.partitions = months(2026, 1, 3) + [
+            partition("2026_05", utc(2026, 5, 1), utc(2026, 6, 1), leaves=[f"{TABLE}_2026_05_h0", f"{TABLE}_2026_05_h1"]),
+        ]
+        default = Partition(f"{TABLE}_default", None, None, 0, [f"{TABLE}_default"])
+        self.snapshot = PartitionSnapshot(TABLE, self.partitions, default)
+
+    def test_leaves_expand_subpartitions_and_end_with_default(self):
+        self.assertEqual(self.snapshot.leaves(), [
+            f"{TABLE}_2026_01", f"{TABLE}_2026_02", f"{TABLE}_2026_03",
+            f"{TABLE}_2026_05_h0", f"{TABLE}_2026_05_h1", f"{TABLE}_default",
+        ])
+
+    def test_overlapping(self):
+        self.assertEqual(self.snapshot.overlapping(utc(2026, 1, 15), utc(2026, 2, 15)), self.partitions[0:2])
+        self.assertEqual(self.snapshot.overlapping(utc(2026, 2, 1), utc(2026, 3, 1)), [self.partitions[1]])
+        self.assertEqual(self.snapshot.overlapping(utc(2026, 4, 1), utc(2026, 5, 1)), [])
+        self.assertEqual(self.snapshot.overlapping(utc(2025, 1, 1), utc(2027, 1, 1)), self.partitions)
+
+    def test_missing(self):
+        ranges = [(utc(2026, 3, 1), utc(2026, 4, 1)), (utc(2026, 4, 1), utc(2026, 5, 1))]
+        self.assertEqual(self.snapshot.missing(ranges), ranges[1:])
+
+
+class PartitionCatalogTests(SimpleTestCase):
+    def setUp(self):
+        self.catalog = PartitionCatalog()
+        self.loads = []
+
+    def load(self, table):
+        self.loads.append(table)
+        return PartitionSnapshot(table, [])
+
+    def test_snapshot_is_cached_until_invalidated(self):
+        with mock.patch.object(self.catalog, "_load", side_effect=self.load):
+            first = self.catalog.snapshot(TABLE)
+            self.assertIs(self.catalog.snapshot(TABLE), first)
+            self.catalog.invalidate(TABLE)
+            self.assertIsNot(self.catalog.snapshot(TABLE), first)
+        self.assertEqual(self.loads, [TABLE, TABLE])
+
+    def test_snapshot_expires_after_ttl(self):
+        with mock.patch.object(self.catalog, "_load", side_effect=self.load), self.settings(PARTITION_CATALOG_TTL=0):
+            self.catalog.snapshot(TABLE)
+            self.catalog.snapshot(TABLE)
+        self.assertEqual(len(self.loads), 2)
+
+    def test_load_racing_an_invalidation_is_not_cached(self):
+        def load(table):
+            self.catalog.invalidate(table)  # DDL ran while the catalog was being read
+            return self.load(table)
+
+        with mock.patch.object(self.catalog, "_load", side_effect=load):
+            self.catalog.snapshot(TABLE)
+            self.catalog.snapshot(TABLE)
+        self.assertEqual(len(self.loads), 2)
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class StaleSnapshotTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        catalog.invalidate(TABLE)
+        self.service = PartitioningService(TodoNonExisting)
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+
+    def test_partitions_created_by_another_process_are_skipped(self):
+        catalog.snapshot(TABLE)  # cached before the other process creates 2017_jun
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_2017_jun PARTITION OF {TABLE} "
+                "FOR VALUES FROM ('2017-06-01') TO ('2017-07-01')"
+            )
+
+        batches = list(self.service.apply_partitions(self.service._partitions_between(utc(2017, 5, 1), utc(2017, 7, 1))))
+        created = self.service._create_partitions(self.service._partitions_between(utc(2017, 7, 1), utc(2017, 8, 1)))
+
+        self.assertEqual([(batch.partitions, batch.attempts) for batch in batches], [(2, 2)])
+        self.assertEqual([p.name() for p in created], ["2017_aug"])
+        self.assertEqual(
+            [name for name, *_ in self.service.get_partitions() if name.startswith(f"{TABLE}_2017")],
+            [f"{TABLE}_2017_{month}" for month in ("may", "jun", "jul", "aug")],
+        )
@@ -0,0 +1,151 @@
+import threading
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core.conversion import CHECKPOINT_TABLE, OnlineTableConverter, TableConverter
+from core.parallel import run_in_threads
+from todo.models import Todo
+from todo.testing import utc
+
+SOURCE = "todo_conversion_source"
+
+
+def create_source(rows):
+    """A plain table shaped like Todo's, holding `rows` (title, created_at)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {SOURCE} (id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, "
+            "title varchar(255) NOT NULL, description text, is_completed boolean NOT NULL DEFAULT false, "
+            "created_at timestamptz NOT NULL)"
+        )
+        for title, created_at in rows:
+            cursor.execute(f"INSERT INTO {SOURCE} (title, created_at) VALUES (%s, %s)", [title, created_at])
+
+
+def drop_tables(*tables):
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+
+
+class RunInThreadsTests(SimpleTestCase):
+    def test_every_item_runs_once(self):
+        threads = set()
+
+        def square(item):
+            threads.add(threading.get_ident())
+            return item * item
+
+        results = dict(run_in_threads(square, range(20), workers=4))
+        self.assertEqual(results, {item: item * item for item in range(20)})
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_single_worker_runs_in_the_calling_thread(self):
+        results = list(run_in_threads(lambda item: threading.get_ident(), [None]))
+        self.assertEqual(results, [(None, threading.get_ident())])
+
+    def test_error_propagates(self):
+        def fail(item):
+            raise RuntimeError(item)
+
+        with self.assertRaises(RuntimeError):
+            list(run_in_threads(fail, range(3), workers=2))
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class TableConverterTests(TransactionTestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        create_source([(f"row {day}", utc(2009, month, day)) for month in (1, 2, 3) for day in (1, 15)])
+        self.converter = TableConverter(Todo, SOURCE, "todo_conversion_target")
+        self.converter.index_suffix = "_conversion"  # Todo's own table holds the plain names
+        self.converter.create_partitioned_table()
+        self.partitions = self.converter.create_partitions(*self.converter.source_bounds())
+
+    def tearDown(self):
+        self.converter.reset_checkpoints()
+        drop_tables(self.converter.target_table, SOURCE)
+
+    def test_partitions_are_copied_in_parallel_and_verified(self):
+        self.assertEqual(
+            [table for table, *_ in self.partitions],
+            [f"todo_conversion_target_2009_{month}" for month in ("jan", "feb", "mar")],
+        )
+
+        copied = dict(self.converter.copy_partitions(self.partitions, workers=3))
+
+        self.assertEqual({table: rows for (table, *_), rows in copied.items()}, {
+            f"todo_conversion_target_2009_{month}": 2 for month in ("jan", "feb", "mar")
+        })
+        self.assertEqual(self.converter.verify(self.partitions, workers=2), [])
+
+    def test_interrupted_copy_resumes_from_the_checkpoints(self):
+        first = self.partitions[0]
+        list(self.converter.copy_partitions([first]))
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {SOURCE} (title, created_at) VALUES ('late', %s)", [utc(2009, 1, 20)])
+
+        resumed = [partition for partition, _ in self.converter.copy_partitions(self.partitions, workers=2)]
+
+        self.assertEqual(sorted(resumed), sorted(self.partitions[1:]))
+        self.assertEqual(self.converter.copied_partitions(), {table for table, *_ in self.partitions})
+        self.assertEqual(self.converter.verify(self.partitions), [(first[0], 3, 2)])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {CHECKPOINT_TABLE} WHERE source_table = %s", [SOURCE])
+            self.assertEqual(cursor.fetchone(), (3,))
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class OnlineTableConverterTests(TransactionTestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        create_source([(f"row {n}", utc(2008, 1 + n % 2, 1 + n)) for n in range(5)])
+        # Todo's own table holds the index names a swap would give the converted one.
+        patcher = mock.patch.object(Todo._meta, "indexes", [])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.converter = OnlineTableConverter(Todo, SOURCE)
+
+    def tearDown(self):
+        self.converter.reset_backfill()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP FUNCTION IF EXISTS {self.converter.function}() CASCADE")
+        drop_tables(SOURCE, f"{SOURCE}_old", self.converter.target_table)
+
+    def rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id, title, created_at FROM {table} ORDER BY id")
+            return cursor.fetchall()
+
+    def test_writes_during_the_backfill_survive_the_swap(self):
+        self.converter.create_partitioned_table()
+        self.converter.create_partitions(*self.converter.source_bounds())
+        self.converter.install_trigger()
+
+        backfill = self.converter.backfill(chunk_size=2, throttle=0)
+        self.assertEqual(next(backfill), (2, 2))
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {SOURCE} SET title = 'copied, then renamed' WHERE id = 1")
+            cursor.execute(f"UPDATE {SOURCE} SET title = 'renamed, then copied' WHERE id = 4")
+            cursor.execute(f"DELETE FROM {SOURCE} WHERE id = 3")
+            cursor.execute(f"INSERT INTO {SOURCE} (title, created_at) VALUES ('new', %s)", [utc(2008, 2, 20)])
+        list(backfill)
+        expected = self.rows(SOURCE)
+        self.assertEqual(self.rows(self.converter.target_table), expected)
+
+        self.converter.swap()
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [SOURCE])
+            self.assertEqual(cursor.fetchone(), ("p",))
+            cursor.execute(
+                f"INSERT INTO {SOURCE} (title, created_at) VALUES ('after', %s) RETURNING id", [utc(2008, 2, 21)]
+            )
+            self.assertGreater(cursor.fetchone()[0], max(row[0] for row in expected))
+        self.assertEqual(self.rows(f"{SOURCE}_old"), expected)
+        self.assertEqual(self.converter._backfill_progress(), (0, 0))
@@ -0,0 +1,92 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from core.catalog import PartitionSnapshot, catalog
+from core.counting import PartitionCount, PartitionCountProvider
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, months, utc
+
+
+class PartitionCountProviderTests(SimpleTestCase):
+    def count(self, window, estimates, filtered=True):
+        provider = PartitionCountProvider(TodoNonExisting, exact_limit=1000)
+        queryset = mock.Mock(window=mock.Mock(return_value=None), count=mock.Mock(return_value=42))
+        with mock.patch.object(provider, "count_window", return_value=PartitionCount(window, True)), \
+                mock.patch.object(provider, "estimate", side_effect=estimates):
+            return provider.count(queryset, filtered=filtered)
+
+    def test_unfiltered_uses_the_window_count(self):
+        self.assertEqual(self.count(50000, [], filtered=False), PartitionCount(50000, True))
+
+    def test_filtered_small_window_is_counted_exactly(self):
+        self.assertEqual(self.count(800, []), PartitionCount(42, True))
+
+    def test_filtered_large_window_scales_by_selectivity(self):
+        # planner: 500 of 20000 rows match
+        self.assertEqual(self.count(50000, [500, 20000]), PartitionCount(1250, False))
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ClosedPartitionCountTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.partitions = months(2020, 1, 1)
+        self.provider = PartitionCountProvider(TodoNonExisting)
+        self.provider.service = mock.Mock(
+            get_partitions=mock.Mock(return_value=[(p.name, p.range_from, p.range_to) for p in self.partitions]),
+            default_table=f"{TABLE}_default",
+        )
+
+    def count(self, version, rows):
+        counts = {self.partitions[0].name: rows, f"{TABLE}_default": 0}
+        with mock.patch("core.counting.catalog") as patched, \
+                mock.patch.object(self.provider, "versions", return_value={self.partitions[0].name: version}), \
+                mock.patch.object(self.provider, "_count_range", side_effect=lambda table, *_: counts[table]):
+            patched.snapshot.return_value = PartitionSnapshot(TABLE, self.partitions)
+            return self.provider.count_window().value
+
+    def test_closed_partition_count_is_cached_per_version(self):
+        self.assertEqual(self.count("1.10", 10), 10)
+        self.assertEqual(self.count("1.10", 99), 10)
+        self.assertEqual(self.count("1.11", 11), 11)
+
+    def test_cache_timeout_is_finite_by_default(self):
+        self.assertGreater(self.provider.cache_timeout, 0)
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class PartitionVersionTests(TransactionTestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2019, 5, 1), utc(2019, 5, 1)))
+        catalog.invalidate(TABLE)
+        self.partitions = [p for p in catalog.snapshot(TABLE).partitions if p.name == f"{TABLE}_2019_may"]
+        self.provider = PartitionCountProvider(TodoNonExisting)
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}_2019_may")
+        catalog.invalidate(TABLE)
+
+    def version(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_stat_force_next_flush()")
+        return self.provider.versions(self.partitions)[f"{TABLE}_2019_may"]
+
+    def test_version_changes_with_inserts_and_deletes_only(self):
+        before = self.version()
+        todo = TodoNonExisting.objects.create(title="late", created_at=utc(2019, 5, 7))
+        inserted = self.version()
+        TodoNonExisting.objects.filter(id=todo.id).update(title="renamed")
+        self.assertEqual(self.version(), inserted)
+        TodoNonExisting.objects.filter(id=todo.id).delete()
+
+        self.assertNotEqual(inserted, before)
+        self.assertNotIn(self.version(), (before, inserted))
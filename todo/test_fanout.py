@@ -0,0 +1,70 @@
+import pytest
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core.catalog import catalog
+from core.fanout import on_table
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, utc
+
+
+class PartitionFanoutTests(SimpleTestCase):
+    def test_on_table_keeps_the_filters(self):
+        queryset = on_table(TodoNonExisting.objects.filter(title="x"), f"{TABLE}_2026_jan")
+        sql = str(queryset.query)
+        self.assertIn(f'FROM "{TABLE}_2026_jan" {TABLE} ', sql)
+        self.assertIn(f'WHERE "{TABLE}"."title" = x', sql)
+
+    def test_unmergeable_ordering_is_rejected(self):
+        for ordering in ("?", "created_at__year"):
+            with self.assertRaises(ValueError):
+                TodoNonExisting.objects.order_by(ordering).fanout()._ordering()
+
+    def test_merge_with_mixed_directions_and_nulls(self):
+        fanout = TodoNonExisting.objects.fanout()
+        parts = [
+            [{"title": "a", "deadline": None}, {"title": "b", "deadline": 1}],
+            [{"title": "a", "deadline": 2}, {"title": "c", "deadline": None}],
+        ]
+        merged = fanout._merge(parts, [("title", False), ("deadline", True)])
+        self.assertEqual(
+            [(row["title"], row["deadline"]) for row in merged],
+            [("a", None), ("a", 2), ("b", 1), ("c", None)],
+        )
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class PartitionFanoutQueryTests(TransactionTestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2005, 1, 1), utc(2005, 3, 1)))
+        for month in (1, 2, 3, 4):
+            for day in (5, 15):
+                TodoNonExisting.objects.create(
+                    title=f"{month}/{day}", is_completed=day == 5, created_at=utc(2005, month, day)
+                )
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}_2005_jan, {TABLE}_2005_feb, {TABLE}_2005_mar")
+        catalog.invalidate(TABLE)
+
+    def test_results_match_the_plain_query(self):
+        queryset = TodoNonExisting.objects.filter(is_completed=False).order_by("-created_at")[1:3]
+        self.assertEqual(list(queryset.fanout(workers=3).results()), list(queryset))
+
+        values = TodoNonExisting.objects.values("title", "is_completed", "created_at")
+        values = values.order_by("is_completed", "created_at")
+        self.assertEqual(values.fanout(workers=2).results(), list(values))
+
+    def test_window_limits_the_partitions(self):
+        queryset = TodoNonExisting.objects.between(utc(2005, 2, 10), utc(2005, 3, 10))
+        self.assertEqual(
+            queryset.fanout().tables(),
+            [f"{TABLE}_2005_feb", f"{TABLE}_2005_mar", f"{TABLE}_default"],
+        )
+        self.assertEqual(queryset.fanout(workers=2).count(), queryset.count())
+        self.assertEqual(TodoNonExisting.objects.fanout(workers=4).count(), 8)
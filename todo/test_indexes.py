@@ -0,0 +1,96 @@
+import pytest
+from django.db import connection, models
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from core.catalog import catalog
+from core.basemodels import brin_index
+from core.indexes import PartitionIndexBuilder, PartitionIndexPolicy, index_sql, partition_index_name
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, utc
+
+
+class PartitionIndexNameTests(SimpleTestCase):
+    def test_suffix_is_the_partition_name_without_the_table(self):
+        self.assertEqual(partition_index_name("todo_idx", TABLE, f"{TABLE}_2026_mar_h1"), "todo_idx_2026_mar_h1")
+
+    def test_long_names_are_truncated_to_the_identifier_limit(self):
+        name = partition_index_name("x" * 60, TABLE, f"{TABLE}_2026_mar")
+        self.assertEqual(len(name), connection.ops.max_name_length())
+
+    def test_unknown_index_is_rejected(self):
+        with self.assertRaises(ValueError):
+            PartitionIndexBuilder(TodoNonExisting, "no_such_idx")
+
+    def test_brin_index_on_a_partition(self):
+        index = brin_index("created_at", name="todo_brin", pages_per_range=16)
+        self.assertEqual(
+            index_sql(TodoNonExisting, index, f"{TABLE}_2026_mar", "todo_brin_2026_mar"),
+            f'CREATE INDEX "todo_brin_2026_mar" ON "{TABLE}_2026_mar" USING brin ("created_at") '
+            "WITH (pages_per_range = 16)",
+        )
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class PartitionIndexBuilderTests(TransactionTestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2011, 1, 1), utc(2011, 2, 1)))
+        TodoNonExisting.objects.create(title="indexed", created_at=utc(2011, 1, 5))
+
+        self.builder = PartitionIndexBuilder(TodoNonExisting, TodoNonExisting._meta.indexes[0].name)
+        # Built like a declared index, under a name no migration created.
+        self.builder.index = models.Index(fields=["deadline", "title"], name="todo_build_test_idx")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX IF EXISTS todo_build_test_idx")
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}_2011_jan, {TABLE}_2011_feb")
+        catalog.invalidate(TABLE)
+
+    def test_partitions_are_indexed_one_by_one_until_the_parent_is_valid(self):
+        self.builder.create_parent()
+        pending = self.builder.pending_partitions()
+        self.assertIn(f"{TABLE}_2011_jan", pending)
+        self.assertFalse(self.builder.is_valid())
+
+        self.builder.build(pending[0])
+        self.assertEqual(self.builder.pending_partitions(), pending[1:])
+
+        # Re-running create_parent() after an interruption is harmless.
+        self.builder.create_parent()
+        for partition in pending[1:]:
+            self.builder.build(partition)
+
+        self.assertEqual(self.builder.pending_partitions(), [])
+        self.assertTrue(self.builder.is_valid())
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class PartitionIndexPolicyTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2001, 1, 1), utc(2001, 1, 1)))
+        self.leaf = f"{TABLE}_2001_jan"
+        self.policy = PartitionIndexPolicy(TodoNonExisting)
+        self.policy.hot = [models.Index(fields=["deadline"], name="todo_hot_test_idx")]
+        self.policy.cold = [brin_index("created_at", name="todo_cold_test_brin")]
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+
+    def test_hot_indexes_give_way_to_cold_ones(self):
+        hot, cold = self.policy.hot, self.policy.cold
+        self.assertEqual(self.policy.create(self.leaf, hot, concurrently=False), ["todo_hot_test_idx_2001_jan"])
+        self.assertEqual(self.policy.create(self.leaf, hot, concurrently=False), [])
+
+        self.assertEqual(self.policy.drop(self.leaf, hot, concurrently=False), ["todo_hot_test_idx_2001_jan"])
+        self.assertEqual(self.policy.create(self.leaf, cold, concurrently=False), ["todo_cold_test_brin_2001_jan"])
+
+        existing = self.policy._existing(self.leaf)
+        self.assertNotIn("todo_hot_test_idx_2001_jan", existing)
+        self.assertIs(existing["todo_cold_test_brin_2001_jan"], True)
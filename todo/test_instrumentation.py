@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.catalog import catalog
+from core.instrumentation import PartitionQueryInstrument
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, utc
+
+
+class PartitionQueryInstrumentTests(SimpleTestCase):
+    def setUp(self):
+        self.records = []
+        self.instrument = PartitionQueryInstrument(sample_rate=0, slow_ms=None, report=self.records.append)
+
+    def execute(self, sql, params, many, context):
+        return "rows"
+
+    def test_tables_are_found_once_in_quotes(self):
+        sql = f'SELECT "{TABLE}"."id" FROM "{TABLE}" WHERE "{TABLE}"."title" = %s'
+        self.assertEqual(self.instrument.tables(sql), [TABLE])
+        self.assertEqual(self.instrument.tables(f"SELECT 1 FROM {TABLE}_2026_jan"), [])
+
+    def test_only_selects_on_partitioned_tables_are_measured(self):
+        for sql, many in [
+            (f'UPDATE "{TABLE}" SET "title" = %s', False),
+            (f'SELECT "id" FROM "{TABLE}"', True),
+            ('SELECT "id" FROM "todo_todo"', False),
+        ]:
+            self.assertEqual(self.instrument(self.execute, sql, [], many, {}), "rows")
+        self.assertEqual(self.records, [])
+
+        self.assertEqual(self.instrument(self.execute, f'SELECT "id" FROM "{TABLE}"', [], False, {}), "rows")
+        [record] = self.records
+        self.assertEqual((record["tables"], record["slow"]), ([TABLE], False))
+        self.assertNotIn("partitions", record)
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class PartitionQueryExplainTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2004, 1, 1), utc(2004, 2, 1)))
+        TodoNonExisting.objects.create(title="jan", created_at=utc(2004, 1, 10))
+        self.records = []
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+
+    def run_instrumented(self, queryset, **kwargs):
+        instrument = PartitionQueryInstrument(report=self.records.append, **kwargs)
+        with connection.execute_wrapper(instrument):
+            return list(queryset)
+
+    def test_sampled_query_reports_the_partitions_scanned(self):
+        rows = self.run_instrumented(
+            TodoNonExisting.objects.between(utc(2004, 1, 1), utc(2004, 2, 1)), sample_rate=1.0, slow_ms=None
+        )
+
+        self.assertEqual([row.title for row in rows], ["jan"])
+        [record] = self.records
+        pruning = record["partitions"][TABLE]
+        self.assertEqual(pruning["scanned"], [f"{TABLE}_2004_jan"])
+        self.assertFalse(pruning["unpruned"])
+        self.assertTrue(record["analyzed"])
+        self.assertIn("shared_hit", record)
+
+    def test_slow_query_is_explained_without_analyze(self):
+        self.run_instrumented(TodoNonExisting.objects.all(), sample_rate=0, slow_ms=0)
+
+        [record] = self.records
+        self.assertTrue(record["slow"])
+        self.assertFalse(record["analyzed"])
+        self.assertTrue(record["partitions"][TABLE]["unpruned"])
+        self.assertNotIn("shared_hit", record)
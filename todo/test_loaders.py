@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.test import SimpleTestCase, TestCase
+
+from core.catalog import catalog
+from core.loaders import CopyLoader, _csv_value
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, utc
+
+
+class CsvValueTests(SimpleTestCase):
+    def test_values(self):
+        self.assertEqual(_csv_value(None), "")
+        self.assertEqual(_csv_value(""), '""')
+        self.assertEqual(_csv_value(True), '"t"')
+        self.assertEqual(_csv_value('say "hi", bye'), '"say ""hi"", bye"')
+        self.assertEqual(_csv_value(utc(2026, 1, 2, 3)), '"2026-01-02T03:00:00+00:00"')
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            CopyLoader(TodoNonExisting, format="text")
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class CopyLoaderTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2010, 1, 1), utc(2010, 2, 1)))
+        self.rows = [
+            {"title": "jan", "created_at": utc(2010, 1, 31, 23)},
+            {"title": "feb", "created_at": datetime(2010, 2, 1)},  # naive: made aware like the ORM does
+            {"title": 'feb "quoted", too', "created_at": utc(2010, 2, 28)},
+            {"title": "mar", "created_at": utc(2010, 3, 1)},
+            {"title": "jan again", "created_at": utc(2010, 1, 1)},
+        ]
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+
+    def placement(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT title, tableoid::regclass::text FROM {TABLE} ORDER BY created_at")
+            return cursor.fetchall()
+
+    def assertLoaded(self, loader):
+        self.assertEqual(loader.load(iter(self.rows)), 5)
+        self.assertEqual(self.placement(), [
+            ("jan again", f"{TABLE}_2010_jan"),
+            ("jan", f"{TABLE}_2010_jan"),
+            ("feb", f"{TABLE}_2010_feb"),
+            ('feb "quoted", too', f"{TABLE}_2010_feb"),
+            ("mar", f"{TABLE}_default"),
+        ])
+        self.assertEqual(TodoNonExisting.objects.values("id").distinct().count(), 5)
+
+    def test_csv_copy_through_the_parent(self):
+        self.assertLoaded(CopyLoader(TodoNonExisting, batch_size=2))
+
+    def test_routed_copy_into_leaf_partitions(self):
+        self.assertLoaded(CopyLoader(TodoNonExisting, route=True, batch_size=2))
+
+    def test_binary_copy(self):
+        if not is_psycopg3:
+            self.skipTest("binary COPY needs psycopg 3")
+        self.assertLoaded(CopyLoader(TodoNonExisting, format="binary", batch_size=2))
@@ -0,0 +1,89 @@
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.catalog import catalog
+from core.monitoring import (
+    METRICS_CACHE_KEY, DefaultPartitionCollector, DefaultPartitionMonitor, OverflowReport,
+    prometheus_client,
+)
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, utc
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM)
+class DefaultPartitionCheckTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.monitor = DefaultPartitionMonitor(TodoNonExisting)
+        self.periods = [(datetime(2026, 1, 1), 3)]
+
+    def check(self, inserts, rows):
+        with mock.patch.object(self.monitor, "stats", return_value=(inserts, rows)), \
+                mock.patch.object(self.monitor, "periods", return_value=(self.periods, False)) as periods:
+            return self.monitor.check(), periods.called
+
+    def test_inserts_are_counted_from_the_previous_check(self):
+        self.assertEqual(self.check(10, 0), ((0, 0, [], False), False))
+        self.assertEqual(self.check(13, 3), ((3, 3, self.periods, False), True))
+        # Statistics were reset.
+        self.assertEqual(self.check(2, 3), ((0, 3, self.periods, False), True))
+
+        entry = cache.get(METRICS_CACHE_KEY)[TABLE]
+        self.assertEqual((entry["rows"], entry["inserts_total"], entry["periods"]), (3, 3, {"2026-01-01": 3}))
+
+    def test_empty_default_is_reported(self):
+        with mock.patch.object(self.monitor, "check", return_value=OverflowReport(0, 0, [], False)):
+            self.assertEqual(self.monitor.apply(), f"✅ {TABLE}_default is empty.")
+
+    @unittest.skipUnless(prometheus_client, "prometheus_client is not installed")
+    def test_collector_serves_the_stored_numbers(self):
+        self.check(10, 0)
+        self.check(13, 3)
+        families = {family.name: family.samples for family in DefaultPartitionCollector().collect()}
+        self.assertEqual(families["default_partition_rows"][0].value, 3)
+        self.assertEqual(families["default_partition_period_rows"][0].labels["period"], "2026-01-01")
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class DefaultPartitionHealTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        for created_at in (utc(2002, 3, 5), utc(2002, 3, 25), utc(2002, 4, 5)):
+            TodoNonExisting.objects.create(title=f"{created_at:%b}", created_at=created_at)
+        self.monitor = DefaultPartitionMonitor(TodoNonExisting)
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+
+    def placement(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT title, tableoid::regclass::text FROM {TABLE} "
+                "WHERE created_at >= %s AND created_at < %s ORDER BY created_at",
+                [utc(2002, 1, 1), utc(2003, 1, 1)],
+            )
+            return cursor.fetchall()
+
+    def test_only_the_healed_periods_leave_the_default(self):
+        periods, sampled = self.monitor.periods(rows=0)
+        self.assertIn((datetime(2002, 3, 1), 2), periods)
+        self.assertFalse(sampled)
+
+        self.assertEqual(self.monitor.heal([datetime(2002, 3, 1)]), 2)
+
+        self.assertEqual(self.placement(), [
+            ("Mar", f"{TABLE}_2002_mar"),
+            ("Mar", f"{TABLE}_2002_mar"),
+            ("Apr", f"{TABLE}_default"),
+        ])
+        # The period has its partition now.
+        self.assertEqual(self.monitor.heal([datetime(2002, 3, 1)]), 0)
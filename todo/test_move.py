@@ -0,0 +1,55 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test import TestCase
+
+from core.catalog import catalog
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, utc
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class MoveDefaultDataTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        for day in (1, 2, 3, 4, 30):
+            TodoNonExisting.objects.create(title=f"april {day}", created_at=utc(2014, 4, day))
+        TodoNonExisting.objects.create(title="may", created_at=utc(2014, 5, 1))
+
+        # A partition cannot be created over rows in the default partition while it is attached.
+        self.service = PartitioningService(TodoNonExisting, batch_size=2)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {self.service.default_table}")
+        self.service._create_partitions(self.service._partitions_between(utc(2014, 4, 1), utc(2014, 4, 1)))
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+
+    def rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT title FROM {table} ORDER BY created_at")
+            return [title for (title,) in cursor.fetchall()]
+
+    def test_rows_are_moved_in_keyset_chunks(self):
+        moved = []
+        original = self.service._move_chunk
+
+        def spy(*args, **kwargs):
+            result = original(*args, **kwargs)
+            moved.append(result[0])
+            return result
+
+        with mock.patch.object(self.service, "_move_chunk", side_effect=spy):
+            self.assertEqual(self.service.move_default_data(), "✅ Moved 5 rows into partitions.")
+
+        # batch_size rows per chunk; the empty one ends the range
+        self.assertEqual(moved, [2, 2, 1, 0])
+        self.assertEqual(self.rows(f"{TABLE}_2014_apr"), [f"april {day}" for day in (1, 2, 3, 4, 30)])
+        self.assertEqual(self.rows(self.service.default_table), ["may"])
+
+    def test_nothing_to_move(self):
+        self.service.move_default_data()
+        self.assertEqual(self.service.move_default_data(), "✅ No rows in default partition.")
@@ -0,0 +1,44 @@
+import pytest
+from django.test import SimpleTestCase, TestCase
+
+from core.pagination import InvalidCursor, KeysetPaginator
+from todo.models import TodoNonExisting
+from todo.testing import utc
+
+
+class CursorTests(SimpleTestCase):
+    def test_cursor_round_trip(self):
+        cursor = KeysetPaginator.encode_cursor((utc(2026, 3, 1, 12), 42), "prev")
+        self.assertEqual(KeysetPaginator.decode_cursor(cursor), ((utc(2026, 3, 1, 12), 42), "prev"))
+
+    def test_invalid_cursors(self):
+        for cursor in ("garbage", KeysetPaginator.encode_cursor((utc(2026, 3, 1), 1), "sideways")):
+            with self.assertRaises(InvalidCursor):
+                KeysetPaginator.decode_cursor(cursor)
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class KeysetPaginatorTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        # Two rows share a timestamp, so the pk has to break the tie.
+        for day in (1, 2, 3, 3, 4, 5, 6):
+            TodoNonExisting.objects.create(title="paged", created_at=utc(2013, 2, day))
+        self.queryset = TodoNonExisting.objects.filter(title="paged")
+        self.newest_first = list(self.queryset.order_by("-created_at", "-id"))
+        self.paginator = KeysetPaginator(self.queryset, per_page=3)
+
+    def test_pages_walk_forward_and_back(self):
+        first = self.paginator.page()
+        second = self.paginator.page(first.next_cursor)
+        third = self.paginator.page(second.next_cursor)
+
+        self.assertEqual(list(first) + list(second) + list(third), self.newest_first)
+        self.assertEqual((first.has_previous, first.has_next), (False, True))
+        self.assertEqual((third.has_previous, third.has_next), (True, False))
+
+        back = self.paginator.page(third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertEqual((back.has_previous, back.has_next), (True, True))
+        self.assertEqual(list(self.paginator.page(back.previous_cursor)), list(first))
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from core.catalog import PartitionSnapshot, catalog
+from core.provisioning import IngestSample, PartitionProvisioner, check_shared_cache
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, partition, utc
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_process_local_cache_is_reported(self):
+        with self.settings(CACHES=LOCMEM):
+            self.assertEqual([warning.id for warning in check_shared_cache()], ["core.W001"])
+
+    def test_database_cache_passes(self):
+        self.assertEqual(check_shared_cache(), [])
+
+
+class ProvisioningPlanTests(SimpleTestCase):
+    def setUp(self):
+        self.now = datetime.now(dt_timezone.utc)
+        self.boundary = utc(self.now.year, self.now.month, 1) + relativedelta(months=1)
+        snapshot = PartitionSnapshot(TABLE, [partition("hot", self.boundary - timedelta(days=31), self.boundary)])
+        for module in ("core.provisioning", "core.services"):
+            patcher = mock.patch(f"{module}.catalog")
+            patcher.start().snapshot.return_value = snapshot
+            self.addCleanup(patcher.stop)
+
+    def plan(self, samples, lead, max_ahead=3):
+        provisioner = PartitionProvisioner(TodoNonExisting, lead=lead, max_ahead=max_ahead)
+        with mock.patch.object(provisioner, "sample", return_value=samples):
+            return provisioner.plan()
+
+    def test_rates_per_partition(self):
+        samples = [
+            IngestSample(0, {f"{TABLE}_hot": 10, f"{TABLE}_default": 5}, None),
+            IngestSample(10, {f"{TABLE}_hot": 110, f"{TABLE}_default": 5}, None),
+        ]
+        plan = self.plan(samples, lead=timedelta(0))
+        self.assertEqual((plan.rate, plan.rates), (10.0, {f"{TABLE}_hot": 10.0}))
+        self.assertEqual((plan.speed, plan.boundary, plan.partitions), (1.0, self.boundary, []))
+
+    def test_partitions_the_frontier_reaches_within_the_lead(self):
+        sample = IngestSample(0, {}, None)
+        plan = self.plan([sample], lead=self.boundary - self.now + timedelta(days=1))
+        self.assertEqual([p.from_values for p in plan.partitions], [self.boundary.strftime("%Y-%m-%d")])
+
+        plan = self.plan([sample], lead=timedelta(days=100), max_ahead=2)
+        self.assertEqual(len(plan.partitions), 2)
+
+    def test_frontier_speed(self):
+        samples = [IngestSample(0, {}, self.now), IngestSample(100, {}, self.now + timedelta(seconds=200))]
+        plan = self.plan(samples, lead=timedelta(0))
+        self.assertEqual(plan.speed, 2.0)
+        self.assertEqual(plan.reached_in, timedelta(seconds=round((self.boundary - plan.frontier).total_seconds() / 2)))
+
+
+@pytest.mark.usefixtures("django_db_setup")
+@override_settings(CACHES=LOCMEM)
+class IngestSampleTests(TransactionTestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2003, 1, 1), utc(2003, 2, 1)))
+        self.provisioner = PartitionProvisioner(TodoNonExisting)
+        cache.clear()
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}_2003_jan, {TABLE}_2003_feb")
+        catalog.invalidate(TABLE)
+
+    def insert(self, *created_at):
+        for value in created_at:
+            TodoNonExisting.objects.create(title="ingested", created_at=value)
+        # Write counters reach pg_stat_user_tables asynchronously.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_stat_force_next_flush()")
+
+    def test_frontier_follows_the_partition_taking_inserts(self):
+        self.insert(utc(2003, 1, 5))
+        [first] = self.provisioner.sample()
+        self.assertIsNone(first.frontier)
+
+        self.insert(utc(2003, 1, 20), utc(2003, 2, 3))
+        samples = self.provisioner.sample()
+
+        self.assertEqual(len(samples), 2)
+        self.assertEqual(samples[-1].frontier, utc(2003, 2, 3))
+        self.assertEqual(samples[-1].inserts[f"{TABLE}_2003_feb"] - first.inserts[f"{TABLE}_2003_feb"], 1)
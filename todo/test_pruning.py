@@ -0,0 +1,63 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.test import SimpleTestCase, TestCase
+
+from core.catalog import catalog
+from core.explain import plan_pruning
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, utc
+
+
+class PlanPruningTests(SimpleTestCase):
+    def test_scanned_and_runtime_pruned_partitions(self):
+        plan = {
+            "Node Type": "Append",
+            "Subplans Removed": 1,
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "t_2026_01"},
+                {"Node Type": "Index Scan", "Relation Name": "t_2026_02"},
+                {"Node Type": "Seq Scan", "Relation Name": "other"},
+            ],
+        }
+        report = plan_pruning(plan, ["t_2026_01", "t_2026_02", "t_2026_03", "t_default"])
+        self.assertEqual(report, {"scanned": ["t_2026_01", "t_2026_02"], "total": 4, "pruned": 3})
+
+
+@mock.patch("django.utils.timezone.now", return_value=utc(2026, 10, 17, 12))
+class TimePartitionedQuerySetTests(SimpleTestCase):
+    def test_current_partition_bounds(self, now):
+        queryset = TodoNonExisting.objects.all()
+        self.assertEqual(queryset.partition_start(), utc(2026, 10, 1))
+        self.assertEqual(queryset.partition_end(), utc(2026, 11, 1))
+
+    def test_recent_partitions_window_ends_with_the_current_partition(self, now):
+        self.assertEqual(
+            TodoNonExisting.objects.recent_partitions(3).window(),
+            (utc(2026, 8, 1), utc(2026, 11, 1)),
+        )
+
+    def test_since_is_capped_at_the_current_partition_end(self, now):
+        queryset = TodoNonExisting.objects.since(timedelta(days=7)).filter(is_completed=False)
+        self.assertEqual(queryset.window(), (utc(2026, 10, 10, 12), utc(2026, 11, 1)))
+        self.assertIn('"created_at" < 2026-11-01', str(queryset.query))
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class PruningReportTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2016, 1, 1), utc(2016, 3, 1)))
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+
+    def test_window_scans_only_its_partition(self):
+        report = TodoNonExisting.objects.between(utc(2016, 2, 1), utc(2016, 3, 1)).pruning()
+
+        self.assertEqual(report["scanned"], [f"{TABLE}_2016_feb"])
+        self.assertEqual(report["pruned"], report["total"] - 1)
@@ -0,0 +1,99 @@
+from datetime import datetime
+from unittest import mock
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+
+from core.catalog import PartitionSnapshot, catalog
+from core.rebalance import PartitionRebalancer, Rebalance, granularity
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, months, partition, utc
+
+
+class RebalancerPlanTests(SimpleTestCase):
+    def plan(self, partitions, sizes, **thresholds):
+        rebalancer = PartitionRebalancer(TodoNonExisting, **thresholds)
+        snapshot = PartitionSnapshot(TABLE, partitions)
+        with mock.patch.object(rebalancer, "sizes", return_value=sizes), \
+                mock.patch("core.rebalance.catalog") as patched:
+            patched.snapshot.return_value = snapshot
+            return rebalancer.plan()
+
+    def test_granularity(self):
+        self.assertEqual(granularity(months(2026, 2, 2)[0]), "month")
+        self.assertEqual(granularity(partition("2026", utc(2026, 1, 1), utc(2027, 1, 1))), "year")
+        self.assertIsNone(granularity(partition("odd", utc(2026, 1, 1), utc(2026, 3, 1))))
+
+    def test_small_months_covering_a_year_are_merged(self):
+        partitions = months(2024)
+        plan = self.plan(partitions, {p.name: (10, 8192) for p in partitions}, min_rows=100)
+
+        self.assertEqual(len(plan), 1)
+        self.assertEqual(plan[0].action, "merge")
+        self.assertEqual(plan[0].old, partitions)
+        self.assertEqual(plan[0].new[0].start_datetime, datetime(2024, 1, 1))
+        self.assertEqual(plan[0].new[0].end_datetime, datetime(2025, 1, 1))
+
+    def test_incomplete_year_is_not_merged(self):
+        partitions = months(2024, 1, 11)
+        self.assertEqual(self.plan(partitions, {p.name: (10, 8192) for p in partitions}, min_rows=100), [])
+
+    def test_one_large_month_blocks_the_merge(self):
+        partitions = months(2024)
+        sizes = {p.name: (10, 8192) for p in partitions}
+        sizes[partitions[5].name] = (1000, 8192)
+        self.assertEqual(self.plan(partitions, sizes, min_rows=100), [])
+
+    def test_oversized_month_is_split_into_days(self):
+        partitions = months(2024, 2, 2)
+        plan = self.plan(partitions, {partitions[0].name: (5000, 8192)}, max_rows=1000)
+
+        self.assertEqual([r.action for r in plan], ["split"])
+        self.assertEqual(len(plan[0].new), 29)
+        self.assertEqual(plan[0].new[-1].end_datetime, datetime(2024, 3, 1))
+
+    def test_open_partition_is_not_split(self):
+        start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        current = partition("current", start, start + relativedelta(months=1))
+        self.assertEqual(self.plan([current], {current.name: (5000, 8192)}, max_rows=1000), [])
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class RebalancerReplaceTests(TransactionTestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2015, 1, 1), utc(2015, 12, 1)))
+        for month in range(1, 13):
+            TodoNonExisting.objects.create(title=f"month {month}", created_at=utc(2015, month, 9))
+        catalog.invalidate(TABLE)
+        self.rebalancer = PartitionRebalancer(TodoNonExisting, chunk_size=5)
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+        with connection.cursor() as cursor:
+            for name, *_ in PartitioningService(TodoNonExisting).get_partitions():
+                if name.startswith(f"{TABLE}_2015"):
+                    cursor.execute(f"DROP TABLE {name}")
+        catalog.invalidate(TABLE)
+
+    def test_months_are_merged_into_a_year(self):
+        old = [p for p in catalog.snapshot(TABLE).partitions if p.name.startswith(f"{TABLE}_2015")]
+        year = self.rebalancer._partitions("year", utc(2015, 1, 1), utc(2016, 1, 1))
+
+        self.assertEqual(self.rebalancer.replace(Rebalance("merge", old, year)), 12)
+
+        self.assertEqual(
+            [p for p in PartitioningService(TodoNonExisting).get_partitions() if p[0].startswith(f"{TABLE}_2015")],
+            [(f"{TABLE}_2015", utc(2015, 1, 1), utc(2016, 1, 1))],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {TABLE}_2015")
+            self.assertEqual(cursor.fetchone(), (12,))
+            cursor.execute("SELECT to_regclass(%s)", [self.rebalancer.staging_table])
+            self.assertEqual(cursor.fetchone(), (None,))
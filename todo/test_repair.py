@@ -0,0 +1,60 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core.catalog import catalog
+from core.services import PartitioningService
+from todo.models import TodoNonExisting, TodoPartitionRollup
+from todo.testing import TABLE, months, utc
+
+
+class DefaultCheckSqlTests(SimpleTestCase):
+    def test_adjacent_ranges_are_coalesced(self):
+        service = PartitioningService(TodoNonExisting)
+        bounds = [(p.name, p.range_from, p.range_to) for p in months(2026, 1, 3) + months(2026, 6, 6)]
+        with mock.patch.object(service, "get_partitions", return_value=bounds):
+            sql, params = service._default_check_sql()
+
+        self.assertEqual(sql.count("created_at >= %s"), 2)
+        self.assertEqual(params, [utc(2026, 1, 1), utc(2026, 4, 1), utc(2026, 6, 1), utc(2026, 7, 1)])
+
+    def test_no_partitions(self):
+        service = PartitioningService(TodoNonExisting)
+        with mock.patch.object(service, "get_partitions", return_value=[]):
+            self.assertEqual(service._default_check_sql(), (None, []))
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class DetachedRepairTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        catalog.invalidate(TABLE)
+        self.service = PartitioningService(TodoNonExisting)
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+
+    def test_repair_detached_moves_rows_and_reattaches_default(self):
+        for day in (3, 20):
+            TodoNonExisting.objects.create(title="stray", created_at=utc(2020, 3, day))
+        TodoPartitionRollup.objects.create(
+            partition=f"{TABLE}_2020_mar", range_from=utc(2020, 3, 1), range_to=utc(2020, 4, 1),
+            closed=True, computed_at=timezone.now(),
+        )
+
+        self.service.repair_detached()
+        self.assertFalse(TodoPartitionRollup.objects.filter(partition=f"{TABLE}_2020_mar").exists())
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relispartition, (SELECT COUNT(*) FROM pg_constraint WHERE conrelid = pg_class.oid "
+                "AND contype = 'c') FROM pg_class WHERE relname = %s",
+                [self.service.default_table],
+            )
+            self.assertEqual(cursor.fetchone(), (True, 0))
+            cursor.execute(f"SELECT tableoid::regclass::text, COUNT(*) FROM {TABLE} WHERE title = 'stray' GROUP BY 1")
+            self.assertEqual(cursor.fetchall(), [(f"{TABLE}_2020_mar", 2)])
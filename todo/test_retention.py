@@ -0,0 +1,81 @@
+import csv
+import gzip
+import io
+import sys
+import tempfile
+from unittest import mock
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core.catalog import catalog
+from core.retention import PartitionRetention
+from core.services import PartitioningService
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, utc
+
+MAX_AGE = relativedelta(years=15)
+
+
+class RetentionConfigTests(SimpleTestCase):
+    def test_unknown_archive_format(self):
+        with self.assertRaises(ValueError):
+            PartitionRetention(TodoNonExisting, MAX_AGE, archive="rar")
+
+    def test_missing_archive_package_fails_before_anything_is_detached(self):
+        retention = PartitionRetention(TodoNonExisting, MAX_AGE, archive="zstd")
+        with mock.patch.dict(sys.modules, {"zstandard": None}), \
+                mock.patch.object(retention, "expired") as expired, \
+                self.assertRaises(ImproperlyConfigured):
+            retention.apply()
+        expired.assert_not_called()
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class PartitionRetentionTests(TransactionTestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2007, 1, 1), utc(2007, 2, 1)))
+        for month in (1, 1, 2):
+            TodoNonExisting.objects.create(title=f"month {month}", created_at=utc(2007, month, 3))
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_dir.cleanup)
+        self.retention = PartitionRetention(TodoNonExisting, MAX_AGE, archive="gzip", archive_dir=self.archive_dir.name)
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}_2007_jan, {TABLE}_2007_feb")
+        catalog.invalidate(TABLE)
+
+    def archived_titles(self, table):
+        with gzip.open(self.retention.archive_path(table), "rt") as archive:
+            return [row["title"] for row in csv.DictReader(io.StringIO(archive.read()))]
+
+    def test_expired_partitions_are_archived_and_dropped(self):
+        self.assertEqual(self.retention.expired(), [f"{TABLE}_2007_jan", f"{TABLE}_2007_feb"])
+
+        self.assertEqual(
+            self.retention.apply(),
+            f"✅ Removed 2 partitions of TodoNonExisting: {TABLE}_2007_jan, {TABLE}_2007_feb",
+        )
+
+        self.assertEqual(self.archived_titles(f"{TABLE}_2007_jan"), ["month 1", "month 1"])
+        self.assertEqual(self.archived_titles(f"{TABLE}_2007_feb"), ["month 2"])
+        self.assertEqual(self.retention.expired(), [])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [f"{TABLE}_2007_jan"])
+            self.assertEqual(cursor.fetchone(), (None,))
+
+    def test_interrupted_run_is_finished_by_the_next(self):
+        self.retention.detach(f"{TABLE}_2007_jan")  # then the process died
+        self.assertEqual(self.retention.leftovers(), [f"{TABLE}_2007_jan"])
+
+        self.retention.apply()
+
+        self.assertEqual(self.retention.leftovers(), [])
+        self.assertEqual(self.archived_titles(f"{TABLE}_2007_jan"), ["month 1", "month 1"])
@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+from django.test import TransactionTestCase
+
+from core.catalog import catalog
+from core.rollups import PartitionRollups, forget_rollups
+from core.services import PartitioningService
+from todo.models import TodoNonExisting, TodoPartitionRollup
+from todo.testing import TABLE, utc
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class PartitionRollupsTests(TransactionTestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2006, 1, 1), utc(2006, 2, 1)))
+        TodoNonExisting.objects.create(title="done", is_completed=True, created_at=utc(2006, 1, 10))
+        TodoNonExisting.objects.create(title="late", deadline=utc(2006, 1, 20), created_at=utc(2006, 1, 20))
+        TodoNonExisting.objects.create(title="feb", created_at=utc(2006, 2, 5))
+        TodoNonExisting.objects.create(title="unpartitioned", created_at=utc(2006, 3, 1))
+        self.rollups = PartitionRollups(TodoNonExisting)
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}_2006_jan, {TABLE}_2006_feb")
+        catalog.invalidate(TABLE)
+
+    def refresh(self):
+        # Write counters reach pg_stat_user_tables asynchronously.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_stat_force_next_flush()")
+        return self.rollups.refresh()
+
+    def test_closed_partitions_are_summarized_from_their_rollups(self):
+        self.assertEqual(self.refresh(), "✅ Refreshed 2 rollups of TodoNonExisting (0 final kept, 0 removed).")
+        TodoPartitionRollup.objects.filter(partition=f"{TABLE}_2006_jan").update(total=100)
+
+        summary = self.rollups.summary(utc(2006, 1, 1), utc(2006, 4, 1))
+        self.assertEqual((summary["total"], summary["completed"], summary["overdue"]), (102, 1, 1))
+        self.assertEqual((summary["min_created_at"], summary["max_created_at"]), (utc(2006, 1, 10), utc(2006, 3, 1)))
+
+        # Partially covered partitions are aggregated live.
+        self.assertEqual(self.rollups.summary(utc(2006, 1, 15), utc(2006, 2, 1))["total"], 1)
+        self.assertEqual(
+            [(row["partition"], row["total"]) for row in self.rollups.report(utc(2006, 1, 1), utc(2006, 4, 1))],
+            [(f"{TABLE}_2006_jan", 100), (f"{TABLE}_2006_feb", 1), (f"{TABLE}_default", 1)],
+        )
+
+    def test_written_partition_is_recomputed(self):
+        self.refresh()
+        self.assertEqual(self.refresh(), "✅ Refreshed 0 rollups of TodoNonExisting (2 final kept, 0 removed).")
+
+        TodoNonExisting.objects.create(title="backfilled", created_at=utc(2006, 1, 25))
+
+        self.assertEqual(self.refresh(), "✅ Refreshed 1 rollups of TodoNonExisting (1 final kept, 0 removed).")
+        self.assertEqual(TodoPartitionRollup.objects.get(partition=f"{TABLE}_2006_jan").total, 3)
+
+    def test_forgotten_rollups_fall_back_to_live_aggregates(self):
+        self.refresh()
+        TodoPartitionRollup.objects.filter(partition=f"{TABLE}_2006_jan").update(total=100)
+
+        forget_rollups(TodoNonExisting, [f"{TABLE}_2006_jan"])
+
+        self.assertEqual(self.rollups.summary(utc(2006, 1, 1), utc(2006, 2, 1))["total"], 2)
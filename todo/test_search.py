@@ -0,0 +1,44 @@
+import pytest
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.basemodels import trigram_index
+from todo.models import TodoNonExisting
+from todo.testing import utc
+
+
+class SearchQueryTests(SimpleTestCase):
+    def test_substring_search_ors_icontains_over_search_fields(self):
+        sql = str(TodoNonExisting.objects.search("milk").query)
+        self.assertIn('UPPER("todo_todononexisting"."title"::text) LIKE UPPER(%milk%)', sql)
+        self.assertIn('OR UPPER("todo_todononexisting"."description"::text) LIKE UPPER(%milk%)', sql)
+
+    def test_full_text_search_uses_websearch_syntax(self):
+        sql = str(TodoNonExisting.objects.search("milk -eggs", full_text=True).query)
+        self.assertIn("websearch_to_tsquery", sql)
+        self.assertIn('"search_vector" @@', sql)
+
+    def test_trigram_index_matches_the_icontains_expression(self):
+        with connection.schema_editor(collect_sql=True, atomic=False) as editor:
+            sql = str(trigram_index("title", name="t_trgm").create_sql(TodoNonExisting, editor))
+        self.assertIn('USING gin ((UPPER("title")) gin_trgm_ops)', sql)
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class SearchTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        TodoNonExisting.objects.create(title="Buy milk", description="", created_at=utc(2012, 1, 1))
+        TodoNonExisting.objects.create(title="Walk", description="buying eggs and milk", created_at=utc(2012, 1, 2))
+        TodoNonExisting.objects.create(title="Call mum", description="", created_at=utc(2012, 1, 3))
+
+    def titles(self, queryset):
+        return sorted(queryset.values_list("title", flat=True))
+
+    def test_substring_search_matches_any_field(self):
+        self.assertEqual(self.titles(TodoNonExisting.objects.search("MILK")), ["Buy milk", "Walk"])
+
+    def test_full_text_search_stems_and_excludes(self):
+        self.assertEqual(self.titles(TodoNonExisting.objects.search("buy", full_text=True)), ["Buy milk", "Walk"])
+        self.assertEqual(self.titles(TodoNonExisting.objects.search("milk -eggs", full_text=True)), ["Buy milk"])
@@ -0,0 +1,85 @@
+from datetime import datetime, timezone as dt_timezone
+from unittest import skipUnless
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.test import TransactionTestCase
+
+from core.catalog import catalog
+from core.conversion import OnlineTableConverter
+from core.retention import PartitionRetention
+from core.services import PartitioningService
+from todo.models import Todo, TodoNonExisting
+
+TABLE = TodoNonExisting._meta.db_table
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+@pytest.mark.usefixtures("django_db_setup")
+@skipUnless(is_psycopg3, "server-side binding needs psycopg 3")
+class ServerSideBindingTests(TransactionTestCase):
+    """Raw-cursor DDL that takes values keeps working with DB_SERVER_SIDE_BINDING on."""
+
+    def setUp(self):
+        self.original = connections[DEFAULT_DB_ALIAS]
+        settings_dict = self.original.settings_dict
+        connections[DEFAULT_DB_ALIAS] = type(self.original)(
+            {**settings_dict, "OPTIONS": {**settings_dict["OPTIONS"], "server_side_binding": True}},
+            DEFAULT_DB_ALIAS,
+        )
+        catalog.invalidate(TABLE)
+        self.partitions = {p.name for p in catalog.snapshot(TABLE).partitions}
+        self.created = []
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+        self.created += [p.name for p in catalog.snapshot(TABLE).partitions if p.name not in self.partitions]
+        with connection.cursor() as cursor:
+            for table in self.created:
+                cursor.execute(f"DROP TABLE IF EXISTS {connection.ops.quote_name(table)} CASCADE")
+        connection.close()
+        connections[DEFAULT_DB_ALIAS] = self.original
+        catalog.invalidate(TABLE)
+
+    def test_connection_binds_server_side(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(type(cursor.cursor).__name__, "ServerBindingCursor")
+
+    def test_repair_detached(self):
+        TodoNonExisting.objects.create(title="stray", created_at=utc(2019, 3, 5))
+
+        PartitioningService(TodoNonExisting).repair_detached()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT tableoid::regclass::text FROM {TABLE} WHERE title = 'stray'")
+            self.assertEqual(cursor.fetchall(), [(f"{TABLE}_2019_mar",)])
+
+    def test_conversion_creates_partitions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE todo_binding (id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, "
+                "created_at timestamptz NOT NULL)"
+            )
+        converter = OnlineTableConverter(Todo, "todo_binding")
+        self.created += [converter.target_table, "todo_binding"]
+        converter.create_partitioned_table()
+
+        partitions = converter.create_partitions(utc(2026, 1, 10), utc(2026, 3, 10))
+
+        self.assertEqual([p[0] for p in partitions], [f"todo_binding_2026_{m}" for m in ("jan", "feb", "mar")])
+
+    def test_retention_marks_detached_partition(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(datetime(2018, 1, 1), datetime(2018, 1, 1)))
+        name = f"{TABLE}_2018_jan"
+        self.created.append(name)  # detached, so no longer in the catalog
+
+        retention = PartitionRetention(TodoNonExisting, max_age=relativedelta(years=1))
+        retention.detach(name)
+
+        self.assertIn(name, retention.leftovers())
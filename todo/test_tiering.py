@@ -0,0 +1,83 @@
+from unittest import mock
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core.catalog import catalog
+from core.services import PartitioningService
+from core.tiering import PartitionTiering
+from todo.models import TodoNonExisting
+from todo.testing import TABLE, utc
+
+
+class TierTableTests(SimpleTestCase):
+    def tier(self, fail_on=None):
+        tiering = PartitionTiering(TodoNonExisting, relativedelta(months=1), tablespace="cold")
+        statements = []
+
+        def execute(sql, params=None):
+            if fail_on and sql.startswith(fail_on):
+                raise DatabaseError("failed")
+            statements.append(sql)
+            return [("part_idx",)] if "FROM pg_index" in sql else []
+
+        with mock.patch.object(tiering, "_execute", side_effect=execute), \
+                mock.patch.object(tiering, "_cluster_index", return_value="part_idx"), \
+                mock.patch.object(tiering, "indexes"):
+            tiering.indexes.create.return_value = []
+            try:
+                tiering._tier_table("part")
+            except DatabaseError:
+                pass
+        return statements
+
+    def test_table_is_compacted_before_it_is_moved(self):
+        statements = self.tier()
+        self.assertEqual(
+            statements[:4],
+            [
+                'ALTER TABLE "part" SET (fillfactor = 100)',
+                'CLUSTER "part" USING "part_idx"',
+                'ALTER TABLE "part" SET TABLESPACE "cold"',
+                "SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass",
+            ],
+        )
+        self.assertIn('ALTER INDEX part_idx SET TABLESPACE "cold"', statements)
+
+    def test_failed_move_takes_back_the_rewritten_mark(self):
+        statements = self.tier(fail_on='ALTER TABLE "part" SET TABLESPACE')
+        self.assertEqual(statements[-1], 'ALTER TABLE "part" RESET (fillfactor)')
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class PartitionTieringTests(TransactionTestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    name = f"{TABLE}_2018_mar"
+
+    def setUp(self):
+        service = PartitioningService(TodoNonExisting)
+        service._create_partitions(service._partitions_between(utc(2018, 3, 1), utc(2018, 3, 1)))
+        catalog.invalidate(TABLE)
+        for day in (20, 3, 11):
+            TodoNonExisting.objects.create(title=f"day {day}", created_at=utc(2018, 3, day))
+        self.tiering = PartitionTiering(TodoNonExisting, relativedelta(months=1), tablespace="pg_default")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.name}")
+        catalog.invalidate(TABLE)
+
+    def test_tiered_partition_is_rewritten_cold_indexed_and_done(self):
+        self.assertIn(self.name, self.tiering.candidates())
+
+        self.tiering.tier(self.name)
+
+        self.assertEqual(self.tiering._rewritten([self.name]), {self.name})
+        self.assertEqual(self.tiering._cold_indexed([self.name]), {self.name})
+        self.assertNotIn(self.name, self.tiering.candidates())
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT title FROM {self.name} ORDER BY ctid")
+            self.assertEqual([title for (title,) in cursor.fetchall()], ["day 3", "day 11", "day 20"])
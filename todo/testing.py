@@ -0,0 +1,28 @@
+"""
+Helpers shared by the todo test modules.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from dateutil.relativedelta import relativedelta
+from psqlextra.partitioning import PostgresTimePartitionSize
+
+from core.catalog import Partition
+from todo.models import TodoNonExisting
+
+MONTH = PostgresTimePartitionSize(months=1)
+TABLE = TodoNonExisting._meta.db_table
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+def partition(name, range_from, range_to, reltuples=0, leaves=None):
+    return Partition(f"{TABLE}_{name}", range_from, range_to, reltuples, leaves or [f"{TABLE}_{name}"])
+
+
+def months(year, first=1, last=12, reltuples=0):
+    return [
+        partition(f"{year}_{month:02d}", utc(year, month, 1), utc(year, month, 1) + relativedelta(months=1), reltuples)
+        for month in range(first, last + 1)
+    ]
@@ -1,3 +1,98 @@
-from django.test import TestCase
+from datetime import datetime, timezone as dt_timezone
 
-# Create your tests here.
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from psqlextra.partitioning import PostgresTimePartition
+
+from core.catalog import catalog
+from core.services import PartitioningService
+from core.subpartitions import (
+    HASH_BOUND,
+    HashSubPartitionedTimePartition,
+    hash_subpartitioned,
+    missing_subpartitions,
+)
+from todo.models import TodoNonExisting
+from todo.testing import MONTH, TABLE, utc
+
+
+class HashSubPartitionedTests(SimpleTestCase):
+    def partitions(self, *starts):
+        return [PostgresTimePartition(size=MONTH, start_datetime=start) for start in starts]
+
+    def test_only_partitions_not_ended_yet_are_subpartitioned(self):
+        partitions = self.partitions(datetime(2026, 9, 1), datetime(2026, 10, 1), datetime(2026, 11, 1))
+        wrapped = hash_subpartitioned(TodoNonExisting, partitions, now=utc(2026, 10, 17))
+
+        self.assertIs(wrapped[0], partitions[0])
+        self.assertIsInstance(wrapped[1], HashSubPartitionedTimePartition)
+        self.assertIsInstance(wrapped[2], HashSubPartitionedTimePartition)
+        self.assertEqual([p.name() for p in wrapped], [p.name() for p in partitions])
+        self.assertEqual((wrapped[1].key, wrapped[1].count), ("id", 4))
+
+    def test_partition_ending_now_is_closed(self):
+        partitions = self.partitions(datetime(2026, 9, 1))
+        self.assertIs(hash_subpartitioned(TodoNonExisting, partitions, now=utc(2026, 10, 1))[0], partitions[0])
+
+    def test_model_without_subpartitioning_is_left_alone(self):
+        class Plain:
+            class PartitioningMeta:
+                key = ["created_at"]
+
+        partitions = self.partitions(datetime(2026, 10, 1))
+        self.assertEqual(hash_subpartitioned(Plain, partitions, now=utc(2026, 10, 17)), partitions)
+
+    def test_hash_bound(self):
+        match = HASH_BOUND.search("FOR VALUES WITH (modulus 4, remainder 1)")
+        self.assertEqual(tuple(map(int, match.groups())), (4, 1))
+
+
+@pytest.mark.usefixtures("django_db_setup")
+class PartitionRepairTests(TestCase):
+    """Runs against the test database; skipped under pytest when Postgres is not reachable."""
+
+    def setUp(self):
+        catalog.invalidate(TABLE)
+        self.service = PartitioningService(TodoNonExisting)
+
+    def tearDown(self):
+        catalog.invalidate(TABLE)
+
+    def leaves(self):
+        catalog.invalidate(TABLE)
+        return catalog.snapshot(TABLE).leaves()
+
+    def test_current_month_is_created_with_subpartitions(self):
+        now = timezone.now().replace(tzinfo=None)
+        self.service._create_partitions(self.service._partitions_between(now, now))
+        name = f"{TABLE}_{PostgresTimePartition(size=MONTH, start_datetime=MONTH.start(now)).name()}"
+
+        self.assertEqual(self.leaves(), [f"{name}_h{r}" for r in range(4)] + [f"{TABLE}_default"])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {name}_h2")
+        self.assertEqual(missing_subpartitions(TodoNonExisting), [(name, 2, 4)])
+
+        self.service.repair_subpartitions()
+        self.assertEqual(missing_subpartitions(TodoNonExisting), [])
+        self.assertIn(f"{name}_h2", self.leaves())
+
+    def test_only_empty_plain_future_partitions_are_recreated(self):
+        start = MONTH.start(timezone.now().replace(tzinfo=None)) + relativedelta(months=2)
+        planned = [PostgresTimePartition(size=MONTH, start_datetime=start + relativedelta(months=n)) for n in (0, 1)]
+        with connection.schema_editor() as schema_editor:
+            for partition in planned:
+                partition.create(TodoNonExisting, schema_editor)
+        TodoNonExisting.objects.create(title="kept", created_at=planned[1].start_datetime.replace(tzinfo=dt_timezone.utc))
+
+        self.assertEqual(
+            self.service.repair_subpartitions(),
+            "✅ Created 0 missing sub-partitions, sub-partitioned 1 empty future partitions.",
+        )
+        leaves = self.leaves()
+        self.assertIn(f"{TABLE}_{planned[0].name()}_h0", leaves)
+        self.assertIn(f"{TABLE}_{planned[1].name()}", leaves)
+        self.assertEqual(TodoNonExisting.objects.filter(title="kept").count(), 1)
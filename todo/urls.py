@@ -1,7 +1,9 @@
 from django.urls import path
 from .views import (
     TodoListView, TodoDetailView, TodoCreateView,
-    TodoUpdateView, TodoDeleteView
+    TodoUpdateView, TodoDeleteView,
+    AsyncTodoListView, AsyncTodoDetailView, AsyncTodoCreateView,
+    AsyncTodoUpdateView, AsyncTodoDeleteView,
 )
 
 urlpatterns = [
@@ -10,4 +12,10 @@ urlpatterns = [
     path("todo/create/", TodoCreateView.as_view(), name="todo-create"),
     path("todo/<int:pk>/update/", TodoUpdateView.as_view(), name="todo-update"),
     path("todo/<int:pk>/delete/", TodoDeleteView.as_view(), name="todo-delete"),
+    # Async ORM versions, for ASGI
+    path("async/", AsyncTodoListView.as_view(), name="todo-list-async"),
+    path("async/todo/<int:pk>/", AsyncTodoDetailView.as_view(), name="todo-detail-async"),
+    path("async/todo/create/", AsyncTodoCreateView.as_view(), name="todo-create-async"),
+    path("async/todo/<int:pk>/update/", AsyncTodoUpdateView.as_view(), name="todo-update-async"),
+    path("async/todo/<int:pk>/delete/", AsyncTodoDeleteView.as_view(), name="todo-delete-async"),
 ]
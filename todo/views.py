@@ -1,27 +1,32 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.forms import modelform_factory
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, redirect, render
 from django.urls import reverse_lazy
+from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from .models import TodoNonExisting, Todo
+from core.counting import PartitionCountProvider
+from core.pagination import InvalidCursor, KeysetPaginator
 from todo.services.todo_list import get_partitioned_todos
-from django.db.models import Q
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-class TodoListView(ListView):
-    model = TodoNonExisting
-    template_name = "todos/todo_list.html"
-    context_object_name = "todos"
-    ordering = ["-created_at"]
-    paginate_by = 50
+logger = logging.getLogger(__name__)
+
+DATE_FILTER_DAYS = {"7days": 7, "30days": 30, "90days": 90}
 
-    def get_queryset(self):
-        # Default: last 3 months of partitioned data
-        queryset = TodoNonExisting.objects.all()
 
+class TodoFilterMixin:
+    """Search, status and date filters of the todo list, shared by the sync and async views."""
+
+    def filter_todos(self, queryset):
         # --- Search filter ---
         query = self.request.GET.get("q")
         if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) | Q(description__icontains=query)
-            )
+            queryset = queryset.search(query, full_text=self.request.GET.get("mode") == "words")
 
         # --- Completion status filter ---
         status = self.request.GET.get("status")
@@ -31,18 +36,70 @@ class TodoListView(ListView):
             queryset = queryset.filter(is_completed=False)
 
         # --- Date filter ---
+        # Bounds go on the partition key so Postgres prunes partitions; with no
+        # date filter only the most recent partitions are listed ("all" opts out).
         date_filter = self.request.GET.get("date")
-        today = datetime.now().date()
 
-        if date_filter == "7days":
-            queryset = queryset.filter(created_at__gte=today - timedelta(days=7))
-        elif date_filter == "30days":
-            queryset = queryset.filter(created_at__gte=today - timedelta(days=30))
-        elif date_filter == "90days":
-            queryset = queryset.filter(created_at__gte=today - timedelta(days=90))
+        if date_filter in DATE_FILTER_DAYS:
+            queryset = queryset.since(timedelta(days=DATE_FILTER_DAYS[date_filter]))
+        elif date_filter != "all":
+            queryset = queryset.recent_partitions(settings.TODO_LIST_DEFAULT_PARTITIONS)
 
         return queryset
 
+    def log_pruning(self):
+        logger.debug(
+            "%s scans %s of %s partitions (%s pruned)", type(self).__name__,
+            len(self.pruning["scanned"]), self.pruning["total"], self.pruning["pruned"],
+        )
+
+    def _cursor_query(self, cursor):
+        params = self.request.GET.copy()
+        params["cursor"] = cursor
+        return params.urlencode()
+
+
+class TodoListView(TodoFilterMixin, ListView):
+    model = TodoNonExisting
+    template_name = "todos/todo_list.html"
+    context_object_name = "todos"
+    ordering = ["-created_at"]
+    paginate_by = 50
+
+    def get_queryset(self):
+        queryset = self.filter_todos(TodoNonExisting.objects.all())
+
+        if settings.DEBUG:
+            self.pruning = queryset.pruning()
+            self.log_pruning()
+
+        return queryset
+
+    def paginate_queryset(self, queryset, page_size):
+        """Keyset pagination on (created_at, id) instead of OFFSET + COUNT(*)."""
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Invalid page cursor.")
+        return paginator, page, page.object_list, page.has_next or page.has_previous
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["pruning"] = getattr(self, "pruning", None)
+
+        # Exact for small windows, approximate otherwise.
+        params = self.request.GET
+        context["total"] = PartitionCountProvider(TodoNonExisting).count(
+            self.object_list,
+            filtered=bool(params.get("status") or params.get("q")),
+        )
+
+        page = context["page_obj"]
+        context["next_query"] = self._cursor_query(page.next_cursor) if page.has_next else None
+        context["previous_query"] = self._cursor_query(page.previous_cursor) if page.has_previous else None
+        return context
+
 class TodoDetailView(DetailView):
     model = TodoNonExisting
     template_name = "todos/todo_detail.html"
@@ -64,3 +121,94 @@ class TodoDeleteView(DeleteView):
     model = TodoNonExisting
     template_name = "todos/todo_confirm_delete.html"
     success_url = reverse_lazy("todo-list")
+
+
+# --- Async views ---
+# Same pages on Django's async ORM (aiterator/acount/aget/asave/adelete), for
+# ASGI deployments; querysets are fully evaluated before templates render.
+
+TodoForm = modelform_factory(TodoNonExisting, fields=["title", "description", "is_completed"])
+
+
+class AsyncTodoListView(TodoFilterMixin, View):
+    template_name = "todos/todo_list.html"
+    paginate_by = 50
+
+    async def get(self, request):
+        queryset = self.filter_todos(TodoNonExisting.objects.all())
+
+        self.pruning = None
+        if settings.DEBUG:
+            self.pruning = await sync_to_async(queryset.pruning)()
+            self.log_pruning()
+
+        try:
+            page = await KeysetPaginator(queryset, self.paginate_by).apage(request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Invalid page cursor.")
+
+        params = request.GET
+        total = await PartitionCountProvider(TodoNonExisting).acount(
+            queryset,
+            filtered=bool(params.get("status") or params.get("q")),
+        )
+
+        return render(request, self.template_name, {
+            "todos": page.object_list,
+            "page_obj": page,
+            "pruning": self.pruning,
+            "total": total,
+            "next_query": self._cursor_query(page.next_cursor) if page.has_next else None,
+            "previous_query": self._cursor_query(page.previous_cursor) if page.has_previous else None,
+        })
+
+
+class AsyncTodoDetailView(View):
+    template_name = "todos/todo_detail.html"
+
+    async def get(self, request, pk):
+        todo = await aget_object_or_404(TodoNonExisting, pk=pk)
+        return render(request, self.template_name, {"todo": todo, "object": todo})
+
+
+class AsyncTodoCreateView(View):
+    template_name = "todos/todo_form.html"
+
+    async def get(self, request):
+        return render(request, self.template_name, {"form": TodoForm()})
+
+    async def post(self, request):
+        form = TodoForm(request.POST)
+        if not form.is_valid():
+            return render(request, self.template_name, {"form": form})
+        await form.save(commit=False).asave()
+        return redirect("todo-list-async")
+
+
+class AsyncTodoUpdateView(View):
+    template_name = "todos/todo_form.html"
+
+    async def get(self, request, pk):
+        todo = await aget_object_or_404(TodoNonExisting, pk=pk)
+        return render(request, self.template_name, {"form": TodoForm(instance=todo), "object": todo})
+
+    async def post(self, request, pk):
+        todo = await aget_object_or_404(TodoNonExisting, pk=pk)
+        form = TodoForm(request.POST, instance=todo)
+        if not form.is_valid():
+            return render(request, self.template_name, {"form": form, "object": todo})
+        await form.save(commit=False).asave()
+        return redirect("todo-list-async")
+
+
+class AsyncTodoDeleteView(View):
+    template_name = "todos/todo_confirm_delete.html"
+
+    async def get(self, request, pk):
+        todo = await aget_object_or_404(TodoNonExisting, pk=pk)
+        return render(request, self.template_name, {"object": todo})
+
+    async def post(self, request, pk):
+        todo = await aget_object_or_404(TodoNonExisting, pk=pk)
+        await todo.adelete()
+        return redirect("todo-list-async")